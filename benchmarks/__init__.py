@@ -0,0 +1 @@
+"""Performance benchmarks for Sonika (run with ``python -m benchmarks``)."""
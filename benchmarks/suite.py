@@ -0,0 +1,477 @@
+"""Sonika turn-pipeline benchmarks.
+
+Every benchmark drives real Sonika code with the offline ``mock`` provider
+(zero inter-token delay), so the numbers are Sonika's own overhead, not the
+model's. Terminal output goes to /dev/null through the real renderer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+# Allowed relative regression per metric before the run fails (0.5 = +50%).
+# Timings on shared machines are noisy; memory is stable.
+THRESHOLDS: dict[str, float] = {
+    "ttf_rendered_token_ms": 0.5,
+    "turn_ms": 0.5,
+    "show_token_us": 0.5,
+    "final_render_ms": 0.5,
+    "stream_chunk_us": 0.5,
+    "thinking_delta_us_5k": 0.5,
+    "thinking_delta_us_50k": 0.5,
+    "frame_writes_10k_tokens": 1.0,
+    "frame_cpu_ms_10k_tokens": 0.5,
+    "execute_us": 0.5,
+    "execute_overhead_us": 0.75,
+    "session_save_ms": 0.5,
+    "session_load_ms": 0.5,
+    "session_list_ms": 0.5,
+    "peak_mb_50_turns": 0.25,
+}
+DEFAULT_THRESHOLD = 0.5
+
+# Differences below these are noise, whatever the ratio says
+NOISE_FLOOR: dict[str, float] = {"us": 5.0, "ms": 0.5, "MB": 0.5, "calls": 10.0}
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+_ANSWER = (
+    "Revise el log de hoy. Hay **3 advertencias** y ningun error critico.\n\n"
+    "- disco al 81%\n- reintentos de DNS\n- certificado vence en 20 dias\n"
+)
+
+
+@dataclass
+class Metric:
+    value: float
+    unit: str
+
+
+# ── Environment ───────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def _sandbox() -> Iterator[Path]:
+    """Temp ~/.sonika, sessions dir and a /dev/null stdout."""
+    from sonika.cli import session_manager
+    from sonika.persist import get_writer
+
+    with tempfile.TemporaryDirectory(prefix="sonika-bench-") as tmp, open(
+        os.devnull, "w", encoding="utf-8"
+    ) as devnull:
+        saved = session_manager.SESSIONS_DIR
+        session_manager.SESSIONS_DIR = Path(tmp) / "sessions"
+        try:
+            with contextlib.redirect_stdout(devnull):
+                yield Path(tmp)
+        finally:
+            # Queued background saves must land in the sandbox, not ~/.sonika
+            get_writer().flush()
+            session_manager.SESSIONS_DIR = saved
+
+
+def _write_script(tmp: Path, with_tool: bool) -> str:
+    responses = []
+    if with_tool:
+        responses.append({"tool_calls": [{"name": "get_datetime", "args": {}}]})
+    responses.append({"text": _ANSWER})
+    path = tmp / "script.json"
+    path.write_text(json.dumps({"loop": True, "responses": responses}), encoding="utf-8")
+    return str(path)
+
+
+def _make_cli(tmp: Path, script: str, renderer=None):
+    from sonika.cli.app import SonikaCLI
+    from sonika.config_schema import SonikaAppConfig
+
+    cfg = SonikaAppConfig(config_dir=tmp, tool_groups=["core"])
+    cli = SonikaCLI(config=cfg, renderer=renderer)
+    cli._config.set_active("mock", script)
+    cli._mode = "auto"
+    return cli
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+
+def bench_turn(turns: int = 20) -> dict[str, Metric]:
+    """Time from _send() to the first token on screen, and full turn time."""
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    class _Timed(ClaudeStyleRenderer):
+        first_token_at: float | None = None
+
+        def show_token(self, token: str, is_pre_tool: bool) -> None:
+            super().show_token(token, is_pre_tool)
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+
+    ttft: list[float] = []
+    total: list[float] = []
+    with _sandbox() as tmp:
+        renderer = _Timed()
+        cli = _make_cli(tmp, _write_script(tmp, with_tool=False), renderer)
+
+        async def _run() -> None:
+            await cli._start_session()
+            await cli._send("warm-up")
+            for i in range(turns):
+                renderer.first_token_at = None
+                t0 = time.perf_counter()
+                await cli._send(f"resume el log {i}")
+                total.append((time.perf_counter() - t0) * 1000)
+                if renderer.first_token_at is not None:
+                    ttft.append((renderer.first_token_at - t0) * 1000)
+
+        asyncio.run(_run())
+    return {
+        "ttf_rendered_token_ms": Metric(statistics.median(ttft), "ms"),
+        "turn_ms": Metric(statistics.median(total), "ms"),
+    }
+
+
+def bench_show_token(tokens: int = 10_000) -> dict[str, Metric]:
+    """Per-token cost of streaming an answer through ClaudeStyleRenderer,
+    Markdown rendering included (show_token calls plus show_final_response)."""
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    words = [w + " " for w in _ANSWER.split(" ")]
+    answer = "".join(words[i % len(words)] for i in range(tokens))
+    runs, finals = [], []
+    with _sandbox():
+        renderer = ClaudeStyleRenderer()
+        for _ in range(3):
+            renderer.show_ai_start("mock", "bench")
+            t0 = time.perf_counter()
+            for i in range(tokens):
+                renderer.show_token(words[i % len(words)], is_pre_tool=False)
+            t1 = time.perf_counter()
+            renderer.show_final_response(answer)
+            t2 = time.perf_counter()
+            runs.append((t2 - t0) / tokens * 1e6)
+            finals.append((t2 - t1) * 1000)
+            renderer.show_ai_end(0.0, "mock", "bench")
+    # final_render_ms: the pause between the last token and the finished answer
+    return {
+        "show_token_us": Metric(min(runs), "us"),
+        "final_render_ms": Metric(min(finals), "ms"),
+    }
+
+
+def bench_stream_events(chunks: int = 20_000) -> dict[str, Metric]:
+    """Per-chunk cost of StreamNormalizer.feed on streamed text chunks."""
+    from langchain_core.messages import AIMessageChunk
+
+    from sonika.stream_events import StreamNormalizer, Token
+
+    words = [w + " " for w in _ANSWER.split(" ")]
+    raw = [("messages", (AIMessageChunk(content=words[i % len(words)]), {})) for i in range(chunks)]
+    runs = []
+    for _ in range(5):
+        norm = StreamNormalizer()
+        n = 0
+        t0 = time.perf_counter()
+        for stream_mode, payload in raw:
+            for ev in norm.feed(stream_mode, payload):
+                if type(ev) is Token:
+                    n += 1
+        runs.append((time.perf_counter() - t0) / chunks * 1e6)
+    return {"stream_chunk_us": Metric(min(runs), "us")}
+
+
+def bench_thinking(deltas: int = 50_000) -> dict[str, Metric]:
+    """Per-delta cost of accumulating a long reasoning stream (TextBuffer plus
+    ClaudeStyleRenderer.show_thinking), at 5k and at 50k deltas: with linear
+    accumulation the two are about the same."""
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+    from sonika.stream_events import TextBuffer
+
+    words = [w + " " for w in _ANSWER.split(" ")]
+    metrics: dict[str, Metric] = {}
+    with _sandbox():
+        renderer = ClaudeStyleRenderer()
+        for n in (deltas // 10, deltas):
+            runs = []
+            for _ in range(3):
+                renderer.show_ai_start("mock", "bench")
+                thinking = TextBuffer()
+                t0 = time.perf_counter()
+                for i in range(n):
+                    delta = words[i % len(words)]
+                    thinking.append(delta)
+                    renderer.show_thinking(delta, thinking.line_count)
+                runs.append((time.perf_counter() - t0) / n * 1e6)
+                renderer.show_thinking_end(thinking)
+                renderer.show_ai_end(0.0, "mock", "bench")
+            metrics[f"thinking_delta_us_{n // 1000}k"] = Metric(min(runs), "us")
+    return metrics
+
+
+class _CountingStdout:
+    """/dev/null stdout that counts write and flush calls (one syscall each)."""
+
+    def __init__(self, target) -> None:
+        self._target = target
+        self.calls = 0
+
+    def write(self, text: str) -> int:
+        self.calls += 1
+        return self._target.write(text)
+
+    def flush(self) -> None:
+        self.calls += 1
+        self._target.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+def bench_frames(tokens: int = 10_000, burst: int = 20) -> dict[str, Metric]:
+    """Terminal writes and CPU for ``tokens`` streamed tokens, rendered per
+    chunk (render_fps=0) and through FrameQueue at the default frame rate.
+    Tokens arrive in bursts of ``burst`` every millisecond."""
+    from sonika.cli.frames import DEFAULT_FPS, FrameQueue
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    words = [w + " " for w in _ANSWER.split(" ")]
+
+    async def _stream(renderer, fps: int) -> None:
+        frames = FrameQueue(renderer, fps=fps).start()
+        for i in range(tokens):
+            await frames.put("show_token", words[i % len(words)], False)
+            if i % burst == burst - 1:
+                await asyncio.sleep(0.001)
+        await frames.close()
+
+    metrics: dict[str, Metric] = {}
+    with _sandbox():
+        for fps, suffix in ((0, "_unpaced"), (DEFAULT_FPS, "")):
+            out = _CountingStdout(sys.stdout)
+            renderer = ClaudeStyleRenderer()
+            renderer.show_ai_start("mock", "bench")
+            with contextlib.redirect_stdout(out):
+                cpu0 = time.process_time()
+                asyncio.run(_stream(renderer, fps))
+                cpu = (time.process_time() - cpu0) * 1000
+            renderer.show_ai_end(0.0, "mock", "bench")
+            metrics[f"frame_writes_10k_tokens{suffix}"] = Metric(out.calls * 10_000 / tokens, "calls")
+            metrics[f"frame_cpu_ms_10k_tokens{suffix}"] = Metric(cpu * 10_000 / tokens, "ms")
+    return metrics
+
+
+def bench_execute(calls: int = 5_000) -> dict[str, Metric]:
+    """ExecutorBot.execute overhead over invoking the tool directly."""
+    from langchain_core.tools import tool
+
+    from sonika.bot import ExecutorBot
+
+    @tool
+    def noop(value: str) -> str:
+        """Return the value unchanged."""
+        return value
+
+    bot = ExecutorBot(tools=[noop])
+    params = {"value": "x"}
+
+    def _time(fn: Callable[[], object]) -> float:
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        return (time.perf_counter() - t0) / calls * 1e6
+
+    # Interleave so both sides see the same machine state
+    executed, overhead = [], []
+    for _ in range(7):
+        direct = _time(lambda: noop.invoke(params))
+        executed.append(_time(lambda: bot.execute("noop", params)))
+        overhead.append(executed[-1] - direct)
+    return {
+        "execute_us": Metric(min(executed), "us"),
+        "execute_overhead_us": Metric(max(0.0, statistics.median(overhead)), "us"),
+    }
+
+
+def bench_persistence(turns: int = 50, repeats: int = 30, listed: int = 200) -> dict[str, Metric]:
+    """Session.save / SessionManager.load for a session with ``turns`` exchanges
+    (in full and just the last 10 exchanges, as /session opens it), and the
+    first page of the session list with ``listed`` sessions on disk."""
+    from sonika.cli.session_manager import Session, SessionManager
+
+    saves, loads, tails, lists = [], [], [], []
+    with _sandbox():
+        for i in range(listed):
+            other = Session(provider="mock", model="bench")
+            other.add_message("user", f"sesion {i}")
+            other.add_message("assistant", _ANSWER)
+            other.save()
+        session = Session(provider="mock", model="bench")
+        for i in range(turns):
+            session.add_message("user", f"pregunta {i}: resume el log")
+            session.add_message("assistant", _ANSWER * 4)
+        mgr = SessionManager()
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            session.save()
+            saves.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            mgr.load(session.id)
+            loads.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            mgr.load(session.id, tail=20)
+            tails.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            mgr.list_sessions(limit=20)
+            lists.append((time.perf_counter() - t0) * 1000)
+    return {
+        "session_save_ms": Metric(statistics.median(saves), "ms"),
+        "session_load_ms": Metric(statistics.median(loads), "ms"),
+        "session_open_tail_ms": Metric(statistics.median(tails), "ms"),
+        "session_list_ms": Metric(statistics.median(lists), "ms"),
+    }
+
+
+def bench_memory(turns: int = 50) -> dict[str, Metric]:
+    """Peak Python heap over a ``turns``-turn session with one tool call per turn."""
+    peak = 0
+    with _sandbox() as tmp:
+        cli = _make_cli(tmp, _write_script(tmp, with_tool=True))
+
+        async def _run() -> None:
+            await cli._start_session()
+            await cli._send("warm-up")
+            gc.collect()
+            tracemalloc.start()
+            for i in range(turns):
+                await cli._send(f"que hora es {i}")
+
+        try:
+            asyncio.run(_run())
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"peak_mb_50_turns": Metric(peak / (1024 * 1024), "MB")}
+
+
+BENCHMARKS: dict[str, Callable[[], dict[str, Metric]]] = {
+    "turn": bench_turn,
+    "render": bench_show_token,
+    "frames": bench_frames,
+    "stream": bench_stream_events,
+    "thinking": bench_thinking,
+    "execute": bench_execute,
+    "persistence": bench_persistence,
+    "memory": bench_memory,
+}
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def run(names: list[str] | None = None) -> dict:
+    metrics: dict[str, dict] = {}
+    for name in names or list(BENCHMARKS):
+        for key, metric in BENCHMARKS[name]().items():
+            metrics[key] = {"value": round(metric.value, 4), "unit": metric.unit}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float | None = None
+) -> list[dict]:
+    """Rows of metric/baseline/current/ratio/limit/ok (lower is better).
+
+    A metric regresses when it exceeds the baseline by more than its relative
+    threshold and by more than the unit's noise floor.
+    """
+    rows = []
+    for key, cur in results["metrics"].items():
+        base = baseline.get("metrics", {}).get(key)
+        if base is None:
+            continue
+        limit = threshold if threshold is not None else THRESHOLDS.get(key, DEFAULT_THRESHOLD)
+        ratio = cur["value"] / base["value"] if base["value"] else 1.0
+        noise = NOISE_FLOOR.get(cur["unit"], 0.0)
+        rows.append({
+            "metric": key,
+            "baseline": base["value"],
+            "current": cur["value"],
+            "unit": cur["unit"],
+            "ratio": round(ratio, 3),
+            "limit": limit,
+            "ok": ratio <= 1 + limit or cur["value"] - base["value"] <= noise,
+        })
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Sonika turn-pipeline benchmarks"
+    )
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--json", dest="json_path", help="Write results to this file")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--threshold", type=float, help="Override every regression threshold")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else None
+    unknown = [n for n in names or [] if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run(names)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        merged = results
+        if baseline_path.exists() and names:
+            merged = json.loads(baseline_path.read_text(encoding="utf-8"))
+            merged["metrics"].update(results["metrics"])
+            merged["meta"] = results["meta"]
+        baseline_path.write_text(json.dumps(merged, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline actualizado: {baseline_path}")
+        return 0
+
+    rows = []
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        rows = compare(results, baseline, args.threshold)
+    compared = {r["metric"]: r for r in rows}
+
+    print(f"{'metric':<24} {'current':>12} {'baseline':>12} {'ratio':>7}")
+    failed = False
+    for key, cur in results["metrics"].items():
+        row = compared.get(key)
+        value = f"{cur['value']:.3f} {cur['unit']}"
+        if row is None:
+            print(f"{key:<24} {value:>12} {'-':>12} {'-':>7}")
+            continue
+        failed = failed or not row["ok"]
+        flag = "" if row["ok"] else f"  REGRESSION (> +{row['limit']:.0%})"
+        print(f"{key:<24} {value:>12} {row['baseline']:>12.3f} {row['ratio']:>7.2f}{flag}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
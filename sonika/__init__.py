@@ -1,4 +1,20 @@
-from .bot import ExecutorBot
-from .result import ExecutionResult
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .bot import ExecutorBot
+    from .result import ExecutionResult
 
 __all__ = ["ExecutorBot", "ExecutionResult"]
+
+# Resolved on first access so `import sonika.cli` does not pull in langchain.
+_LAZY = {"ExecutorBot": ".bot", "ExecutionResult": ".result"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
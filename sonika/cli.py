@@ -1,30 +1,34 @@
 import logging
-import typer
 import sys
 import asyncio as _asyncio
 from typing import Optional
-from dotenv import load_dotenv
 
-# Suppress noisy retry warnings from langchain_google_genai (e.g. 429 rate limit retries)
-logging.getLogger("langchain_google_genai").setLevel(logging.ERROR)
+import typer
+
+# Heavy modules (dotenv, the console UI, langchain via the orchestrator) and
+# the persistent event loop are set up inside the command, not at import time.
 
-from .interfaces.console.app import ConsoleApp
+app = typer.Typer()
+
+_persistent_loop: Optional[_asyncio.AbstractEventLoop] = None
 
-# Fix: reuse a persistent event loop across calls.
-_persistent_loop = _asyncio.new_event_loop()
-_asyncio.set_event_loop(_persistent_loop)
 
 def _persistent_asyncio_run(coro, *, debug=None):
     global _persistent_loop
-    if _persistent_loop.is_closed():
+    if _persistent_loop is None or _persistent_loop.is_closed():
         _persistent_loop = _asyncio.new_event_loop()
         _asyncio.set_event_loop(_persistent_loop)
     return _persistent_loop.run_until_complete(coro)
 
-_asyncio.run = _persistent_asyncio_run
 
-app = typer.Typer()
-load_dotenv()
+def _install_persistent_loop() -> None:
+    """Fix: reuse a persistent event loop across calls."""
+    global _persistent_loop
+    if _persistent_loop is None or _persistent_loop.is_closed():
+        _persistent_loop = _asyncio.new_event_loop()
+        _asyncio.set_event_loop(_persistent_loop)
+    _asyncio.run = _persistent_asyncio_run
+
 
 @app.command()
 def start(
@@ -38,7 +42,15 @@ def start(
     prompts: Optional[str] = typer.Option(None, help="Directorio con prompts personalizados"),
 ):
     """Inicia la sesión interactiva con el agente."""
-    
+    from dotenv import load_dotenv
+
+    # Suppress noisy retry warnings from langchain_google_genai (e.g. 429 rate limit retries)
+    logging.getLogger("langchain_google_genai").setLevel(logging.ERROR)
+    load_dotenv()
+    _install_persistent_loop()
+
+    from .interfaces.console.app import ConsoleApp
+
     # Parsear modelo
     if ":" in model:
         provider, model_name = model.split(":", 1)
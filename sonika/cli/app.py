@@ -3,18 +3,54 @@
 from __future__ import annotations
 
 import asyncio
-import os
+import logging
+import threading
 import time
 from typing import Optional
 
+from sonika.cli.compare import compare, default_targets, export_keys, parse_targets
 from sonika.cli.config import Config, PROVIDERS
-from sonika.cli.models_catalog import MODELS, all_providers, models_for_provider
-from sonika.cli.session_manager import Session, SessionManager
+from sonika.cli.frames import FrameQueue
+from sonika.cli.models_catalog import MODELS, all_providers, get_model, models_for_provider
+from sonika.cli.session_manager import Session, SessionManager, blob_path, open_store
 from sonika.cli.renderers import BaseRenderer
 from sonika.config_schema import SonikaAppConfig
+from sonika.context import ContextAccount, estimate_tokens
+from sonika.perf import AUTO, get_perf_store, pick_auto
+from sonika.persist import get_writer
+from sonika.stream_events import (
+    FinalReport,
+    Interrupt,
+    ModelUsage,
+    Partial,
+    Retry,
+    StreamNormalizer,
+    TextBuffer,
+    Thinking,
+    Token,
+    ToolEnd,
+    ToolStart,
+    brief_args,
+)
+from sonika.usage import TurnUsage, chunk_role
 
 MODES = ["ask", "auto", "plan"]
 
+# Modules the core tools import lazily on first call (HTTP/web/search, DBs, SMTP)
+_WARM_MODULES = ("requests", "sqlite3", "smtplib", "email.mime.text", "email.mime.multipart")
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_imports() -> None:
+    import importlib
+
+    for name in _WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+
 
 class SonikaCLI:
     """Main CLI loop, decoupled from any specific renderer."""
@@ -29,12 +65,36 @@ class SonikaCLI:
             from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
             renderer = ClaudeStyleRenderer()
         self._renderer = renderer
-        self._config = Config(self._app_config.config_dir)
-        self._mgr = SessionManager()
+        # Session and config saves go through a background writer so disk
+        # I/O stays off the turn; it is flushed before reads and on exit
+        self._writer = get_writer()
+        self._config = Config(self._app_config.config_dir, writer=self._writer)
+        self._mgr = SessionManager(
+            open_store(self._app_config.session_backend, self._app_config.config_dir),
+            writer=self._writer,
+        )
         self._session: Optional[Session] = None
         self._bot = None
+        self._bot_task: asyncio.Task | None = None
+        self._bot_error: str | None = None
+        # Held while a bot is built: the warm-up thread keeps running after
+        # its task is cancelled, so the main thread waits for it to finish
+        self._bot_lock = threading.Lock()
+        self._warmup_task: asyncio.Task | None = None
         self._mode: str = "ask"
         self._streaming: bool = False
+        self._context: ContextAccount | None = None
+        self._context_sid: str | None = None
+        # Position of the oldest message shown for the loaded session
+        self._history_start = 0
+        # Observed latency per model (~/.sonika/perf.json) and the current
+        # resolution of the "auto" model with the time it was made
+        self._perf = get_perf_store(self._app_config.config_dir / "perf.json")
+        self._auto_choice: tuple[str, str] | None = None
+        self._auto_at = 0.0
+        # API keys changed (here or by another sonika process) since the bot was built
+        self._bot_stale = False
+        self._config.subscribe(self._on_config_change)
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -47,14 +107,16 @@ class SonikaCLI:
                     self._config.set_key(prov, key)
             self._auto_model()
 
-        # Start session (skip if already started, e.g. in tests)
+        # Start session (skip if already started, e.g. in tests). The bot is
+        # built by the warm-up pipeline while the banner renders.
         if not self._session:
-            await self._start_session()
+            await self._start_session(build_bot=False)
         if not self._session:
             self._renderer.show_error("Sin modelo configurado. Ejecuta de nuevo y configura tu API key.")
             return
 
-        recent = self._mgr.list_sessions()[:3]
+        self._start_warmup()
+        recent = self._mgr.list_sessions(limit=3)
         await self._renderer.init(
             self._session.provider,
             self._session.model,
@@ -88,48 +150,148 @@ class SonikaCLI:
                 else:
                     await self._send(text)
         finally:
+            self._cancel_warmup()
+            await asyncio.to_thread(self._writer.flush)
             await self._renderer.shutdown()
 
     # ── Session management ────────────────────────────────────────────────────
 
-    async def _start_session(self) -> None:
+    async def _start_session(self, build_bot: bool = True) -> None:
         prov = self._config.active_provider
         model = self._config.active_model
         if not prov or not model:
             self._auto_model()
             prov = self._config.active_provider
             model = self._config.active_model
+        prov, model = self._resolve_model(prov, model)
         if not prov or not model:
             return
         self._session = self._mgr.new_session(prov, model)
-        self._rebuild_bot()
+        if build_bot:
+            self._rebuild_bot()
+
+    def _on_config_change(self, changed: set[str]) -> None:
+        # May run on the writer thread: only set a flag read by the next turn
+        if "keys" in changed and self._bot is not None:
+            self._bot_stale = True
 
     def _rebuild_bot(self) -> None:
+        self._bot_stale = False
         if not self._session:
             return
-        key = self._config.get_key(self._session.provider)
-        if not key:
-            return
-        env_map = {
-            "openai": "OPENAI_API_KEY",
-            "google": "GOOGLE_API_KEY",
-            "deepseek": "DEEPSEEK_API_KEY",
-        }
-        ev = env_map.get(self._session.provider)
-        if ev:
-            os.environ[ev] = key
+        # A bot still being built in the background belongs to the old session;
+        # its thread finishes (or gives up) before this build binds the cache
+        if self._bot_task and not self._bot_task.done():
+            self._bot_task.cancel()
+        t0 = time.perf_counter()
         try:
+            self._bot = self._make_bot(self._session)
+        except Exception as exc:
+            self._renderer.show_error(f"Bot: {exc}")
+            self._bot = None
+            return
+        if self._bot is not None:
+            self._bot_error = None
+            self._debug(f"bot listo en {(time.perf_counter() - t0) * 1000:.1f}ms")
+
+    def _make_bot(self, session: Optional[Session]):
+        """Build (or fetch from cache) the orchestrator for ``session``.
+
+        Returns None without building when ``session`` is no longer the
+        current one: a late warm-up must not rebind the cached bot to it.
+        """
+        with self._bot_lock:
+            if not session or session is not self._session:
+                return None
+            key = self._config.get_key(session.provider)
+            if not key and session.provider != "mock":
+                return None
             from sonika.factory import create_orchestrator
-            self._bot = create_orchestrator(
-                provider=self._session.provider,
-                model_name=self._session.model,
+
+            hedge = []
+            if self._app_config.hedging:
+                hedge = [p for p in self._config.configured_providers() if p != session.provider]
+            export_keys(self._config, [session.provider, *hedge])
+            return create_orchestrator(
+                provider=session.provider,
+                model_name=session.model,
                 risk_level=self._app_config.risk_level,
-                session_id=self._session.id,
+                session_id=session.id,
                 config=self._app_config,
+                use_cache=True,
+                hedge_providers=hedge,
             )
+
+    # ── Warm-up ───────────────────────────────────────────────────────────────
+
+    def _start_warmup(self) -> None:
+        self._cancel_warmup()
+        if self._bot is None and self._session:
+            self._bot_task = asyncio.ensure_future(asyncio.to_thread(self._make_bot, self._session))
+        self._warmup_task = asyncio.create_task(self._warmup())
+
+    def _cancel_warmup(self) -> None:
+        for task in (self._warmup_task, self._bot_task):
+            if task and not task.done():
+                task.cancel()
+        self._renderer.set_activity(None)
+
+    async def _warmup(self) -> None:
+        """Build the bot, open the provider connection and pre-import tool
+        modules while the banner renders and the user types."""
+        try:
+            task = self._bot_task
+            if self._bot is None and task is not None:
+                self._renderer.set_activity("warm-up: bot")
+                t0 = time.perf_counter()
+                try:
+                    bot = await task
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self._bot_error = str(exc)
+                    return
+                if self._bot is None:
+                    self._bot = bot
+                self._debug(f"warm-up bot: {(time.perf_counter() - t0) * 1000:.1f}ms")
+
+            prewarm = getattr(self._bot, "a_prewarm", None)
+            if prewarm is not None and asyncio.iscoroutinefunction(prewarm):
+                self._renderer.set_activity("warm-up: conexion")
+                t0 = time.perf_counter()
+                await asyncio.wait_for(prewarm(), timeout=15)
+                self._debug(f"warm-up conexion: {(time.perf_counter() - t0) * 1000:.1f}ms")
+
+            self._renderer.set_activity("warm-up: tools")
+            t0 = time.perf_counter()
+            await asyncio.to_thread(_warm_imports)
+            self._debug(f"warm-up tools: {(time.perf_counter() - t0) * 1000:.1f}ms")
+        except asyncio.CancelledError:
+            raise
         except Exception as exc:
-            self._renderer.show_error(f"Bot: {exc}")
-            self._bot = None
+            logger.debug(f"warm-up failed: {exc}")
+        finally:
+            self._renderer.set_activity(None)
+
+    async def _await_bot(self) -> None:
+        """Wait for a bot still being built by the warm-up pipeline."""
+        task = self._bot_task
+        if self._bot is not None or task is None or (task.done() and task.cancelled()):
+            return
+        try:
+            bot = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            return
+        except Exception as exc:
+            self._bot_error = str(exc)
+            return
+        if self._bot is None:
+            self._bot = bot
+
+    def _debug(self, text: str) -> None:
+        logger.debug(text)
+        if self._app_config.debug:
+            self._renderer.show_system(f"[debug] {text}")
 
     def _auto_model(self) -> None:
         if self._config.active_provider and self._config.active_model:
@@ -139,6 +301,34 @@ class SonikaCLI:
                 self._config.set_active(m.provider, m.model_id)
                 return
 
+    def _resolve_model(
+        self, prov: str | None, model: str | None
+    ) -> tuple[str | None, str | None]:
+        """Concrete (provider, model) for the active choice, resolving "auto".
+
+        The auto pick is cached for auto_model_interval_s; it applies when a
+        session starts, since switching models mid-session would drop the
+        orchestrator's thread.
+        """
+        if model != AUTO:
+            return prov, model
+        now = time.monotonic()
+        if self._auto_choice is None or now - self._auto_at >= self._app_config.auto_model_interval_s:
+            account = self._context if self._session else None
+            min_context = int(account.used / self._app_config.context_compact_at) if account else 0
+            pick = pick_auto(
+                self._perf,
+                MODELS,
+                self._config.configured_providers(),
+                min_context=min_context,
+                max_price=self._app_config.auto_model_max_price,
+            )
+            choice = (pick.provider, pick.model_id) if pick else None
+            if choice and choice != self._auto_choice:
+                self._renderer.show_system(f"auto → {choice[0]}/{choice[1]}")
+            self._auto_choice, self._auto_at = choice, now
+        return self._auto_choice or (None, None)
+
     # ── Commands ──────────────────────────────────────────────────────────────
 
     async def _handle_command(self, text: str) -> bool:
@@ -157,11 +347,13 @@ class SonikaCLI:
 
         if cmd == "/model":
             result = await self._renderer.show_model_picker(
-                MODELS, self._config.configured_providers()
+                MODELS, self._config.configured_providers(), perf=self._perf.all_stats()
             )
             if result:
                 prov, model = result
-                if not self._config.has_key(prov):
+                if model == AUTO:
+                    self._auto_choice = None
+                elif not self._config.has_key(prov):
                     key = self._renderer.show_key_input(prov)
                     if not key:
                         self._renderer.show_system("Sin key — modelo no cambiado.")
@@ -201,6 +393,24 @@ class SonikaCLI:
             new = self._cycle_mode()
             self._renderer.show_system(f"Modo: {new.upper()}")
 
+        elif cmd == "/stats":
+            self._show_stats()
+
+        elif cmd == "/history":
+            self._show_history(parts[1] if len(parts) > 1 else "")
+
+        elif cmd == "/search":
+            self._search(text[len(parts[0]):].strip())
+
+        elif cmd == "/compare":
+            await self._compare(text[len(parts[0]):].strip())
+
+        elif cmd == "/compact":
+            await self._compact(force=True)
+
+        elif cmd == "/pin":
+            self._pin(text[len(parts[0]):].strip())
+
         elif cmd == "/help":
             self._renderer.show_help()
 
@@ -209,6 +419,174 @@ class SonikaCLI:
 
         return False
 
+    def _show_stats(self) -> None:
+        sections: list[str] = []
+        router = getattr(self._bot, "role_router", None)
+        if router and router.routed():
+            sections.append("Enrutado: " + ", ".join(
+                f"{role} → {model}" for role, model in router.routed().items()
+            ))
+        if router and router.stats_lines():
+            sections.append("Por rol:\n" + "\n".join(router.stats_lines()))
+        tracker = getattr(self._bot, "latency_tracker", None)
+        if tracker is not None:
+            sections.append("\n".join(tracker.stats_lines()))
+        limiter = getattr(self._bot, "rate_limiter", None)
+        if limiter is not None and limiter.requests:
+            sections.append("\n".join(limiter.stats_lines()))
+        cache = getattr(self._bot, "llm_cache", None)
+        if cache is not None:
+            st = cache.stats()
+            lookups = st["hits"] + st["misses"]
+            sections.append(
+                f"Cache LLM: {st['hits']}/{lookups} aciertos ({st['hit_rate']:.0%}), "
+                f"{st['entries']} entradas, {st['bytes'] / 1024:.0f} KB"
+            )
+        if self._writer.written:
+            sections.append("Persistencia: " + "\n".join(self._writer.stats_lines()))
+        if not sections:
+            self._renderer.show_system("Sin estadisticas todavia.")
+            return
+        self._renderer.show_system("\n".join(sections))
+
+    def _search(self, query: str) -> None:
+        if not query:
+            self._renderer.show_error("Uso: /search <texto>")
+            return
+        hits = self._mgr.search(query, limit=10)
+        if not hits:
+            self._renderer.show_system(f"Sin resultados para: {query}")
+            return
+        lines = [f"{len(hits)} resultados para: {query}"]
+        for h in hits:
+            who = "tu" if h["role"] == "user" else "ia"
+            lines.append(f"  {h['session_id']}  {h['title'][:30]:<30}  {who}: {h['snippet']}")
+        lines.append("Abre una sesion con /session.")
+        self._renderer.show_system("\n".join(lines))
+
+    async def _compare(self, arg: str) -> None:
+        """``/compare [prov/model,prov/model] <prompt>``: same prompt, several models."""
+        head, _, rest = arg.partition(" ")
+        try:
+            targets = parse_targets(head) if "/" in head else None
+        except ValueError:
+            targets = None
+        prompt = rest.strip() if targets else arg
+        if targets is None:
+            targets = default_targets(self._config, self._app_config)
+        if not prompt:
+            self._renderer.show_error("Uso: /compare [proveedor/modelo,proveedor/modelo] <prompt>")
+            return
+        if len(targets) < 2:
+            self._renderer.show_error(
+                "Se necesitan al menos 2 modelos: configura otro proveedor o indicalos."
+            )
+            return
+        export_keys(self._config, (p for p, _ in targets))
+        self._renderer.show_compare_start([f"{p}/{m}" for p, m in targets])
+        results = await compare(
+            prompt,
+            targets,
+            self._app_config,
+            on_token=self._renderer.show_compare_token,
+            perf=self._perf,
+        )
+        self._writer.submit(("perf", str(self._perf.path)), self._perf.save)
+        self._renderer.show_compare_end(results)
+
+    def _replay(self, messages: list[dict]) -> None:
+        for msg in messages:
+            if msg["role"] == "user":
+                self._renderer.show_user_message(msg.get("content", ""))
+            else:
+                self._renderer.show_final_response(msg.get("content", ""))
+
+    def _show_history(self, arg: str = "") -> None:
+        """Show the page of exchanges before the oldest one on screen."""
+        if not self._session or self._history_start <= 0:
+            self._renderer.show_system("No hay mensajes anteriores.")
+            return
+        exchanges = int(arg) if arg.isdigit() and int(arg) > 0 else self._app_config.history_exchanges
+        end = self._history_start
+        start = max(0, end - 2 * exchanges)
+        self._renderer.show_system(
+            f"── Mensajes {start + 1}-{end} de {self._session.message_count} ──"
+        )
+        self._replay(self._session.page(start, end))
+        self._history_start = start
+        self._show_hidden_count()
+
+    def _show_hidden_count(self) -> None:
+        if self._history_start > 0:
+            self._renderer.show_system(
+                f"{self._history_start} mensajes anteriores sin mostrar — /history para verlos."
+            )
+
+    def _pin(self, fact: str) -> None:
+        if not self._session:
+            return
+        if fact:
+            self._session.pinned.append(fact)
+            self._mgr.save(self._session)
+            self._renderer.show_system(f"Fijado: {fact}")
+        elif self._session.pinned:
+            self._renderer.show_system(
+                "Hechos fijados:\n" + "\n".join(f"- {f}" for f in self._session.pinned)
+            )
+        else:
+            self._renderer.show_system("Sin hechos fijados. Usa /pin <texto>.")
+
+    # ── Context window ────────────────────────────────────────────────────────
+
+    def _context_account(self) -> ContextAccount | None:
+        """The current session's context account (reset when the session changes)."""
+        if not self._session:
+            return None
+        if self._context is None or self._context_sid != self._session.id:
+            info = get_model(self._session.provider, self._session.model)
+            self._context = ContextAccount(window=info.context_k if info else 0)
+            self._context_sid = self._session.id
+        return self._context
+
+    def _show_context(self) -> None:
+        account = self._context_account()
+        self._renderer.set_context(account.fill if account else None, account.saved if account else 0)
+
+    async def _compact(self, next_text: str = "", force: bool = False) -> None:
+        """Summarize older turns when the next call would overflow the threshold."""
+        account = self._context_account()
+        graph = getattr(self._bot, "graph", None)
+        if account is None or graph is None or not self._session:
+            return
+        cfg = self._app_config
+        if not force and not (
+            cfg.auto_compact and account.needs_compaction(next_text, cfg.context_compact_at)
+        ):
+            return
+        from sonika.context import compact_thread
+
+        fast = getattr(self._bot, "fast_model", None)
+        self._renderer.set_activity("compactando contexto")
+        try:
+            saved = await compact_thread(
+                self._bot,
+                self._session.id,
+                keep_turns=cfg.context_keep_turns,
+                pinned=self._session.pinned,
+                summary_model=getattr(fast, "model", None),
+            )
+        except Exception as exc:
+            logger.debug(f"compaction failed: {exc}")
+            saved = 0
+        finally:
+            self._renderer.set_activity(None)
+        if saved:
+            account.record_compaction(saved)
+            self._renderer.show_system(f"Contexto compactado: ~{saved} tokens liberados")
+        elif force:
+            self._renderer.show_system("Nada que compactar todavia.")
+        self._show_context()
+
     def _cycle_mode(self) -> str:
         idx = MODES.index(self._mode)
         self._mode = MODES[(idx + 1) % len(MODES)]
@@ -217,35 +595,55 @@ class SonikaCLI:
     # ── Session actions ───────────────────────────────────────────────────────
 
     async def _new_session(self) -> None:
-        prov = self._config.active_provider
-        model = self._config.active_model
+        prov, model = self._resolve_model(self._config.active_provider, self._config.active_model)
         if not prov or not model:
             self._renderer.show_error("Sin modelo configurado. Usa /model.")
             return
         self._session = self._mgr.new_session(prov, model)
+        self._history_start = 0
         self._rebuild_bot()
         self._renderer.show_system(f"Nueva sesion — {prov}/{model}")
 
     async def _load_session(self, session_id: str) -> None:
+        # Only the last exchanges are read and rendered; /history pages back
         try:
-            session = self._mgr.load(session_id)
+            session = self._mgr.load(session_id, tail=2 * self._app_config.history_exchanges)
         except FileNotFoundError:
             self._renderer.show_error(f"Sesion no encontrada: {session_id}")
             return
         self._session = session
         if self._config.has_key(session.provider):
-            self._config.set_active(session.provider, session.model)
+            # In auto mode the old session keeps its model; new ones stay auto
+            if self._config.active_model != AUTO:
+                self._config.set_active(session.provider, session.model)
             self._rebuild_bot()
-        # Show previous messages
-        for msg in session.messages:
-            if msg["role"] == "user":
-                self._renderer.show_user_message(msg.get("content", ""))
-            else:
-                self._renderer.show_final_response(msg.get("content", ""))
+        shown = session.messages
+        start = session.message_count - len(shown)
+        # Start the page at a user message so an answer is never shown alone
+        while start > 0 and shown and shown[0]["role"] != "user":
+            shown = shown[1:]
+            start += 1
+        self._history_start = start
+        self._show_hidden_count()
+        self._replay(shown)
         self._renderer.show_system(
             f"Sesion cargada: {session.provider}/{session.model} #{session.id}"
         )
 
+    def _record_perf(
+        self, t_start: float, t_first: float | None, t_end: float, tokens: int, ok: bool
+    ) -> None:
+        """Add this turn to the observed-latency store (saved in the background)."""
+        self._perf.record(
+            self._session.provider,
+            self._session.model,
+            None if t_first is None else (t_first - t_start) * 1000,
+            tokens,
+            0.0 if t_first is None else t_end - t_first,
+            ok=ok and t_first is not None,
+        )
+        self._writer.submit(("perf", str(self._perf.path)), self._perf.save)
+
     # ── Streaming ─────────────────────────────────────────────────────────────
 
     async def _send(self, text: str) -> None:
@@ -254,184 +652,179 @@ class SonikaCLI:
         if not self._session:
             self._renderer.show_error("Sin sesion activa. Configura tu API key con /key.")
             return
+        await self._await_bot()
+        # One stat of config.json; rebuild if another process changed the keys
+        self._config.refresh()
+        if self._bot_stale:
+            self._rebuild_bot()
         if not self._bot:
-            self._renderer.show_error("Bot no listo. Usa /key <proveedor> <apikey>.")
+            if self._bot_error:
+                self._renderer.show_error(f"Bot: {self._bot_error}")
+            else:
+                self._renderer.show_error("Bot no listo. Usa /key <proveedor> <apikey>.")
             return
 
         self._renderer.show_user_message(text)
+        await self._compact(text)
         self._session.add_message("user", text)
+        context = self._context_account()
+        usage_seen = False
+        # Provider-reported usage of this turn, per orchestrator role
+        turn_usage = TurnUsage(self._session.provider)
+        cache_hit = False
+        error: str | None = None
+        # For the perf store: time spent outside the model (tools, approvals)
+        paused_s = 0.0
         self._streaming = True
+        limiter = getattr(self._bot, "rate_limiter", None)
+        if limiter is not None:
+            limiter.on_wait = self._renderer.show_queued
         prov = self._session.provider if self._session else "?"
         model = self._session.model if self._session else "?"
         self._renderer.show_ai_start(provider=prov, model=model)
         t_start = time.monotonic()
-
-        full_thinking = ""
+        t_first_token: float | None = None
+
+        # Reasoning of this turn; past thinking_spill_chars it goes to disk
+        spill_at = self._app_config.thinking_spill_chars
+        thinking = TextBuffer(
+            cap=spill_at,
+            spill=blob_path(self._session.id, f"thinking-{self._session.message_count}.txt")
+            if spill_at and self._session else None,
+        )
         thinking_finalized = False
-        full_pre_response = ""
-        full_final_response = ""
-        tools_ever_started = False
-        tool_timers: dict[str, float] = {}
-        tool_call_count: dict[str, int] = {}
-        tool_args_map: dict[str, str] = {}
+        pre_parts: list[str] = []
+        final_parts: list[str] = []
+        final_report = ""
 
+        # Renderer calls made while streaming are drawn once per frame
+        frames = FrameQueue(self._renderer, fps=self._app_config.render_fps).start()
+        norm = StreamNormalizer()
         try:
-            from langchain_core.messages import AIMessageChunk
-
             goal = text
             thread_id = self._session.id
 
             while True:
-                interrupted = False
-                interrupt_tool = ""
-                interrupt_args = ""
+                interrupt: Interrupt | None = None
 
                 async for stream_mode, payload in self._bot.astream_events(
                     goal, mode=self._mode, thread_id=thread_id
                 ):
-                    # ── Token chunks ──────────────────────────────────────
-                    if stream_mode == "messages":
-                        chunk, _ = payload
-                        if not isinstance(chunk, AIMessageChunk):
-                            continue
-                        content = chunk.content
-
-                        def _handle_token(text_chunk: str) -> None:
-                            nonlocal full_pre_response, full_final_response, thinking_finalized
-                            # Finalize thinking before first response token
-                            if full_thinking and not thinking_finalized:
-                                self._renderer.show_thinking_end(full_thinking)
+                    for ev in norm.feed(stream_mode, payload):
+                        kind = type(ev)
+                        if kind is Token:
+                            if t_first_token is None:
+                                t_first_token = time.monotonic()
+                            # Finalize thinking before the first response token
+                            if thinking and not thinking_finalized:
+                                await frames.put("show_thinking_end", thinking)
                                 thinking_finalized = True
-                            if not tools_ever_started:
-                                full_pre_response += text_chunk
-                                self._renderer.show_token(text_chunk, is_pre_tool=True)
-                            else:
-                                full_final_response += text_chunk
-                                self._renderer.show_token(text_chunk, is_pre_tool=False)
-
-                        if isinstance(content, list):
-                            for part in content:
-                                if isinstance(part, str) and part:
-                                    _handle_token(part)
-                                elif isinstance(part, dict):
-                                    if part.get("type") == "thinking":
-                                        t = part.get("thinking", "")
-                                        if t:
-                                            full_thinking += t
-                                            lines = len(full_thinking.splitlines())
-                                            self._renderer.show_thinking(full_thinking, lines)
-                                    else:
-                                        c = part.get("text", "") or part.get("content", "")
-                                        if c:
-                                            _handle_token(str(c))
-                        elif isinstance(content, str) and content:
-                            _handle_token(content)
-
-                    # ── Node updates ──────────────────────────────────────
-                    elif stream_mode == "updates":
-                        for node_name, update in payload.items():
-                            if node_name == "agent":
-                                # Retry events
-                                for ev in update.get("status_events", []):
-                                    if ev.get("type") == "retrying":
-                                        self._renderer.show_retry(
-                                            ev["attempt"], ev["wait_s"]
-                                        )
-
-                                # Tool calls
-                                msgs = update.get("messages", [])
-                                last = msgs[-1] if msgs else None
-                                if last and getattr(last, "tool_calls", None):
-                                    tools_ever_started = True
-                                    for tc in last.tool_calls:
-                                        name = tc.get("name", "unknown")
-                                        args = tc.get("args", {})
-                                        pairs = ", ".join(
-                                            f"{k}={repr(v)[:40]}"
-                                            for k, v in args.items()
-                                        )[:120]
-                                        n = tool_call_count.get(name, 0)
-                                        tool_call_count[name] = n + 1
-                                        key = f"{name}#{n}"
-                                        tool_timers[key] = time.monotonic()
-                                        tool_args_map[key] = pairs
-                                        self._renderer.show_tool_start(name, pairs)
-
-                                # Partial responses (intermediate progress)
-                                for partial in update.get("partial_responses", []):
-                                    self._renderer.show_partial_response(partial)
-
-                                # Final report
-                                if update.get("final_report"):
-                                    already = bool(full_final_response) or (
-                                        not tools_ever_started
-                                        and bool(full_pre_response)
-                                    )
-                                    if not already:
-                                        full_final_response = update["final_report"]
-
-                            elif node_name == "tools":
-                                done_count: dict[str, int] = {}
-                                for t in update.get("tools_executed", []):
-                                    name = t.get("tool_name", "?")
-                                    status = t.get("status", "?")
-                                    output = str(t.get("output", ""))
-                                    n = done_count.get(name, 0)
-                                    done_count[name] = n + 1
-                                    key = f"{name}#{n}"
-                                    elapsed = time.monotonic() - tool_timers.pop(
-                                        key, t_start
-                                    )
-                                    args_brief = tool_args_map.pop(key, "")
-                                    self._renderer.show_tool_result(
-                                        name, status, output, args_brief, elapsed
-                                    )
-
-                            elif node_name == "__interrupt__":
-                                iv = update[0].value if update else {}
-                                interrupt_tool = iv.get(
-                                    "tool", iv.get("tool_name", "?")
-                                )
-                                interrupt_args = str(iv.get("params", {}))[:200]
-                                interrupted = True
-
-                if not interrupted:
+                            (pre_parts if ev.pre_tool else final_parts).append(ev.text)
+                            await frames.put("show_token", ev.text, ev.pre_tool)
+                        elif kind is Thinking:
+                            thinking.append(ev.text)
+                            await frames.put("show_thinking", ev.text, thinking.line_count)
+                        elif kind is ModelUsage:
+                            cache_hit = cache_hit or ev.cache_hit
+                            if ev.usage:
+                                role, role_model = chunk_role(self._bot, ev.metadata, model, ev.model)
+                                turn_usage.observe(role, role_model, ev.usage, ev.provider)
+                                if context is not None:
+                                    usage_seen = context.observe_usage(ev.usage) or usage_seen
+                        elif kind is ToolStart:
+                            await frames.put("show_tool_start", ev.name, brief_args(ev.args))
+                        elif kind is ToolEnd:
+                            paused_s += ev.elapsed
+                            await frames.put(
+                                "show_tool_result", ev.name, ev.status, ev.output,
+                                brief_args(ev.args), ev.elapsed,
+                            )
+                        elif kind is Retry:
+                            await frames.put("show_retry", ev.attempt, ev.wait_s)
+                        elif kind is Partial:
+                            await frames.put("show_partial_response", ev.text)
+                        elif kind is FinalReport:
+                            final_report = ev.text
+                        elif kind is Interrupt:
+                            interrupt = ev
+
+                if interrupt is None:
                     break
 
                 # Approval flow
+                await frames.drain()
+                t_ask = time.monotonic()
                 approved = await self._renderer.show_approval(
-                    interrupt_tool, interrupt_args
+                    interrupt.tool, str(interrupt.params)[:200]
                 )
+                paused_s += time.monotonic() - t_ask
                 self._bot.set_resume_command({"approved": approved})
                 goal = None
 
         except Exception as exc:
-            self._renderer.show_error(str(exc))
+            error = str(exc)
         finally:
+            await frames.close()
+            thinking.close()
             self._streaming = False
+        t_end = time.monotonic()
+        # Shown after close() so it follows what was already queued
+        failed = error is not None
+        if failed:
+            self._renderer.show_error(error)
 
         # Thinking summary (if never finalized during streaming)
-        if full_thinking and not thinking_finalized:
-            self._renderer.show_thinking_end(full_thinking)
-
-        # Determine final text
-        final_text = full_final_response or full_pre_response
+        if thinking and not thinking_finalized:
+            self._renderer.show_thinking_end(thinking)
+
+        # Determine final text: the answer after the last tool, else the
+        # report, else what the model said before any tool
+        final_text = "".join(final_parts)
+        if not final_text and final_report and (norm.tools_started or not pre_parts):
+            final_text = final_report
+        final_text = final_text or "".join(pre_parts)
         if final_text:
             self._renderer.show_final_response(final_text)
 
+        if context is not None:
+            if not usage_seen:
+                # Provider reported no usage: grow the estimate by this exchange
+                context.used = context.projected(text) + estimate_tokens(final_text)
+                context.measured = False
+            self._show_context()
+
         elapsed = time.monotonic() - t_start
+        if t_first_token is not None:
+            self._debug(f"TTFT {(t_first_token - t_start) * 1000:.0f}ms")
+        router = getattr(self._bot, "role_router", None)
+        if router:
+            for line in router.stats_lines():
+                self._debug(line)
         prov = self._session.provider if self._session else "?"
         model = self._session.model if self._session else "?"
 
-        # Persist and get token/cost stats
+        # Persist and get token/cost stats: real usage when the provider
+        # reported it, an estimate otherwise (cache hits cost nothing)
         tokens_in = tokens_out = 0
         cost = 0.0
-        if final_text and self._session:
-            self._session.add_message("assistant", final_text)
-            self._session.save()
+        if self._session and (final_text or turn_usage.seen):
+            if turn_usage.seen or cache_hit:
+                usage = turn_usage.to_dict()
+            else:
+                usage = self._session.estimate_usage(text, final_text)
+            self._session.record_usage(usage)
+            if final_text:
+                self._session.add_message("assistant", final_text, usage=usage)
+            self._mgr.save(self._session)
             tokens_in = self._session.tokens_in
             tokens_out = self._session.tokens_out
             cost = self._session.cost
+        if self._session and not cache_hit:
+            self._record_perf(
+                t_start, norm.first_chunk_at, t_end - paused_s,
+                turn_usage.total.output if turn_usage.seen else estimate_tokens(final_text),
+                ok=not failed,
+            )
 
         self._renderer.show_ai_end(
             elapsed, prov, model,
@@ -0,0 +1,269 @@
+"""Send one prompt to several models at once and compare them.
+
+Used by the ``/compare`` command and headless as::
+
+    python -m sonika.cli.compare "resume el log" -m google/gemini-2.5-flash -m openai/o4-mini
+
+Every run goes through its own orchestrator (same tools, prompts and risk
+level as a normal turn) on a throwaway thread, so tool-using prompts are
+compared fairly. Tools that need approval are denied: several models must
+not all perform the same side effect. The results (TTFT, total time, tokens,
+cost, answer) also feed the observed-latency store (:mod:`sonika.perf`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable, Optional
+
+from sonika.cli.config import PROVIDERS, Config
+from sonika.cli.models_catalog import MODELS, get_model
+from sonika.config_schema import SonikaAppConfig
+from sonika.usage import TurnUsage, chunk_role
+
+TokenCallback = Callable[[int, str], None]
+
+
+@dataclass
+class CompareResult:
+    provider: str
+    model: str
+    ttft_ms: Optional[float] = None
+    total_s: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost: float = 0.0
+    tools: int = 0
+    denied: int = 0
+    answer: str = ""
+    error: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.provider}/{self.model}"
+
+
+def parse_targets(spec: str) -> list[tuple[str, str]]:
+    """``"google/gemini-2.5-flash,openai/o4-mini"`` → [(provider, model), ...].
+
+    Raises ValueError for entries that are not provider/model.
+    """
+    targets = []
+    for item in spec.split(","):
+        provider, _, model = item.strip().partition("/")
+        if provider not in (*PROVIDERS, "mock") or not model:
+            raise ValueError(f"Modelo no valido: {item.strip()} (usa proveedor/modelo)")
+        if (provider, model) not in targets:
+            targets.append((provider, model))
+    return targets
+
+
+def default_targets(
+    config: Config, app_config: SonikaAppConfig, limit: int = 4
+) -> list[tuple[str, str]]:
+    """``app_config.compare_models``, or the active model plus the cheapest
+    catalog model of each other configured provider, up to ``limit``."""
+    if app_config.compare_models:
+        return parse_targets(",".join(app_config.compare_models))
+    targets: list[tuple[str, str]] = []
+    active = (config.active_provider, config.active_model)
+    if all(active) and get_model(*active):
+        targets.append(active)
+    for provider in config.configured_providers():
+        if len(targets) >= limit:
+            break
+        if any(p == provider for p, _ in targets):
+            continue
+        models = [m for m in MODELS if m.provider == provider and "-exp" not in m.model_id]
+        if models:
+            cheapest = min(models, key=lambda m: m.input_per_1m + m.output_per_1m)
+            targets.append((provider, cheapest.model_id))
+    return targets
+
+
+def export_keys(config: Config, providers: Iterable[str]) -> None:
+    """Put the API keys of ``providers`` where their clients look for them.
+
+    Only the providers a run needs: every subprocess (shell tool, watch
+    command) inherits the environment.
+    """
+    from sonika.factory import api_key_env
+
+    for prov in dict.fromkeys(providers):
+        key = config.get_key(prov)
+        if key:
+            os.environ[api_key_env(prov)] = key
+
+
+async def run_one(
+    index: int,
+    provider: str,
+    model: str,
+    prompt: str,
+    app_config: SonikaAppConfig,
+    on_token: Optional[TokenCallback] = None,
+) -> CompareResult:
+    """One model's run of ``prompt`` through a fresh orchestrator thread."""
+    from sonika.factory import api_key_env, create_orchestrator
+    from sonika.stream_events import (
+        FinalReport, Interrupt, ModelUsage, StreamNormalizer, Token, ToolStart,
+    )
+
+    result = CompareResult(provider, model)
+    if provider != "mock" and not os.getenv(api_key_env(provider)):
+        # The factory would prompt for the key; several runs share the terminal
+        result.error = f"Sin API key para {provider}"
+        return result
+    usage = TurnUsage(provider)
+    t0 = time.monotonic()
+    pre_tool: list[str] = []
+    post_tool: list[str] = []
+    final_report = ""
+    try:
+        bot = await asyncio.to_thread(
+            create_orchestrator,
+            provider=provider,
+            model_name=model,
+            risk_level=app_config.risk_level,
+            session_id=f"compare-{uuid.uuid4().hex[:8]}",
+            config=app_config,
+        )
+        thread_id = f"compare-{index}-{uuid.uuid4().hex[:8]}"
+        norm = StreamNormalizer()
+        goal: Optional[str] = prompt
+        while True:
+            interrupted = False
+            async for raw in bot.astream_events(goal, mode="ask", thread_id=thread_id):
+                for ev in norm.feed(*raw):
+                    kind = type(ev)
+                    if kind is Token:
+                        if result.ttft_ms is None:
+                            result.ttft_ms = (time.monotonic() - t0) * 1000
+                        (pre_tool if ev.pre_tool else post_tool).append(ev.text)
+                        if on_token is not None:
+                            on_token(index, ev.text)
+                    elif kind is ModelUsage and ev.usage:
+                        role, role_model = chunk_role(bot, ev.metadata, model, ev.model)
+                        usage.observe(role, role_model, ev.usage, ev.provider)
+                    elif kind is ToolStart:
+                        result.tools += 1
+                    elif kind is FinalReport:
+                        final_report = ev.text
+                    elif kind is Interrupt:
+                        interrupted = True
+            if not interrupted:
+                break
+            result.denied += 1
+            bot.set_resume_command({"approved": False})
+            goal = None
+    except Exception as exc:
+        result.error = str(exc) or type(exc).__name__
+    result.total_s = time.monotonic() - t0
+    result.answer = "".join(post_tool) or final_report or "".join(pre_tool)
+    total = usage.total
+    result.tokens_in, result.tokens_out, result.cost = total.input, total.output, total.cost
+    return result
+
+
+async def compare(
+    prompt: str,
+    targets: list[tuple[str, str]],
+    app_config: SonikaAppConfig,
+    on_token: Optional[TokenCallback] = None,
+    perf: Any = None,
+) -> list[CompareResult]:
+    """Run ``prompt`` on every target concurrently; results keep target order.
+
+    With ``perf`` (a :class:`sonika.perf.PerfStore`) each run is recorded;
+    the caller saves the store.
+    """
+    results = await asyncio.gather(
+        *(
+            run_one(i, provider, model, prompt, app_config, on_token)
+            for i, (provider, model) in enumerate(targets)
+        )
+    )
+    if perf is not None:
+        for r in results:
+            # A run that streamed no text (tool-only, or only a final report)
+            # still succeeded; it just has no first-token time or throughput
+            streaming_s = r.total_s - r.ttft_ms / 1000 if r.ttft_ms is not None else 0.0
+            perf.record(
+                r.provider, r.model, r.ttft_ms, r.tokens_out, streaming_s, ok=r.error is None
+            )
+    return list(results)
+
+
+def format_table(results: list[CompareResult]) -> list[str]:
+    """Plain-text comparison table."""
+    width = max([len(r.label) for r in results] + [6])
+    lines = [
+        f"{'modelo':<{width}}  {'TTFT':>7}  {'total':>7}  {'tokens':>13}  {'costo':>9}  respuesta"
+    ]
+    for r in results:
+        ttft = f"{r.ttft_ms / 1000:.2f}s" if r.ttft_ms is not None else "—"
+        answer = f"ERROR: {r.error}" if r.error else " ".join(r.answer.split())
+        if len(answer) > 60:
+            answer = answer[:59] + "…"
+        lines.append(
+            f"{r.label:<{width}}  {ttft:>7}  {r.total_s:>6.2f}s  "
+            f"{f'{r.tokens_in}↑ {r.tokens_out}↓':>13}  ${r.cost:>8.5f}  {answer}"
+        )
+    return lines
+
+
+def format_results(results: list[CompareResult]) -> list[str]:
+    """Each answer in full, then the table."""
+    lines: list[str] = []
+    for r in results:
+        lines.append(f"── {r.label} ──")
+        lines.append(f"ERROR: {r.error}" if r.error else r.answer.strip() or "(sin respuesta)")
+        lines.append("")
+    return lines + format_table(results)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("prompt", help="Prompt to send to every model")
+    parser.add_argument(
+        "-m", "--model", action="append", help="provider/model (repeatable); default: configured models"
+    )
+    parser.add_argument("--risk", type=int, default=None, help="Risk level for the orchestrators")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    from sonika.perf import get_perf_store
+
+    app_config = SonikaAppConfig()
+    if args.risk is not None:
+        app_config.risk_level = args.risk
+    config = Config(app_config.config_dir)
+    try:
+        targets = parse_targets(",".join(args.model)) if args.model else default_targets(config, app_config)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if not targets:
+        print("Sin modelos que comparar: configura API keys o usa -m proveedor/modelo.", file=sys.stderr)
+        return 2
+    export_keys(config, (p for p, _ in targets))
+
+    perf = get_perf_store(app_config.config_dir / "perf.json")
+    results = asyncio.run(compare(args.prompt, targets, app_config, perf=perf))
+    perf.save()
+    print("\n".join(format_results(results)))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2, ensure_ascii=False)
+    return 1 if all(r.error for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,23 @@
-"""Config manager — stores API keys and active model in ~/.sonika/config.json."""
+"""Config manager — stores API keys and active model in ~/.sonika/config.json.
 
+Several Sonika processes share the file. Every write runs under an advisory
+lock (``config.json.lock``), merges only the fields this instance changed into
+the current file and replaces it atomically, so concurrent ``set_key`` /
+``set_active`` calls do not lose each other's updates.
+
+Reads come from an in-memory view. Each access costs one ``stat``: the view is
+reloaded only when the file's inode, mtime or size changed, and subscribers
+(:meth:`Config.subscribe`) are told which top-level fields changed.
+"""
+
+import copy
 import json
+import os
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+from sonika.filelock import atomic_write_text, locked
 
 SONIKA_DIR = Path.home() / ".sonika"
 CONFIG_FILE = SONIKA_DIR / "config.json"
@@ -10,46 +25,149 @@ CONFIG_FILE = SONIKA_DIR / "config.json"
 PROVIDERS = ["openai", "google", "deepseek"]
 
 
+def _merge_into(dst: dict, patch: dict) -> dict:
+    for k, v in patch.items():
+        if isinstance(v, dict) and isinstance(dst.get(k), dict):
+            _merge_into(dst[k], v)
+        else:
+            dst[k] = copy.deepcopy(v)
+    return dst
+
+
+def _changed(old: dict, new: dict) -> set[str]:
+    return {k for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+
+
 class Config:
-    def __init__(self, config_dir: Path | None = None):
+    def __init__(self, config_dir: Path | None = None, writer=None):
         self._dir = config_dir or SONIKA_DIR
         self._file = self._dir / "config.json"
         self._dir.mkdir(parents=True, exist_ok=True)
+        # Optional sonika.persist.BackgroundWriter: saves are queued, not blocking
+        self._writer = writer
+        self._lock = threading.RLock()
+        self._subscribers: list[Callable[[set[str]], None]] = []
+        # Last file contents read or written, and the stat stamp they match
+        self._disk: dict = {}
+        self._stamp: Optional[tuple] = None
+        # Local changes being written / not yet handed to a write
+        self._writing: dict = {}
+        self._pending: dict = {}
         self._data: dict = {}
         self._load()
 
+    def _file_stamp(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self._file)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_disk(self) -> dict:
+        try:
+            data = json.loads(self._file.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _view(self) -> dict:
+        return _merge_into(_merge_into(copy.deepcopy(self._disk), self._writing), self._pending)
+
     def _load(self):
-        if self._file.exists():
-            try:
-                self._data = json.loads(self._file.read_text(encoding="utf-8"))
-            except (json.JSONDecodeError, OSError):
-                self._data = {}
-        else:
-            self._data = {}
+        with self._lock:
+            # Stat before reading: a write in between only causes one more reload
+            self._stamp = self._file_stamp()
+            self._disk = self._read_disk() if self._stamp else {}
+            self._data = self._view()
+
+    def refresh(self) -> set[str]:
+        """Reload if config.json changed on disk; returns the changed fields."""
+        if self._file_stamp() == self._stamp:
+            return set()
+        with self._lock:
+            old = self._data
+            self._load()
+            changed = _changed(old, self._data)
+        self._notify(changed)
+        return changed
+
+    def _current(self) -> dict:
+        self.refresh()
+        return self._data
+
+    # ── Change notification ───────────────────────────────────────────────────
+
+    def subscribe(self, callback: Callable[[set[str]], None]) -> Callable[[], None]:
+        """Call ``callback(changed_fields)`` on local changes and on changes by
+        other processes (noticed on the next access or :meth:`refresh`).
+        Returns a function that unsubscribes.
+
+        Callbacks may run on the background writer's thread (changes found
+        while saving), so they must be thread-safe: set a flag or hand the
+        work to the event loop with ``loop.call_soon_threadsafe``."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _notify(self, changed: set[str]):
+        if not changed:
+            return
+        for callback in list(self._subscribers):
+            callback(changed)
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def _update(self, patch: dict):
+        self.refresh()
+        with self._lock:
+            old = self._data
+            _merge_into(self._pending, patch)
+            self._data = self._view()
+            changed = _changed(old, self._data)
+        self._save()
+        self._notify(changed)
 
     def _save(self):
-        # Merge with existing file to preserve keys written by other components
-        on_disk: dict = {}
-        if self._file.exists():
-            try:
-                on_disk = json.loads(self._file.read_text(encoding="utf-8"))
-            except (json.JSONDecodeError, OSError):
-                on_disk = {}
-        on_disk.update(self._data)
-        self._file.write_text(
-            json.dumps(on_disk, indent=2, ensure_ascii=False), encoding="utf-8"
-        )
+        if self._writer is None:
+            self._write()
+        else:
+            self._writer.submit(("config", str(self._file)), self._write)
+
+    def _write(self):
+        with locked(self._file):
+            with self._lock:
+                _merge_into(self._writing, self._pending)
+                self._pending = {}
+                if not self._writing:
+                    return
+                writing = copy.deepcopy(self._writing)
+                stamp = self._file_stamp()
+                # Unchanged since our last read or write: no need to re-read it
+                fresh = stamp is not None and stamp == self._stamp
+                on_disk = copy.deepcopy(self._disk) if fresh else None
+            if on_disk is None:
+                on_disk = self._read_disk()
+            _merge_into(on_disk, writing)
+            # fsync: after a crash config.json (and every API key) must not be empty
+            atomic_write_text(
+                self._file, json.dumps(on_disk, indent=2, ensure_ascii=False), fsync=True
+            )
+            with self._lock:
+                old = self._data
+                self._writing = {}
+                self._disk = on_disk
+                self._stamp = self._file_stamp()
+                self._data = self._view()
+                # Anything else that differs was written by another process
+                changed = _changed(old, self._data)
+        self._notify(changed)
 
     # ── API Keys ──────────────────────────────────────────────────────────────
 
     def get_key(self, provider: str) -> Optional[str]:
-        return self._data.get("keys", {}).get(provider)
+        return self._current().get("keys", {}).get(provider)
 
     def set_key(self, provider: str, key: str):
-        if "keys" not in self._data:
-            self._data["keys"] = {}
-        self._data["keys"][provider] = key
-        self._save()
+        self._update({"keys": {provider: key}})
 
     def has_key(self, provider: str) -> bool:
         return bool(self.get_key(provider))
@@ -58,16 +176,14 @@ class Config:
 
     @property
     def active_provider(self) -> Optional[str]:
-        return self._data.get("active_provider")
+        return self._current().get("active_provider")
 
     @property
     def active_model(self) -> Optional[str]:
-        return self._data.get("active_model")
+        return self._current().get("active_model")
 
     def set_active(self, provider: str, model: str):
-        self._data["active_provider"] = provider
-        self._data["active_model"] = model
-        self._save()
+        self._update({"active_provider": provider, "active_model": model})
 
     # ── Status ────────────────────────────────────────────────────────────────
 
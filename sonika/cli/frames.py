@@ -0,0 +1,139 @@
+"""Frame-paced rendering of a streamed turn.
+
+Calling the renderer once per streamed chunk costs a terminal write and a
+flush per token; fast models (or a slow SSH terminal) turn that into
+thousands of syscalls per second, and the stream consumer waits on the
+terminal. :class:`FrameQueue` sits between :meth:`SonikaCLI._send` and the
+renderer: the consumer queues renderer calls, and a render task replays them
+at most ``fps`` times per second between :meth:`BaseRenderer.begin_frame` and
+:meth:`BaseRenderer.end_frame`, which lets the renderer emit a whole frame in
+one write.
+
+Within a frame, consecutive ``show_token`` calls of the same kind are joined
+into one call, and so are consecutive ``show_thinking`` deltas (with the
+latest line count). The queue
+is bounded: when the renderer falls behind by ``maxsize`` uncoalesced calls
+the consumer waits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, Optional
+
+from sonika.cli.renderers import BaseRenderer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FPS = 30
+
+
+class FrameQueue:
+    """Bounded, coalescing queue of renderer calls drained once per frame."""
+
+    def __init__(self, renderer: BaseRenderer, fps: int = DEFAULT_FPS, maxsize: int = 256) -> None:
+        self._renderer = renderer
+        # fps <= 0: no pacing, every call is rendered as it is queued
+        self._interval = 1.0 / fps if fps > 0 else 0.0
+        self._maxsize = maxsize
+        # [method, args]; a coalesced show_token holds [chunks, is_pre_tool]
+        self._events: list[list[Any]] = []
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self.queued = 0
+        self.frames = 0
+
+    def start(self) -> "FrameQueue":
+        if self._interval and self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def put(self, method: str, *args: Any) -> None:
+        """Queue ``renderer.<method>(*args)``; raises if rendering failed."""
+        self._check()
+        self.queued += 1
+        if not self._interval or self._closed:
+            self._events.append([method, args])
+            self._render()
+            return
+        last = self._events[-1] if self._events else None
+        if last is not None and last[0] == method:
+            if method == "show_token" and last[1][1] == args[1]:
+                last[1][0].append(args[0])
+                return
+            if method == "show_thinking":
+                last[1][0].append(args[0])
+                last[1][1] = args[1]
+                return
+        while len(self._events) >= self._maxsize:
+            self._space.clear()
+            await self._space.wait()
+            self._check()
+        if method in ("show_token", "show_thinking"):
+            self._events.append([method, [[args[0]], args[1]]])
+        else:
+            self._events.append([method, args])
+        self._wake.set()
+
+    async def drain(self) -> None:
+        """Render everything queued now (before prompting the user, say)."""
+        self._render()
+        self._check()
+
+    async def close(self) -> None:
+        """Stop the render task and render what is left. Idempotent."""
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        try:
+            self._render()
+        except Exception as exc:
+            logger.warning("render failed: %s", exc)
+
+    def _check(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self._wake.wait()
+                self._wake.clear()
+                t0 = time.monotonic()
+                self._render()
+                await asyncio.sleep(max(0.0, self._interval - (time.monotonic() - t0)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self._error = exc
+            self._space.set()
+
+    def _render(self) -> None:
+        if not self._events:
+            return
+        events, self._events = self._events, []
+        self._space.set()
+        self.frames += 1
+        renderer = self._renderer
+        renderer.begin_frame()
+        try:
+            for method, args in events:
+                if isinstance(args, list):
+                    # Coalesced deltas (show_token / show_thinking)
+                    chunks, extra = args
+                    getattr(renderer, method)("".join(chunks), extra)
+                else:
+                    getattr(renderer, method)(*args)
+        finally:
+            renderer.end_frame()
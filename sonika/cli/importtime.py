@@ -0,0 +1,170 @@
+"""Cold-start budget — parses ``python -X importtime`` output.
+
+Usage:
+    python -m sonika.cli.importtime                 # profile every budgeted module
+    python -m sonika.cli.importtime -m sonika.cli --top 20 --json importtime.json
+
+Exits with status 1 when a module exceeds its budget or pulls in a heavy
+dependency that must stay lazy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Iterable, Optional
+
+# Cumulative import cost per entry module, in milliseconds. Override all with
+# SONIKA_IMPORT_BUDGET_MS (e.g. on slow CI runners).
+BUDGETS_MS: dict[str, float] = {
+    "sonika.cli": 150.0,
+    "sonika.cli.app": 150.0,
+    "sonika.interfaces.console.app": 150.0,
+}
+
+# Must never be imported just by loading the CLI entry points
+HEAVY_MODULES = (
+    "langchain_core",
+    "langchain",
+    "langgraph",
+    "sonika_ai_toolkit",
+    "prompt_toolkit",
+    "rich",
+    "typer",
+    "dotenv",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportEntry:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    entries: list[ImportEntry] = field(default_factory=list)
+
+    @property
+    def total_us(self) -> int:
+        return sum(e.self_us for e in self.entries)
+
+    def cumulative_ms(self, module: str) -> float:
+        """Cumulative cost of ``module`` (0 if it was already imported)."""
+        for e in self.entries:
+            if e.module == module:
+                return e.cumulative_us / 1000
+        return 0.0
+
+    def imported(self, prefixes: Iterable[str]) -> list[str]:
+        found = []
+        for prefix in prefixes:
+            if any(e.module == prefix or e.module.startswith(prefix + ".") for e in self.entries):
+                found.append(prefix)
+        return found
+
+    def top(self, n: int = 15, key: str = "self_us") -> list[ImportEntry]:
+        return sorted(self.entries, key=lambda e: getattr(e, key), reverse=True)[:n]
+
+    def to_dict(self) -> dict:
+        return {
+            "total_ms": self.total_us / 1000,
+            "modules": [asdict(e) for e in self.entries],
+        }
+
+
+def parse_importtime(text: str) -> ImportProfile:
+    """Parse the stderr of ``python -X importtime``."""
+    profile = ImportProfile()
+    for line in text.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, name = m.groups()
+        profile.entries.append(
+            ImportEntry(
+                module=name,
+                self_us=int(self_us),
+                cumulative_us=int(cum_us),
+                depth=max(0, (len(indent) - 1) // 2),
+            )
+        )
+    return profile
+
+
+def measure(module: str, runs: int = 3, python: Optional[str] = None) -> ImportProfile:
+    """Import ``module`` in fresh interpreters and keep the fastest run."""
+    best: Optional[ImportProfile] = None
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        profile = parse_importtime(proc.stderr)
+        if best is None or profile.cumulative_ms(module) < best.cumulative_ms(module):
+            best = profile
+    assert best is not None
+    return best
+
+
+def budget_for(module: str) -> float:
+    override = os.environ.get("SONIKA_IMPORT_BUDGET_MS")
+    if override:
+        return float(override)
+    return BUDGETS_MS.get(module, 150.0)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-m", "--module", action="append", help="Module(s) to profile")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    modules = args.module or list(BUDGETS_MS)
+    results = {}
+    failed = False
+    for module in modules:
+        profile = measure(module, runs=args.runs)
+        cost = profile.cumulative_ms(module)
+        budget = budget_for(module)
+        heavy = profile.imported(HEAVY_MODULES)
+        ok = cost <= budget and not heavy
+        failed = failed or not ok
+
+        print(f"\n{module}: {cost:.1f} ms (budget {budget:.0f} ms) {'OK' if ok else 'FAIL'}")
+        if heavy:
+            print(f"  heavy modules imported eagerly: {', '.join(heavy)}")
+        print(f"  {'self ms':>8} {'cum ms':>8}  module")
+        for e in profile.top(args.top):
+            print(f"  {e.self_us / 1000:8.1f} {e.cumulative_us / 1000:8.1f}  {e.module}")
+
+        results[module] = {
+            "cumulative_ms": cost,
+            "budget_ms": budget,
+            "heavy": heavy,
+            "ok": ok,
+            **profile.to_dict(),
+        }
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Split streamed Markdown into blocks as soon as they are complete.
+
+The terminal renderer draws a streamed answer block by block: a paragraph,
+list, table, heading or fenced code block is rendered (with Rich Markdown)
+once :class:`MarkdownStream` reports it finished, and only the open block at
+the end stays on screen as provisional raw text. Each line is examined once
+when its newline arrives, so splitting an answer is linear in its length.
+
+Block boundaries follow CommonMark closely enough for terminal output:
+
+- a blank line ends a paragraph or table; a list continues across blank
+  lines while the next line is another item or indented continuation;
+- a fenced block ends at a closing fence of the same character and at least
+  the same length, and blank lines inside it are kept;
+- headings and thematic breaks are blocks of their own; a ``---``/``===``
+  line under a paragraph makes it a setext heading, and a thematic break
+  after a list item closes the list.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from rich.cells import cell_len
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_LIST_ITEM = re.compile(r"^ {0,3}([*+-]|\d{1,9}[.)])(\s|$)")
+_HEADING = re.compile(r"^ {0,3}#{1,6}(\s|$)")
+_BREAK = re.compile(r"^ {0,3}([-*_=])(\s*\1){2,}\s*$")
+
+
+class MarkdownStream:
+    """Incremental block splitter: :meth:`feed` text, get finished blocks.
+
+    ``max_lines`` (0 = no limit) bounds the open block: a longer one is
+    emitted in parts, a fenced block being closed and reopened at the split,
+    so the provisional tail never outgrows the screen. With ``width`` (the
+    terminal columns) the bound counts wrapped rows, and a line that would
+    cross it before its newline arrives is cut at its last space.
+    """
+
+    def __init__(self, max_lines: int = 0, width: int = 0) -> None:
+        self.max_lines = max_lines
+        self.width = width
+        self._partial: list[str] = []  # chunks of the line being received
+        self._partial_cells = 0
+        self._lines: list[str] = []  # complete lines of the open block
+        self._rows = 0  # terminal rows taken by _lines
+        self._fence: Optional[str] = None  # marker of the open code fence
+        self._fence_line = ""
+        self._list = False
+        self._blank = False  # the open list ended with a blank line
+
+    @property
+    def tail(self) -> str:
+        """Source of the open block, including the line being received."""
+        lines = "\n".join(self._lines) + "\n" if self._lines else ""
+        return lines + "".join(self._partial)
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text; returns the blocks it completed (Markdown source)."""
+        done: list[str] = []
+        while True:
+            head, newline, text = text.partition("\n")
+            if not newline:
+                break
+            self._partial.append(head)
+            line = "".join(self._partial)
+            self._partial = []
+            self._partial_cells = 0
+            self._line(line, done)
+        if head:
+            self._partial.append(head)
+            self._partial_cells += cell_len(head)
+            if self.max_lines and self.width:
+                self._cut_partial(done)
+        return done
+
+    def finish(self) -> list[str]:
+        """End of stream: the open block (if any) is complete."""
+        done: list[str] = []
+        if self._partial:
+            line = "".join(self._partial)
+            self._partial = []
+            self._partial_cells = 0
+            self._line(line, done)
+        self._emit(done)
+        return done
+
+    def _row_count(self, cells: int) -> int:
+        return max(1, -(-cells // self.width)) if self.width else 1
+
+    def _cut_partial(self, done: list[str]) -> None:
+        """Split the line being received once it would take the open block
+        past ``max_lines`` rows: a long paragraph may have no newline at all."""
+        while self._partial and self._rows + self._row_count(self._partial_cells) >= self.max_lines:
+            line = "".join(self._partial)
+            cut = line.rfind(" ") + 1 or len(line)
+            rest = line[cut:]
+            self._partial = [rest] if rest else []
+            self._partial_cells = cell_len(rest)
+            self._line(line[:cut].rstrip(), done)
+            if self._lines:
+                self._split(done)
+
+    def _split(self, done: list[str]) -> None:
+        """Emit the open block early; a fenced block is closed here and
+        reopened for the rest of the code."""
+        if self._fence is None:
+            self._emit(done)
+            return
+        fence, opening = self._fence, self._fence_line
+        self._lines.append(fence)
+        self._emit(done)
+        self._fence, self._fence_line = fence, opening
+        self._lines = [opening]
+        self._rows = self._row_count(cell_len(opening))
+
+    def _line(self, line: str, done: list[str]) -> None:
+        if self._fence is not None:
+            self._add(line)
+            stripped = line.strip()
+            if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                self._fence = None
+                self._emit(done)
+            elif self.max_lines and self._rows >= self.max_lines:
+                self._split(done)
+            return
+
+        if not line.strip():
+            if self._list:
+                self._add(line)
+                self._blank = True
+            else:
+                self._emit(done)
+            return
+
+        if self._blank:
+            self._blank = False
+            if not (_LIST_ITEM.match(line) or line[:1] in (" ", "\t")):
+                self._emit(done)
+
+        fence = _FENCE.match(line)
+        if fence and not self._list:
+            self._emit(done)
+            self._fence, self._fence_line = fence.group(1), line
+            self._add(line)
+            return
+
+        # In a list, ---/***/___ is a thematic break that closes it (an
+        # underline cannot be a lazy continuation); === is plain text there
+        if _BREAK.match(line) and not (self._list and line.lstrip()[0] == "="):
+            if self._lines and not self._list and line.lstrip()[0] in "-=":
+                self._lines.append(line)  # setext heading underline
+                self._emit(done)
+            else:
+                self._emit(done)
+                done.append(line)
+            return
+
+        if _HEADING.match(line):
+            self._emit(done)
+            done.append(line)
+            return
+
+        if not self._lines:
+            self._list = bool(_LIST_ITEM.match(line))
+        self._add(line)
+        if self.max_lines and self._rows >= self.max_lines:
+            self._emit(done)
+
+    def _add(self, line: str) -> None:
+        self._lines.append(line)
+        self._rows += self._row_count(cell_len(line))
+
+    def _emit(self, done: list[str]) -> None:
+        lines = self._lines
+        while lines and not lines[-1].strip():
+            lines.pop()
+        if lines:
+            done.append("\n".join(lines))
+        self._lines = []
+        self._rows = 0
+        self._fence = None
+        self._list = False
+        self._blank = False
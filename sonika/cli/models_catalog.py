@@ -1,7 +1,7 @@
 """Catalog of reasoning models with pricing and context window info."""
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -11,6 +11,9 @@ class ModelInfo:
     context_k: int        # context window in thousands of tokens
     input_per_1m: float   # USD per 1M input tokens
     output_per_1m: float  # USD per 1M output tokens
+    rpm: int = 0          # client-side requests/minute limit (0 = unlimited)
+    tpm: int = 0          # client-side tokens/minute limit (0 = unlimited)
+    cached_per_1m: Optional[float] = None  # USD per 1M prompt-cache hits (None: input price)
 
     @property
     def context_label(self) -> str:
@@ -26,21 +29,28 @@ class ModelInfo:
             return "free"
         return f"${self.input_per_1m:.2f} / ${self.output_per_1m:.2f}"
 
-    def cost_for(self, tokens_in: int, tokens_out: int) -> float:
-        return (tokens_in / 1_000_000) * self.input_per_1m + (
-            tokens_out / 1_000_000
-        ) * self.output_per_1m
+    def cost_for(self, tokens_in: int, tokens_out: int, tokens_cached: int = 0) -> float:
+        """USD for a call; ``tokens_cached`` is the part of ``tokens_in`` served
+        from the provider's prompt cache."""
+        cached_rate = self.input_per_1m if self.cached_per_1m is None else self.cached_per_1m
+        return (
+            (tokens_in - tokens_cached) * self.input_per_1m
+            + tokens_cached * cached_rate
+            + tokens_out * self.output_per_1m
+        ) / 1_000_000
 
 
+# rpm/tpm follow the providers' entry paid tiers; override per model with
+# SonikaAppConfig.rate_limits.
 MODELS: List[ModelInfo] = [
-    ModelInfo("openai",    "o4-mini",                       200_000,   1.10,  4.40),
-    ModelInfo("openai",    "o3-mini",                       200_000,   1.10,  4.40),
-    ModelInfo("openai",    "o3",                            200_000,  10.00, 40.00),
-    ModelInfo("openai",    "o1",                            200_000,  15.00, 60.00),
-    ModelInfo("openai",    "o1-mini",                       128_000,   3.00, 12.00),
-    ModelInfo("google",    "gemini-2.5-pro",              1_000_000,   1.25, 10.00),
-    ModelInfo("google",    "gemini-2.5-flash",            1_000_000,   0.15,  0.60),
-    ModelInfo("google",    "gemini-2.0-flash-thinking-exp",1_000_000, 0.00,  0.00),
+    ModelInfo("openai",    "o4-mini",                       200_000,   1.10,  4.40,   500,   200_000),
+    ModelInfo("openai",    "o3-mini",                       200_000,   1.10,  4.40,   500,   200_000),
+    ModelInfo("openai",    "o3",                            200_000,  10.00, 40.00,   500,    30_000),
+    ModelInfo("openai",    "o1",                            200_000,  15.00, 60.00,   500,    30_000),
+    ModelInfo("openai",    "o1-mini",                       128_000,   3.00, 12.00,   500,   200_000),
+    ModelInfo("google",    "gemini-2.5-pro",              1_000_000,   1.25, 10.00,   150, 2_000_000),
+    ModelInfo("google",    "gemini-2.5-flash",            1_000_000,   0.15,  0.60, 1_000, 1_000_000),
+    ModelInfo("google",    "gemini-2.0-flash-thinking-exp",1_000_000, 0.00,  0.00,    10,   250_000),
     ModelInfo("deepseek",  "deepseek-reasoner",             64_000,   0.55,  2.19),
 ]
 
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from sonika.stream_events import TextBuffer
 
 
 class BaseRenderer(ABC):
@@ -42,10 +45,12 @@ class BaseRenderer(ABC):
     def show_ai_start(self, provider: str = "", model: str = "") -> None: ...
 
     @abstractmethod
-    def show_thinking(self, text: str, line_count: int) -> None: ...
+    def show_thinking(self, delta: str, line_count: int) -> None:
+        """New reasoning text ``delta``; ``line_count`` lines so far this turn."""
 
     @abstractmethod
-    def show_thinking_end(self, full_text: str) -> None: ...
+    def show_thinking_end(self, thinking: TextBuffer) -> None:
+        """Reasoning finished; ``thinking`` holds all of it (maybe spilled to disk)."""
 
     @abstractmethod
     def show_token(self, token: str, is_pre_tool: bool) -> None: ...
@@ -84,21 +89,61 @@ class BaseRenderer(ABC):
     @abstractmethod
     async def show_approval(self, tool_name: str, args_str: str) -> bool: ...
 
+    # ── Frames ────────────────────────────────────────────────────────────────
+
+    def begin_frame(self) -> None:
+        """Calls until :meth:`end_frame` belong to one frame (see
+        ``sonika.cli.frames``); output may be held until then. Default: no-op."""
+        pass
+
+    def end_frame(self) -> None:
+        """Emit the frame's output. Default: no-op."""
+        pass
+
     # ── System ────────────────────────────────────────────────────────────────
 
     def show_partial_response(self, text: str) -> None:
         """Show intermediate progress text from the agent. Default: no-op."""
         pass
 
+    def set_activity(self, text: str | None) -> None:
+        """Show background activity (e.g. warm-up progress) in the toolbar. Default: no-op."""
+        pass
+
+    def set_context(self, fill: float | None, saved_tokens: int = 0) -> None:
+        """Show context-window fill (0..1) and tokens saved by compaction. Default: no-op."""
+        pass
+
     @abstractmethod
     def show_retry(self, attempt: int, wait_s: float) -> None: ...
 
+    def show_queued(self, key: str, wait_s: float) -> None:
+        """A call is waiting for the client-side rate limit. Default: system line."""
+        self.show_system(f"Limite de {key} — en cola, espera estimada {wait_s:.1f}s")
+
     @abstractmethod
     def show_system(self, text: str) -> None: ...
 
     @abstractmethod
     def show_error(self, text: str) -> None: ...
 
+    # ── /compare ──────────────────────────────────────────────────────────────
+
+    def show_compare_start(self, labels: list[str]) -> None:
+        """A comparison of ``labels`` (provider/model) started. Default: system line."""
+        self.show_system(f"Comparando {len(labels)} modelos: {', '.join(labels)}")
+
+    def show_compare_token(self, index: int, token: str) -> None:
+        """Streamed text from model ``index`` of the comparison. Default: no-op."""
+        pass
+
+    def show_compare_end(self, results: list) -> None:
+        """Final answers and metrics (``sonika.cli.compare.CompareResult``).
+        Default: answers one after another, then a text table."""
+        from sonika.cli.compare import format_results
+
+        self.show_system("\n".join(format_results(results)))
+
     # ── Pickers ───────────────────────────────────────────────────────────────
 
     @abstractmethod
@@ -109,7 +154,10 @@ class BaseRenderer(ABC):
         self,
         models: list[Any],
         configured_providers: list[str],
-    ) -> tuple[str, str] | None: ...
+        perf: dict[tuple[str, str], Any] | None = None,
+    ) -> tuple[str, str] | None:
+        """Pick a model; ``perf`` maps (provider, model) to observed
+        :class:`sonika.perf.ModelPerf`. Return ("auto", "auto") for auto."""
 
     @abstractmethod
     async def show_session_picker(
@@ -5,6 +5,7 @@ No alternate screen, no mouse capture — native terminal scroll and copy/paste.
 
 from __future__ import annotations
 
+import io
 import sys
 import time
 from typing import Any
@@ -17,13 +18,17 @@ from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout import Layout, HSplit, Window, FormattedTextControl
 from prompt_toolkit.layout.controls import BufferControl
 from prompt_toolkit.layout.processors import BeforeInput
+from rich.columns import Columns
+from rich.cells import cell_len
 from rich.console import Console
-from rich.markdown import Markdown
+from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
+from sonika.cli.markdown_stream import MarkdownStream
 from sonika.cli.renderers import BaseRenderer
+from sonika.stream_events import TextBuffer
 
 # ── Colours ───────────────────────────────────────────────────────────────────
 
@@ -59,6 +64,15 @@ def _fmt_tokens(n: int) -> str:
     return str(n)
 
 
+def _fmt_perf(perf: Any) -> str:
+    """TTFT, tokens/s and error-rate columns of the model picker."""
+    if perf is None:
+        return f"{'—':>6} {'—':>7} {'—':>4}"
+    ttft = f"{perf.ttft_ms / 1000:.1f}s" if perf.ttft_ms is not None else "—"
+    tps = f"{perf.tokens_per_s:.0f}t/s" if perf.tokens_per_s else "—"
+    return f"{ttft:>6} {tps:>7} {perf.error_rate:>4.0%}"
+
+
 # ── Interactive picker ────────────────────────────────────────────────────────
 
 
@@ -174,9 +188,15 @@ class ClaudeStyleRenderer(BaseRenderer):
 
     def __init__(self) -> None:
         self._console = Console(highlight=False)
-        self._raw_tokens: list[str] = []
-        self._raw_lines_printed: int = 0
-        self._is_pre_tool: bool = True
+        # Streamed answer: finished Markdown blocks are rendered once, the
+        # open block stays on screen as raw text (_tail) until it is done
+        self._md: MarkdownStream | None = None
+        self._md_pre_tool: bool = True
+        self._md_blocks: int = 0
+        self._tail: list[str] = []
+        self._streamed: dict[bool, list[str]] = {True: [], False: []}
+        # Start of this turn's reasoning, for the status line preview
+        self._thinking_start = ""
         self._has_content: bool = False
         # Live status tracking
         self._t_start: float = 0.0
@@ -188,6 +208,14 @@ class ClaudeStyleRenderer(BaseRenderer):
         self._tools_count: int = 0
         # Stats for toolbar
         self._last_stats: dict | None = None
+        self._activity: str | None = None
+        self._context: tuple[float, int] | None = None
+        # Output of the frame being rendered (see begin_frame)
+        self._frame: io.StringIO | None = None
+        # /compare: one text stream per model, drawn side by side
+        self._compare_labels: list[str] = []
+        self._compare_text: list[list[str]] = []
+        self._compare_live: Live | None = None
 
     # ── Lifecycle ─────────────────────────────────────────────────────────────
 
@@ -302,6 +330,14 @@ class ClaudeStyleRenderer(BaseRenderer):
                 if s.get("tools"):
                     t = s["tools"]
                     parts.append((_DIM, f" · {t} tool{'s' if t > 1 else ''}"))
+            if self._context:
+                fill, saved = self._context
+                style = _YELLOW if fill >= 0.8 else _DIM
+                parts.append((style, f" · ctx {fill:.0%}"))
+                if saved:
+                    parts.append((_DIM, f" (-{_fmt_tokens(saved)} compactados)"))
+            if self._activity:
+                parts.append((_YELLOW, f" · ⟳ {self._activity}"))
             parts.append((_DIM, "  │  Tab: modo"))
             return FormattedText(parts)
 
@@ -337,9 +373,10 @@ class ClaudeStyleRenderer(BaseRenderer):
         self._console.print()
 
     def show_ai_start(self, provider: str = "", model: str = "") -> None:
-        self._raw_tokens = []
-        self._raw_lines_printed = 0
-        self._is_pre_tool = True
+        self._thinking_start = ""
+        self._md = None
+        self._tail = []
+        self._streamed = {True: [], False: []}
         self._has_content = False
         self._t_start = time.monotonic()
         self._token_count = 0
@@ -350,10 +387,13 @@ class ClaudeStyleRenderer(BaseRenderer):
         self._tools_count = 0
         self._update_status()
 
-    def show_thinking(self, text: str, line_count: int) -> None:
-        # Just update status line with a preview — no in-place erase (fragile)
+    def show_thinking(self, delta: str, line_count: int) -> None:
+        # Just update status line with a preview — no in-place erase (fragile).
+        # The preview is the first non-blank line, so only the start is kept
+        if len(self._thinking_start) < 400:
+            self._thinking_start += delta
         first_line = ""
-        for ln in text.splitlines():
+        for ln in self._thinking_start.splitlines():
             s = ln.strip().lstrip("#*- ").strip()
             if s:
                 first_line = s[:50]
@@ -366,28 +406,26 @@ class ClaudeStyleRenderer(BaseRenderer):
             if self._provider and self._model:
                 parts.append(f"{self._provider}/{self._model}")
             line = " · ".join(parts)
-            sys.stdout.write(f"\r\033[2K\033[2m  ⏺ {line}\033[0m")
-            sys.stdout.flush()
+            self._write(f"\r\033[2K\033[2m  ⏺ {line}\033[0m")
         else:
             self._update_status()
 
-    def show_thinking_end(self, full_text: str) -> None:
+    def show_thinking_end(self, thinking: TextBuffer) -> None:
         self._clear_status()
-        if not full_text:
+        if not thinking:
             return
         # Truncate to max visible lines with summary
         max_lines = 8
-        all_lines = full_text.splitlines()
-        total = len(all_lines)
-        if total <= max_lines:
-            display_text = full_text
+        total = thinking.line_count
+        if total <= max_lines and not thinking.spilled:
+            display_text = thinking.text()
         else:
-            head = all_lines[:3]
-            tail = all_lines[-3:]
-            omitted = total - 6
+            omitted = max(0, total - 6)
             display_text = "\n".join(
-                head + [f"  ... {omitted} lineas mas ..."] + tail
+                [thinking.head(3), f"  ... {omitted} lineas mas ...", thinking.tail(3)]
             )
+        if thinking.spilled:
+            display_text += f"\n  (completo en {thinking.spill})"
         self._console.print(
             Panel(
                 Text(display_text, style=DIM),
@@ -401,26 +439,37 @@ class ClaudeStyleRenderer(BaseRenderer):
     def show_token(self, token: str, is_pre_tool: bool) -> None:
         self._clear_status()
         self._has_content = True
-        self._is_pre_tool = is_pre_tool
-        self._raw_tokens.append(token)
         self._token_count += max(1, len(token) // 4)
         self._phase = "Generando"
-
-        if is_pre_tool:
-            sys.stdout.write(f"\033[2m{token}\033[0m")
-        else:
-            sys.stdout.write(token)
-        sys.stdout.flush()
-        self._raw_lines_printed += token.count("\n")
+        self._streamed[is_pre_tool].append(token)
+
+        if self._md is None or self._md_pre_tool != is_pre_tool:
+            self._end_stream()
+            # Keep the provisional tail shorter than the screen, in wrapped rows
+            width, height = self._console.size
+            self._md = MarkdownStream(max_lines=max(4, height - 4), width=width)
+            self._md_pre_tool = is_pre_tool
+        blocks = self._md.feed(token)
+        if not blocks:
+            self._write_tail(token)
+            return
+        self._erase_tail()
+        self._print_blocks(blocks)
+        self._write_tail(self._md.tail)
 
     def show_final_response(self, markdown_text: str) -> None:
-        """Replace streamed raw tokens with Rich Markdown."""
+        """Finish the streamed answer, or render one that was not streamed
+        (a final report, a replayed message)."""
         self._clear_status()
-        self._erase_raw_tokens()
-        self._raw_tokens = []
-        self._raw_lines_printed = 0
-        self._console.print(Text(f"  ● ", style=f"bold {GREEN}"), end="")
-        self._console.print(Markdown(markdown_text), end="")
+        streamed = any(
+            markdown_text == "".join(chunks) for chunks in self._streamed.values() if chunks
+        )
+        self._end_stream()
+        if not streamed:
+            self._md_blocks = 0
+            self._md_pre_tool = False
+            self._print_blocks([markdown_text])
+        self._streamed = {True: [], False: []}
         self._console.print()
 
     def show_ai_end(
@@ -433,6 +482,8 @@ class ClaudeStyleRenderer(BaseRenderer):
         cost: float = 0.0,
     ) -> None:
         self._clear_status()
+        self._end_stream()
+        self._streamed = {True: [], False: []}
         if not self._has_content:
             return
 
@@ -456,15 +507,9 @@ class ClaudeStyleRenderer(BaseRenderer):
 
     def show_tool_start(self, name: str, args_str: str) -> None:
         self._clear_status()
-        if self._is_pre_tool and self._raw_tokens:
-            self._erase_raw_tokens()
-            full = "".join(self._raw_tokens)
-            if full.strip():
-                self._console.print(Text(f"  ● {full.strip()}", style=DIM))
-                self._console.print()
-            self._raw_tokens = []
-            self._raw_lines_printed = 0
-            self._is_pre_tool = False
+        if self._md is not None:
+            self._end_stream()
+            self._console.print()
 
         self._tools_count += 1
         self._phase = f"▸ {name}"
@@ -504,11 +549,23 @@ class ClaudeStyleRenderer(BaseRenderer):
     def show_partial_response(self, text: str) -> None:
         """Show intermediate agent progress as a dim bullet."""
         self._clear_status()
+        self._end_stream()
         self._console.print(Text(f"  ● {text}", style=DIM))
         self._update_status()
 
+    def set_context(self, fill: float | None, saved_tokens: int = 0) -> None:
+        self._context = None if fill is None else (fill, saved_tokens)
+
+    def set_activity(self, text: str | None) -> None:
+        self._activity = text
+        session = getattr(self, "_prompt_session", None)
+        app = getattr(session, "app", None)
+        if app is not None and app.is_running:
+            app.invalidate()
+
     def show_retry(self, attempt: int, wait_s: float) -> None:
         self._clear_status()
+        self._end_stream()
         self._console.print(
             Text(
                 f"  ↻ Rate limit — reintento {attempt}, espera {wait_s:.1f}s",
@@ -516,13 +573,92 @@ class ClaudeStyleRenderer(BaseRenderer):
             )
         )
 
+    def show_queued(self, key: str, wait_s: float) -> None:
+        self._clear_status()
+        self._console.print(
+            Text(f"  ⏳ Limite de {key} — en cola, espera estimada {wait_s:.1f}s", style=DIM)
+        )
+
     def show_system(self, text: str) -> None:
         self._console.print(Text(f"  {text}", style=DIM))
 
     def show_error(self, text: str) -> None:
+        self._end_stream()
         msg = _extract_error_message(text)
         self._console.print(Text(f"  ✗ {msg}", style=f"bold {RED}"))
 
+    # ── /compare ──────────────────────────────────────────────────────────────
+
+    def show_compare_start(self, labels: list[str]) -> None:
+        self._clear_status()
+        self._compare_labels = labels
+        self._compare_text = [[] for _ in labels]
+        # Tokens only append to buffers; Live redraws a few times per second
+        self._compare_live = Live(
+            get_renderable=self._compare_view,
+            console=self._console,
+            refresh_per_second=8,
+            transient=True,
+        )
+        self._compare_live.start()
+
+    def show_compare_token(self, index: int, token: str) -> None:
+        self._compare_text[index].append(token)
+
+    def _compare_view(self) -> Columns:
+        height = max(4, self._console.size.height - 6)
+        width = max(20, self._console.size.width // max(1, len(self._compare_labels)) - 4)
+        panels = []
+        for label, chunks in zip(self._compare_labels, self._compare_text):
+            text = Text("".join(chunks))
+            lines = text.wrap(self._console, width)
+            panels.append(
+                Panel(
+                    Text("\n").join(lines[-height:]) if lines else Text("…", style=DIM),
+                    title=label,
+                    title_align="left",
+                    border_style=DIM,
+                    width=width + 4,
+                )
+            )
+        return Columns(panels)
+
+    def show_compare_end(self, results: list) -> None:
+        from rich.markdown import Markdown
+
+        if self._compare_live is not None:
+            self._compare_live.stop()
+            self._compare_live = None
+        self._console.print()
+        for r in results:
+            body = Text(r.error, style=RED) if r.error else Markdown(r.answer.strip() or "(sin respuesta)")
+            self._console.print(
+                Panel(body, title=r.label, title_align="left", border_style=DIM)
+            )
+        table = Table(box=None, padding=(0, 2), header_style=DIM)
+        for col, justify in (
+            ("Modelo", "left"),
+            ("TTFT", "right"),
+            ("Total", "right"),
+            ("Tokens", "right"),
+            ("Costo", "right"),
+            ("Herramientas", "right"),
+        ):
+            table.add_column(col, justify=justify)
+        fastest = min((r.total_s for r in results if not r.error), default=None)
+        for r in results:
+            table.add_row(
+                Text(r.label, style=f"bold {GREEN}" if r.total_s == fastest else ""),
+                f"{r.ttft_ms / 1000:.2f}s" if r.ttft_ms is not None else "—",
+                f"{r.total_s:.2f}s",
+                f"{_fmt_tokens(r.tokens_in)}↑ {_fmt_tokens(r.tokens_out)}↓",
+                f"${r.cost:.5f}",
+                Text("error", style=RED) if r.error else str(r.tools),
+            )
+        self._console.print(table)
+        self._console.print()
+        self._compare_labels, self._compare_text = [], []
+
     # ── Pickers ───────────────────────────────────────────────────────────────
 
     def show_setup_prompt(self) -> dict[str, str]:
@@ -553,11 +689,18 @@ class ClaudeStyleRenderer(BaseRenderer):
         self,
         models: list[Any],
         configured_providers: list[str],
+        perf: dict[tuple[str, str], Any] | None = None,
     ) -> tuple[str, str] | None:
-        items: list[tuple[str, Any]] = []
+        perf = perf or {}
+        items: list[tuple[str, Any]] = [
+            (f"{'auto':<46} el mas rapido con contexto y precio adecuados", ("auto", "auto"))
+        ]
         for m in models:
             lock = "  🔒" if m.provider not in configured_providers else ""
-            label = f"{m.provider:<9} {m.model_id:<36} {m.context_label:<5} {m.price_label}{lock}"
+            label = (
+                f"{m.provider:<9} {m.model_id:<36} {m.context_label:<5} {m.price_label:<16}"
+                f" {_fmt_perf(perf.get((m.provider, m.model_id)))}{lock}"
+            )
             items.append((label, (m.provider, m.model_id)))
         return await _run_picker("Seleccionar modelo", items)
 
@@ -599,8 +742,14 @@ class ClaudeStyleRenderer(BaseRenderer):
             ("/model", "cambiar modelo"),
             ("/session", "sesiones anteriores"),
             ("/new", "nueva sesion"),
+            ("/search <texto>", "buscar en sesiones anteriores"),
+            ("/history [n]", "ver n intercambios anteriores"),
+            ("/compare <prompt>", "mismo prompt en varios modelos"),
             ("/key <prov> <k>", "guardar API key"),
             ("/mode", "cambiar modo (ask/auto/plan)"),
+            ("/stats", "latencia y costo por rol"),
+            ("/compact", "resumir turnos antiguos"),
+            ("/pin <texto>", "fijar un hecho en el contexto"),
             ("/exit", "salir"),
             ("Tab", "cambiar modo"),
         ]
@@ -611,6 +760,27 @@ class ClaudeStyleRenderer(BaseRenderer):
             )
         self._console.print()
 
+    # ── Internal: output ──────────────────────────────────────────────────────
+
+    def begin_frame(self) -> None:
+        # Raw writes and console prints of the frame collect in one buffer
+        self._frame = io.StringIO()
+        self._console.file = self._frame
+
+    def end_frame(self) -> None:
+        frame, self._frame = self._frame, None
+        self._console.file = None  # back to the current sys.stdout
+        if frame is not None and frame.tell():
+            sys.stdout.write(frame.getvalue())
+            sys.stdout.flush()
+
+    def _write(self, text: str) -> None:
+        if self._frame is not None:
+            self._frame.write(text)
+        else:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
     # ── Internal: status line ─────────────────────────────────────────────────
 
     def _update_status(self) -> None:
@@ -625,30 +795,59 @@ class ClaudeStyleRenderer(BaseRenderer):
 
         line = " · ".join(parts)
         if self._status_visible:
-            sys.stdout.write(f"\r\033[2K\033[2m  ⏺ {line}\033[0m")
+            self._write(f"\r\033[2K\033[2m  ⏺ {line}\033[0m")
         else:
-            sys.stdout.write(f"\n\033[2m  ⏺ {line}\033[0m")
+            self._write(f"\n\033[2m  ⏺ {line}\033[0m")
             self._status_visible = True
-        sys.stdout.flush()
 
     def _clear_status(self) -> None:
         """Remove the status line if visible."""
         if self._status_visible:
-            sys.stdout.write("\r\033[2K")
-            sys.stdout.write("\033[A\033[2K")
-            sys.stdout.write("\r")
-            sys.stdout.flush()
+            self._write("\r\033[2K\033[A\033[2K\r")
             self._status_visible = False
 
-    def _erase_raw_tokens(self) -> None:
-        """Erase previously streamed raw tokens from terminal."""
-        if not self._raw_tokens:
+    # ── Internal: streamed Markdown ───────────────────────────────────────────
+
+    def _print_blocks(self, blocks: list[str]) -> None:
+        """Render finished blocks; several finished together (one frame's
+        worth) are parsed and printed as one document."""
+        from rich.markdown import Markdown  # markdown-it is only needed once output exists
+
+        if not blocks:
+            return
+        # Narration before a tool call stays a dim bullet, apart from the answer
+        style = DIM if self._md_pre_tool else None
+        if self._md_blocks == 0:
+            self._console.print(Text("  ● ", style=style or f"bold {GREEN}"), end="")
+        else:
+            self._console.print()
+        self._console.print(Markdown("\n\n".join(blocks)), style=style, end="")
+        self._md_blocks += len(blocks)
+
+    def _write_tail(self, text: str) -> None:
+        if text:
+            self._tail.append(text)
+            self._write(f"\033[2m{text}\033[0m" if self._md_pre_tool else text)
+
+    def _erase_tail(self) -> None:
+        """Erase the provisional raw text of the open block."""
+        if not self._tail:
+            return
+        width = max(1, self._console.size.width)
+        rows = sum(
+            max(1, -(-cell_len(line) // width)) for line in "".join(self._tail).split("\n")
+        )
+        self._tail = []
+        self._write(f"\r\033[{rows - 1}A\033[J" if rows > 1 else "\r\033[J")
+
+    def _end_stream(self) -> None:
+        """Render the open block: the streamed text was interrupted or ended."""
+        if self._md is None:
             return
-        lines = self._raw_lines_printed + 1
-        for _ in range(lines):
-            sys.stdout.write("\033[2K\033[A")
-        sys.stdout.write("\033[2K\r")
-        sys.stdout.flush()
+        md, self._md = self._md, None
+        self._erase_tail()
+        self._print_blocks(md.finish())
+        self._md_blocks = 0
 
 
 
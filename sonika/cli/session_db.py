@@ -0,0 +1,261 @@
+"""SQLite session store (``SonikaAppConfig(session_backend="sqlite")``).
+
+One database (``~/.sonika/sessions.sqlite``, WAL mode) with a row per session
+(indexed by ``updated_at``), a row per message and an FTS5 index over message
+text kept in sync by triggers. Saving inserts only the messages added since the
+last save; ``search`` ranks hits with BM25 and returns highlighted snippets.
+
+The first time the database is opened, existing JSON/JSONL sessions are
+copied in once (:func:`migrate_from_files`); the files are left untouched.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from sonika.cli import session_manager
+from sonika.cli.session_manager import Session, read_session_file
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    title TEXT, provider TEXT, model TEXT,
+    created_at TEXT, updated_at TEXT,
+    message_count INTEGER DEFAULT 0,
+    tokens_in INTEGER DEFAULT 0, tokens_out INTEGER DEFAULT 0, cost REAL DEFAULT 0,
+    pinned TEXT DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions(updated_at DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT, content TEXT, extra TEXT,
+    UNIQUE (session_id, seq)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_SUMMARY_COLUMNS = (
+    "id", "title", "provider", "model", "created_at", "updated_at",
+    "message_count", "tokens_in", "tokens_out", "cost",
+)
+
+
+def _fts_query(query: str) -> str:
+    """Quote each term so user input is never parsed as FTS5 syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+class SQLiteSessionStore:
+    """Session store backed by SQLite with full-text search."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        # Keep the FTS index in sync when INSERT OR REPLACE deletes a row
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._conn.executescript(_SCHEMA)
+
+    # ── Store API ─────────────────────────────────────────────────────────────
+
+    def save(self, session: Session) -> None:
+        rewrite = session.message_count < session._persisted
+        if rewrite:
+            session.load_all()
+        start = 0 if rewrite else session._persisted
+        # Count first: a background save may race with add_message
+        count = session.message_count
+        rows = []
+        for seq in range(start, count):
+            msg = session.messages[seq - session._offset]
+            extra = {k: v for k, v in msg.items() if k not in ("role", "content")}
+            rows.append((
+                session.id, seq, msg.get("role", ""), str(msg.get("content", "")),
+                json.dumps(extra, ensure_ascii=False) if extra else None,
+            ))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET title=excluded.title,"
+                    " provider=excluded.provider, model=excluded.model,"
+                    " updated_at=excluded.updated_at, message_count=excluded.message_count,"
+                    " tokens_in=excluded.tokens_in, tokens_out=excluded.tokens_out,"
+                    " cost=excluded.cost, pinned=excluded.pinned",
+                    (
+                        session.id, session.title, session.provider, session.model,
+                        session.created_at, session.updated_at, count,
+                        session.tokens_in, session.tokens_out, session.cost,
+                        json.dumps(session.pinned, ensure_ascii=False),
+                    ),
+                )
+                if rewrite:
+                    self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session.id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO messages (session_id, seq, role, content, extra)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        session._persisted = count
+
+    @staticmethod
+    def _message(role: str, content: str, extra: Optional[str]) -> dict:
+        msg = {"role": role, "content": content}
+        if extra:
+            msg.update(json.loads(extra))
+        return msg
+
+    def load(self, session_id: str, tail: Optional[int] = None) -> Session:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title, provider, model, created_at, updated_at,"
+                " tokens_in, tokens_out, cost, pinned, message_count"
+                " FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"Session not found: {session_id}")
+            rows = self._conn.execute(
+                "SELECT role, content, extra FROM messages WHERE session_id = ?"
+                " AND seq >= ? ORDER BY seq",
+                (session_id, 0 if tail is None else row[10] - tail),
+            ).fetchall()
+        messages = [self._message(*r) for r in rows]
+        session = Session(
+            provider=row[2], model=row[3], session_id=row[0], title=row[1],
+            created_at=row[4], updated_at=row[5], messages=messages,
+            tokens_in=row[6], tokens_out=row[7], cost=row[8],
+            pinned=json.loads(row[9] or "[]"),
+        )
+        session._offset = max(0, row[10] - len(messages))
+        session._persisted = session.message_count
+        return session
+
+    def load_messages(self, session_id: str, start: int, end: int) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, extra FROM messages WHERE session_id = ?"
+                " AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start, end),
+            ).fetchall()
+        return [self._message(*r) for r in rows]
+
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM sessions"
+                " ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(zip(_SUMMARY_COLUMNS, r)) for r in rows]
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        session_manager.delete_blobs(session_id)
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.session_id, s.title, m.role, m.seq,"
+                " snippet(messages_fts, 0, '[', ']', '…', 12), bm25(messages_fts)"
+                " FROM messages_fts"
+                " JOIN messages m ON m.id = messages_fts.rowid"
+                " JOIN sessions s ON s.id = m.session_id"
+                " WHERE messages_fts MATCH ? ORDER BY bm25(messages_fts) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [
+            {"session_id": sid, "title": title, "role": role, "seq": seq,
+             "snippet": " ".join(snip.split()), "score": -rank}
+            for sid, title, role, seq, snip, rank in rows
+        ]
+
+    # ── Migration ─────────────────────────────────────────────────────────────
+
+    def _meta_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _meta_set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_from_files(store: SQLiteSessionStore, sessions_dir: Optional[Path] = None) -> int:
+    """Copy JSON/JSONL sessions into ``store``; newer rows already there win.
+
+    Returns the number of sessions imported.
+    """
+    sessions_dir = sessions_dir or session_manager.SESSIONS_DIR
+    existing = {s["id"]: s["updated_at"] or "" for s in store.list_sessions()}
+    # Legacy files first so a journal for the same id wins
+    paths = [*sorted(sessions_dir.glob("*.json")), *sorted(sessions_dir.glob("*.jsonl"))]
+    imported = set()
+    for path in paths:
+        try:
+            data = read_session_file(path)[0]
+        except (ValueError, OSError):
+            continue
+        session = Session.from_dict({**data, "id": data.get("id") or path.stem})
+        if existing.get(session.id, "") > (session.updated_at or ""):
+            continue
+        session._persisted = 0
+        if session.id in existing or session.id in imported:
+            # Replace the older copy's messages
+            store.delete(session.id)
+        store.save(session)
+        imported.add(session.id)
+    return len(imported)
+
+
+_STORES: dict[str, SQLiteSessionStore] = {}
+
+
+def get_sqlite_store(path: Path | str, migrate: bool = True) -> SQLiteSessionStore:
+    """Process-wide store per database file; migrates file sessions once."""
+    key = str(Path(path).resolve())
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = SQLiteSessionStore(path)
+        if migrate and store._meta_get("migrated_from") is None:
+            migrate_from_files(store)
+            store._meta_set("migrated_from", str(session_manager.SESSIONS_DIR))
+    return store
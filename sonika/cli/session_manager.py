@@ -1,15 +1,50 @@
-"""Session persistence — stores chat history in ~/.sonika/sessions/."""
+"""Session persistence — stores chat history in ~/.sonika/sessions/.
+
+Storage is pluggable: :class:`JournalStore` (below, the default) or
+:class:`sonika.cli.session_db.SQLiteSessionStore`, chosen with
+:func:`open_store`. Both implement save/load/list_sessions/delete/search.
+
+With the journal store each session is an append-only JSONL journal (``{id}.jsonl``): ``{"msg": …}``
+lines for messages and ``{"meta": …}`` lines for everything else (last one
+wins). A save appends only what changed since the previous save, so its cost
+does not grow with the conversation; once enough superseded ``meta`` lines
+pile up the journal is rewritten as a snapshot via temp file + rename.
+Legacy ``{id}.json`` files are still read and converted on their next save.
+
+Data too large for the journal (reasoning spilled from a turn, see
+``SonikaAppConfig.thinking_spill_chars``) goes to per-session blob files under
+``blobs/{id}/``, removed with the session.
+
+Sessions can be opened lazily: ``load(session_id, tail=n)`` keeps only the
+last ``n`` messages in memory and :meth:`Session.page` fetches older ones from
+the store when they are needed.
+"""
 
 import json
+import os
+import shutil
+import time
 import uuid
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from sonika.cli.models_catalog import get_model
+from sonika.context import estimate_tokens
+from sonika.filelock import atomic_write_text, locked
 
 SESSIONS_DIR = Path.home() / ".sonika" / "sessions"
 
+# When journal appends reach the disk: "always" (every save), "interval" (at
+# most once per FSYNC_INTERVAL_S) or "never" (left to the OS)
+FSYNC_POLICY = os.environ.get("SONIKA_FSYNC", "interval")
+FSYNC_INTERVAL_S = 1.0
+# Rewrite a journal once it holds this many superseded meta lines
+JOURNAL_COMPACT_AT = 64
+
+_last_fsync = 0.0
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -19,6 +54,125 @@ def _short_id() -> str:
     return uuid.uuid4().hex[:8]
 
 
+def _journal_path(session_id: str) -> Path:
+    return SESSIONS_DIR / f"{session_id}.jsonl"
+
+
+def _legacy_path(session_id: str) -> Path:
+    return SESSIONS_DIR / f"{session_id}.json"
+
+
+def blob_path(session_id: str, name: str) -> Path:
+    """File ``name`` of the session's blob store (not created here)."""
+    return SESSIONS_DIR / "blobs" / session_id / name
+
+
+def delete_blobs(session_id: str) -> None:
+    shutil.rmtree(SESSIONS_DIR / "blobs" / session_id, ignore_errors=True)
+
+
+def _should_fsync() -> bool:
+    global _last_fsync
+    if FSYNC_POLICY == "always":
+        return True
+    if FSYNC_POLICY == "interval" and time.monotonic() - _last_fsync >= FSYNC_INTERVAL_S:
+        _last_fsync = time.monotonic()
+        return True
+    return False
+
+
+def _parse_jsonl(text: str) -> List[dict]:
+    """Records of a JSONL log, skipping torn or corrupt lines."""
+    lines = text.splitlines()
+    try:
+        # One parse for the whole log; line by line only if a line is bad
+        return json.loads("[" + ",".join(lines) + "]")
+    except json.JSONDecodeError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+
+
+def read_session_file(path: Path) -> tuple[dict, int, bool]:
+    """Replay a journal (or read a legacy JSON file).
+
+    Returns the session dict, the number of ``meta`` lines and whether the
+    file ends cleanly (a torn last line from a crash is skipped).
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        return json.loads(text), 0, False
+    data: dict = {"messages": []}
+    meta_lines = 0
+    for rec in _parse_jsonl(text):
+        if "msg" in rec:
+            data["messages"].append(rec["msg"])
+        elif "meta" in rec:
+            data.update(rec["meta"])
+            meta_lines += 1
+    if "provider" not in data:
+        raise ValueError(f"Journal without metadata: {path}")
+    return data, meta_lines, text.endswith("\n")
+
+
+def scan_journal(
+    path: Path, start: int = 0, end: Optional[int] = None, tail: Optional[int] = None
+) -> tuple[dict, List[dict], int, int, bool]:
+    """Read a journal without parsing every message.
+
+    Only the messages in ``[start, end)`` (or the last ``tail`` ones) are
+    decoded; the rest are just counted. Returns the metadata, the selected
+    messages, the total message count, the number of ``meta`` lines and
+    whether the file ends cleanly.
+    """
+    # One spare slot in case the last line turns out to be torn
+    picked: deque = deque(maxlen=tail + 1) if tail is not None else deque()
+    metas: deque = deque(maxlen=2)
+    total = meta_lines = 0
+    last = ""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            last = line
+            if line.startswith('{"msg"'):
+                if tail is not None or (total >= start and (end is None or total < end)):
+                    picked.append((total, line))
+                total += 1
+            elif line.startswith('{"meta"'):
+                metas.append(line)
+                meta_lines += 1
+    clean = last.endswith("\n")
+    if not clean and last.startswith('{"msg"'):
+        # A torn last line (crash mid-append) is not a message
+        try:
+            json.loads(last)
+        except json.JSONDecodeError:
+            total -= 1
+            if picked and picked[-1][1] is last:
+                picked.pop()
+    if tail is not None and len(picked) > tail:
+        picked.popleft()
+    messages = []
+    for _, line in picked:
+        try:
+            messages.append(json.loads(line)["msg"])
+        except (json.JSONDecodeError, KeyError):
+            continue
+    data: Optional[dict] = None
+    for line in reversed(metas):
+        try:
+            data = json.loads(line)["meta"]
+            break
+        except (json.JSONDecodeError, KeyError):
+            meta_lines -= 1
+    if not data or "provider" not in data:
+        raise ValueError(f"Journal without metadata: {path}")
+    return data, messages, total, meta_lines, clean
+
+
 class Session:
     def __init__(
         self,
@@ -32,6 +186,7 @@ class Session:
         tokens_in: int = 0,
         tokens_out: int = 0,
         cost: float = 0.0,
+        pinned: Optional[List[str]] = None,
     ):
         self.id = session_id or _short_id()
         self.provider = provider
@@ -43,6 +198,18 @@ class Session:
         self.tokens_in = tokens_in
         self.tokens_out = tokens_out
         self.cost = cost
+        # Facts kept verbatim when the model context is compacted
+        self.pinned: List[str] = pinned or []
+        # Journal bookkeeping: messages already on disk, meta lines written,
+        # and whether the file can be appended to (False forces a snapshot)
+        self._persisted = 0
+        self._meta_lines = 0
+        self._journaled = False
+        # Lazy loading: number of older messages still only in the store
+        # (``messages`` then holds the tail; ``_persisted`` counts all)
+        self._offset = 0
+        # Backend the session was loaded from / is saved to (None: default)
+        self.store = None
 
     def to_dict(self) -> dict:
         return {
@@ -56,6 +223,7 @@ class Session:
             "tokens_in": self.tokens_in,
             "tokens_out": self.tokens_out,
             "cost": self.cost,
+            "pinned": self.pinned,
         }
 
     @classmethod
@@ -71,56 +239,423 @@ class Session:
             tokens_in=data.get("tokens_in", 0),
             tokens_out=data.get("tokens_out", 0),
             cost=data.get("cost", 0.0),
+            pinned=data.get("pinned", []),
         )
 
+    @property
+    def message_count(self) -> int:
+        """Messages in the session, including older ones not loaded yet."""
+        return self._offset + len(self.messages)
+
+    def page(self, start: int, end: int) -> List[dict]:
+        """Messages ``[start, end)`` by position, fetching unloaded ones from the store."""
+        start, end = max(0, start), min(end, self.message_count)
+        if start >= end:
+            return []
+        older: List[dict] = []
+        if start < self._offset:
+            older = (self.store or default_store()).load_messages(
+                self.id, start, min(end, self._offset)
+            )
+        if end <= self._offset:
+            return older
+        return older + self.messages[max(start, self._offset) - self._offset:end - self._offset]
+
+    def load_all(self) -> None:
+        """Bring every older message into memory (before a full rewrite)."""
+        if self._offset:
+            self.messages[:0] = (self.store or default_store()).load_messages(
+                self.id, 0, self._offset
+            )
+            self._offset = 0
+
+    def summary(self) -> dict:
+        """The session's index entry."""
+        entry = _summary(self.to_dict())
+        entry["message_count"] = self.message_count
+        return entry
+
+    def _meta(self) -> dict:
+        data = self.to_dict()
+        del data["messages"]
+        return data
+
     def save(self):
-        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
         self.updated_at = _now_iso()
-        path = SESSIONS_DIR / f"{self.id}.json"
-        path.write_text(
-            json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8"
-        )
+        (self.store or default_store()).save(self)
 
-    def add_message(self, role: str, content: str):
-        self.messages.append({"role": role, "content": content})
-        approx = max(1, len(content) // 4)
-        if role == "user":
-            self.tokens_in += approx
-        else:
-            self.tokens_out += approx
-        model_info = get_model(self.provider, self.model)
-        if model_info:
-            self.cost = model_info.cost_for(self.tokens_in, self.tokens_out)
-        if len(self.messages) == 1 and role == "user":
+    def add_message(self, role: str, content: str, usage: Optional[dict] = None):
+        """Append a message; ``usage`` (see :meth:`record_usage`) is kept on it."""
+        msg = {"role": role, "content": content}
+        if usage:
+            msg["usage"] = usage
+        self.messages.append(msg)
+        if self.message_count == 1 and role == "user":
             self.title = content[:60].replace("\n", " ").strip()
 
+    def record_usage(self, usage: dict) -> None:
+        """Add one turn's usage (:meth:`sonika.usage.TurnUsage.to_dict`) to the totals."""
+        self.tokens_in += int(usage.get("input", 0))
+        self.tokens_out += int(usage.get("output", 0))
+        self.cost += float(usage.get("cost", 0.0))
 
-class SessionManager:
-    def list_sessions(self) -> List[dict]:
-        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
-        sessions = []
-        for path in SESSIONS_DIR.glob("*.json"):
+    def estimate_usage(self, prompt: str, answer: str) -> dict:
+        """Usage guessed from the text, for providers that report none."""
+        tokens_in = max(1, estimate_tokens(prompt))
+        tokens_out = estimate_tokens(answer)
+        info = get_model(self.provider, self.model)
+        return {
+            "input": tokens_in,
+            "output": tokens_out,
+            "cached": 0,
+            "thinking": 0,
+            "cost": info.cost_for(tokens_in, tokens_out) if info else 0.0,
+            "estimated": True,
+        }
+
+
+def _summary(data: dict) -> dict:
+    return {
+        "id": data.get("id"),
+        "title": data.get("title", "Untitled"),
+        "provider": data.get("provider"),
+        "model": data.get("model"),
+        "created_at": data.get("created_at", ""),
+        "updated_at": data.get("updated_at", ""),
+        "message_count": len(data.get("messages", [])),
+        "tokens_in": data.get("tokens_in", 0),
+        "tokens_out": data.get("tokens_out", 0),
+        "cost": data.get("cost", 0.0),
+    }
+
+
+class SessionIndex:
+    """Compact listing of all sessions, kept next to SESSIONS_DIR.
+
+    The index is an append-only JSONL log (``sessions.index.jsonl``): each save
+    appends the session's entry under a file lock, so its cost does not grow
+    with the number of sessions; reads replay the log (last entry wins) and
+    rewrite it once superseded lines dominate. Every line records the sessions
+    directory's mtime; if the index is missing or the directory changed behind
+    its back (files added or removed by hand), it is rebuilt from the session
+    files.
+    """
+
+    # Rewrite the log when it holds this many more lines than live entries
+    COMPACT_SLACK = 64
+
+    def __init__(self, sessions_dir: Optional[Path] = None):
+        self.dir = sessions_dir or SESSIONS_DIR
+        self.path = self.dir.with_name(f"{self.dir.name}.index.jsonl")
+
+    def dir_mtime(self) -> int:
+        try:
+            return os.stat(self.dir).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _last_stamp(self) -> Optional[int]:
+        """Directory mtime recorded by the last complete line, read from the tail."""
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(0, os.SEEK_END)
+                size = fh.tell()
+                fh.seek(max(0, size - 8192))
+                tail = fh.read()
+        except OSError:
+            return None
+        if not tail.endswith(b"\n"):
+            return None
+        try:
+            return json.loads(tail.rstrip(b"\n").rsplit(b"\n", 1)[-1])["dir"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _replay(self) -> tuple[Optional[Dict[str, dict]], int, Optional[int]]:
+        """(entries, line count, last stamp); entries is None without a log."""
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except OSError:
+            return None, 0, None
+        sessions: Dict[str, dict] = {}
+        records = _parse_jsonl(text)
+        lines = len(records)
+        # A torn last line means the recorded stamp cannot be trusted
+        stamp = records[-1].get("dir") if records and text.endswith("\n") else None
+        for rec in records:
+            if "put" in rec:
+                sessions[rec["put"]["id"]] = rec["put"]
+            elif "del" in rec:
+                sessions.pop(rec["del"], None)
+        return sessions, lines, stamp
+
+    def _scan(self) -> Dict[str, dict]:
+        sessions: Dict[str, dict] = {}
+        # Legacy files first so a journal for the same id wins
+        for path in [*self.dir.glob("*.json"), *self.dir.glob("*.jsonl")]:
             try:
-                data = json.loads(path.read_text(encoding="utf-8"))
-                sessions.append(data)
-            except (json.JSONDecodeError, OSError):
+                entry = _summary(read_session_file(path)[0])
+            except (ValueError, OSError):
                 continue
-        sessions.sort(key=lambda s: s.get("updated_at", ""), reverse=True)
+            entry["id"] = entry["id"] or path.stem
+            sessions[entry["id"]] = entry
         return sessions
 
-    def load(self, session_id: str) -> Session:
-        path = SESSIONS_DIR / f"{session_id}.json"
+    def _rewrite(self, sessions: Dict[str, dict]) -> None:
+        stamp = self.dir_mtime()
+        atomic_write_text(
+            self.path,
+            "".join(
+                json.dumps({"put": e, "dir": stamp}, ensure_ascii=False) + "\n"
+                for e in sessions.values()
+            )
+            or json.dumps({"dir": stamp}) + "\n",
+        )
+
+    def _append(self, record: dict) -> None:
+        record["dir"] = self.dir_mtime()
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def entries(self) -> Dict[str, dict]:
+        sessions, lines, stamp = self._replay()
+        stale = sessions is None or stamp != self.dir_mtime()
+        if stale or lines > len(sessions) + self.COMPACT_SLACK:
+            with locked(self.path):
+                sessions, lines, stamp = self._replay()
+                if sessions is None or stamp != self.dir_mtime():
+                    sessions = self._scan()
+                    self._rewrite(sessions)
+                elif lines > len(sessions) + self.COMPACT_SLACK:
+                    self._rewrite(sessions)
+        return sessions
+
+    def _update(self, record: dict, dir_mtime_before: Optional[int]) -> None:
+        expected = self.dir_mtime() if dir_mtime_before is None else dir_mtime_before
+        with locked(self.path):
+            if self._last_stamp() == expected:
+                self._append(record)
+            else:
+                self._rewrite(self._scan())
+
+    def upsert(self, entry: dict, dir_mtime_before: Optional[int] = None) -> None:
+        """Record ``entry``. ``dir_mtime_before`` is the directory mtime taken
+        before the session file was written, so creating that file does not
+        count as an outside change."""
+        self._update({"put": entry}, dir_mtime_before)
+
+    def remove(self, session_id: str, dir_mtime_before: Optional[int] = None) -> None:
+        self._update({"del": session_id}, dir_mtime_before)
+
+
+class JournalStore:
+    """Sessions as JSONL journals in SESSIONS_DIR, listed through SessionIndex."""
+
+    name = "jsonl"
+
+    def save(self, session: Session) -> None:
+        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+        index = SessionIndex()
+        before = index.dir_mtime()
+        if (
+            not session._journaled
+            or session.message_count < session._persisted
+            or session._meta_lines > JOURNAL_COMPACT_AT
+        ):
+            self._write_snapshot(session)
+        else:
+            self._append(session)
+        index.upsert(session.summary(), before)
+
+    def _write_snapshot(self, session: Session) -> None:
+        session.load_all()
+        messages = session.messages[:]
+        lines = [json.dumps({"meta": session._meta()}, ensure_ascii=False)]
+        lines += [json.dumps({"msg": m}, ensure_ascii=False) for m in messages]
+        atomic_write_text(
+            _journal_path(session.id), "\n".join(lines) + "\n", fsync=FSYNC_POLICY != "never"
+        )
+        legacy = _legacy_path(session.id)
+        if legacy.exists():
+            legacy.unlink()
+        session._persisted = len(messages)
+        session._meta_lines = 1
+        session._journaled = True
+
+    def _append(self, session: Session) -> None:
+        # Count first: a background save may race with add_message
+        count = session.message_count
+        lines = [
+            json.dumps({"msg": m}, ensure_ascii=False)
+            for m in session.messages[session._persisted - session._offset:count - session._offset]
+        ]
+        lines.append(json.dumps({"meta": session._meta()}, ensure_ascii=False))
+        with open(_journal_path(session.id), "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+            if _should_fsync():
+                fh.flush()
+                os.fsync(fh.fileno())
+        session._persisted = count
+        session._meta_lines += 1
+
+    def _path(self, session_id: str) -> Path:
+        path = _journal_path(session_id)
+        if not path.exists():
+            path = _legacy_path(session_id)
         if not path.exists():
             raise FileNotFoundError(f"Session not found: {session_id}")
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return Session.from_dict(data)
+        return path
+
+    def load(self, session_id: str, tail: Optional[int] = None) -> Session:
+        """Load a session; with ``tail`` only its last ``tail`` messages are read."""
+        path = self._path(session_id)
+        if path.suffix == ".json":
+            session = Session.from_dict(read_session_file(path)[0])
+            if tail is not None:
+                total = len(session.messages)
+                session.messages = session.messages[max(0, total - tail):]
+                session._offset = total - len(session.messages)
+            return session
+        if tail is None:
+            data, meta_lines, clean = read_session_file(path)
+            messages = data["messages"]
+            total = len(messages)
+        else:
+            data, messages, total, meta_lines, clean = scan_journal(path, tail=tail)
+        session = Session.from_dict({**data, "messages": messages})
+        session._offset = total - len(messages)
+        session._persisted = total
+        session._meta_lines = meta_lines
+        session._journaled = clean
+        return session
+
+    def load_messages(self, session_id: str, start: int, end: int) -> List[dict]:
+        path = self._path(session_id)
+        if path.suffix == ".json":
+            return read_session_file(path)[0].get("messages", [])[start:end]
+        return scan_journal(path, start=start, end=end)[1]
+
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+        sessions = sorted(
+            SessionIndex().entries().values(),
+            key=lambda s: s.get("updated_at", ""),
+            reverse=True,
+        )
+        end = None if limit is None else offset + limit
+        return sessions[offset:end]
+
+    def delete(self, session_id: str) -> None:
+        index = SessionIndex()
+        before = index.dir_mtime()
+        for path in (_journal_path(session_id), _legacy_path(session_id)):
+            if path.exists():
+                path.unlink()
+        delete_blobs(session_id)
+        index.remove(session_id, before)
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        """Case-insensitive substring search over every journal (a full scan;
+        the SQLite store answers this from its FTS index)."""
+        terms = [t.lower() for t in query.split() if t]
+        if not terms:
+            return []
+        hits = []
+        for entry in self.list_sessions():
+            try:
+                session = self.load(entry["id"])
+            except (FileNotFoundError, ValueError, OSError):
+                continue
+            for seq, msg in enumerate(session.messages):
+                text = str(msg.get("content", ""))
+                lower = text.lower()
+                score = sum(lower.count(t) for t in terms)
+                if not score or not all(t in lower for t in terms):
+                    continue
+                hits.append({
+                    "session_id": session.id,
+                    "title": session.title,
+                    "role": msg.get("role", ""),
+                    "seq": seq,
+                    "snippet": _snippet(text, lower.find(terms[0]), len(terms[0])),
+                    "score": float(score),
+                })
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:limit]
+
+
+def _snippet(text: str, pos: int, length: int, width: int = 40) -> str:
+    start = max(0, pos - width)
+    end = min(len(text), pos + length + width)
+    body = text[start:pos] + "[" + text[pos:pos + length] + "]" + text[pos + length:end]
+    body = " ".join(body.split())
+    return ("…" if start else "") + body + ("…" if end < len(text) else "")
+
+
+_DEFAULT_STORE = None
+
+
+def default_store():
+    global _DEFAULT_STORE
+    if _DEFAULT_STORE is None:
+        _DEFAULT_STORE = JournalStore()
+    return _DEFAULT_STORE
+
+
+def open_store(backend: str = "jsonl", config_dir: Optional[Path] = None):
+    """Session store for ``backend`` ("jsonl" or "sqlite")."""
+    if backend == "sqlite":
+        from sonika.cli.session_db import get_sqlite_store
+
+        base = config_dir or SESSIONS_DIR.parent
+        return get_sqlite_store(Path(base) / "sessions.sqlite")
+    if backend != "jsonl":
+        raise ValueError(f"Backend de sesiones desconocido: {backend}")
+    return default_store()
+
+
+class SessionManager:
+    """Sessions in ``store``. With a ``writer`` (:class:`sonika.persist.BackgroundWriter`)
+    :meth:`save` queues the write instead of blocking; reads flush it first."""
+
+    def __init__(self, store=None, writer=None):
+        self.store = store or default_store()
+        self.writer = writer
+
+    def save(self, session: Session) -> None:
+        if self.writer is None:
+            session.save()
+        else:
+            self.writer.submit(("session", session.id), session.save)
+
+    def flush(self) -> None:
+        if self.writer is not None:
+            self.writer.flush()
+
+    def list_sessions(self, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        """Session summaries, most recently updated first (no messages are read)."""
+        self.flush()
+        return self.store.list_sessions(limit=limit, offset=offset)
+
+    def load(self, session_id: str, tail: Optional[int] = None) -> Session:
+        """Load a session; ``tail`` keeps only its last messages in memory
+        (older ones are read on demand through :meth:`Session.page`)."""
+        self.flush()
+        session = self.store.load(session_id, tail=tail)
+        session.store = self.store
+        return session
 
     def new_session(self, provider: str, model: str) -> Session:
         session = Session(provider=provider, model=model)
-        session.save()
+        session.store = self.store
+        self.save(session)
         return session
 
     def delete(self, session_id: str):
-        path = SESSIONS_DIR / f"{session_id}.json"
-        if path.exists():
-            path.unlink()
+        self.flush()
+        self.store.delete(session_id)
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        """Ranked message hits: session_id, title, role, seq, snippet, score."""
+        self.flush()
+        return self.store.search(query, limit=limit)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Callable
@@ -34,6 +35,68 @@ class SonikaAppConfig:
     default_provider: str = "google"
     default_model: str = "gemini-2.5-flash"
     risk_level: int = 2
+    debug: bool = field(default_factory=lambda: bool(os.environ.get("SONIKA_DEBUG")))
+
+    # Model routing per orchestrator role (planner, evaluator, retry, reporter):
+    # a model id of the active provider or "auto" (cheapest adequate model).
+    # Agent roles default to the active model; "reporter" (summaries and other
+    # side jobs) defaults to "auto".
+    model_routing: dict[str, str] = field(default_factory=dict)
+    escalate_on_failure: bool = True
+
+    # Local response cache (~/.sonika/llm_cache.sqlite), opt-in
+    llm_cache: bool = field(default_factory=lambda: bool(os.environ.get("SONIKA_LLM_CACHE")))
+    llm_cache_ttl: int = 24 * 3600  # seconds
+    llm_cache_max_mb: int = 64
+
+    # Hedged requests: when the active provider's first token is late, race
+    # another configured provider (capped at hedge_max hedges per minute)
+    hedging: bool = False
+    hedge_max: int = 20
+
+    # Client-side RPM/TPM limits shared by every Sonika process on the host
+    # (~/.sonika/ratelimit.json). Defaults come from the model catalog;
+    # override per model as {"google/gemini-2.5-pro": {"rpm": 5, "tpm": 250000}}
+    rate_limit: bool = True
+    rate_limits: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    # Context window: when the next call would fill more than context_compact_at
+    # of the model's window, older turns are summarized; the last
+    # context_keep_turns turns and pinned facts stay verbatim
+    auto_compact: bool = True
+    context_compact_at: float = 0.8
+    context_keep_turns: int = 4
+
+    # Model "auto" (first entry of /model): the configured model with the best
+    # observed latency (~/.sonika/perf.json) whose window and price fit. The
+    # pick is re-evaluated when a session starts, at most every
+    # auto_model_interval_s seconds. Price cap in USD per 1M input + output
+    # tokens; 0 = no cap
+    auto_model_max_price: float = 0.0
+    auto_model_interval_s: int = 600
+
+    # Models /compare runs when none are given ("provider/model" entries);
+    # empty = the active model plus other configured catalog models
+    compare_models: list[str] = field(default_factory=list)
+
+    # Session storage: "jsonl" (journals in ~/.sonika/sessions/) or "sqlite"
+    # (~/.sonika/sessions.sqlite with full-text /search; imports the journals once)
+    session_backend: str = field(
+        default_factory=lambda: os.environ.get("SONIKA_SESSION_BACKEND", "jsonl")
+    )
+
+    # Streamed output is drawn at most render_fps times per second, one
+    # terminal write per frame; 0 draws every chunk as it arrives
+    render_fps: int = 30
+
+    # Reasoning longer than this many characters is written to the session's
+    # blob store (~/.sonika/sessions/blobs/<id>/) instead of kept in memory;
+    # 0 = no cap
+    thinking_spill_chars: int = 0
+
+    # Exchanges (user message + answer) rendered when a session is opened;
+    # /history shows the previous ones a page at a time
+    history_exchanges: int = 10
 
     # Paths
     config_dir: Path = field(default_factory=lambda: Path.home() / ".sonika")
@@ -0,0 +1,235 @@
+"""Context-window accounting and history compaction.
+
+:class:`ContextAccount` tracks how full the model's context is for a session:
+exact numbers come from the provider's ``usage_metadata`` (the last call's
+prompt + completion is what the next call starts from); when a provider does
+not report usage, :func:`estimate_tokens` gives an offline estimate.
+
+When the projected size of the next call crosses a threshold of the model's
+window (``ModelInfo.context_k``), :func:`compact_thread` rewrites the
+orchestrator's thread: older turns and their tool outputs become one summary
+(written by the fast model, or extracted locally if that fails) while the
+most recent turns and the session's pinned facts stay verbatim.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+# Letters, short digit groups, single symbols, newline runs. A BPE vocabulary
+# keeps common words whole and splits long ones, roughly every 5 characters.
+_PIECE = re.compile(r"[^\W\d_]+|\d{1,3}|\n+|[^\w\s]|_")
+_MESSAGE_OVERHEAD = 4
+
+SUMMARY_TAG = "[Resumen de la conversacion anterior]"
+
+_SUMMARY_PROMPT = (
+    "Resume la siguiente conversacion entre un usuario y un asistente con "
+    "herramientas. Conserva decisiones, rutas de archivos, comandos, valores y "
+    "resultados concretos; omite saludos y razonamientos. Responde solo con el "
+    "resumen en viñetas, en el idioma de la conversacion."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Offline token estimate for ``text`` (no tokenizer files needed)."""
+    if not text:
+        return 0
+    n = 0
+    for m in _PIECE.finditer(text):
+        piece = m.group()
+        if piece[0].isalpha():
+            n += max(1, (len(piece) + 3) // 5)
+        else:
+            n += 1
+    return n
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, str):
+                parts.append(part)
+            elif isinstance(part, dict):
+                parts.append(str(part.get("text") or part.get("thinking") or part.get("content") or ""))
+        return "".join(parts)
+    return str(content)
+
+
+def message_tokens(messages: Iterable[Any]) -> int:
+    """Estimated prompt size of LangChain messages, tool calls included."""
+    total = 0
+    for m in messages:
+        total += _MESSAGE_OVERHEAD + estimate_tokens(_content_text(getattr(m, "content", "")))
+        for tc in getattr(m, "tool_calls", None) or []:
+            total += estimate_tokens(f"{tc.get('name', '')} {tc.get('args', '')}")
+    return total
+
+
+@dataclass
+class ContextAccount:
+    """Context fill for one session; ``window`` is 0 when unknown."""
+
+    window: int = 0
+    used: int = 0
+    measured: bool = False
+    compactions: int = 0
+    saved: int = 0
+
+    def observe_usage(self, usage: Optional[dict]) -> bool:
+        """Take the size of the last call from provider usage; False if absent."""
+        if not usage or not usage.get("input_tokens"):
+            return False
+        self.used = int(usage.get("input_tokens", 0)) + int(usage.get("output_tokens", 0))
+        self.measured = True
+        return True
+
+    def observe_estimate(self, messages: Iterable[Any]) -> None:
+        self.used = message_tokens(messages)
+        self.measured = False
+
+    @property
+    def fill(self) -> Optional[float]:
+        return self.used / self.window if self.window else None
+
+    def projected(self, next_text: str = "") -> int:
+        return self.used + estimate_tokens(next_text) + _MESSAGE_OVERHEAD
+
+    def needs_compaction(self, next_text: str, threshold: float) -> bool:
+        return bool(self.window) and self.projected(next_text) >= threshold * self.window
+
+    def record_compaction(self, saved: int) -> None:
+        self.compactions += 1
+        self.saved += saved
+        self.used = max(0, self.used - saved)
+
+
+# ── Compaction ────────────────────────────────────────────────────────────────
+
+def split_turns(messages: list[Any]) -> list[list[Any]]:
+    """Group messages into turns, each starting at a user message."""
+    turns: list[list[Any]] = []
+    for m in messages:
+        if getattr(m, "type", "") == "human" or not turns:
+            turns.append([m])
+        else:
+            turns[-1].append(m)
+    return turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def extractive_summary(messages: list[Any], tool_output_chars: int = 200) -> str:
+    """Local summary: each user request, the tools used and the answer's start."""
+    lines = []
+    for turn in split_turns(messages):
+        for m in turn:
+            kind = getattr(m, "type", "")
+            text = _content_text(getattr(m, "content", ""))
+            if kind == "human":
+                if text.startswith(SUMMARY_TAG):
+                    lines.append(text[len(SUMMARY_TAG):].strip())
+                else:
+                    lines.append(f"- Usuario: {_clip(text, 300)}")
+            elif kind == "tool":
+                lines.append(f"  - {getattr(m, 'name', None) or 'tool'}: {_clip(text, tool_output_chars)}")
+            elif kind == "ai" and text.strip():
+                lines.append(f"  Asistente: {_clip(text, 300)}")
+    return "\n".join(lines)
+
+
+async def _model_summary(model: Any, messages: list[Any]) -> str:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    transcript = extractive_summary(messages, tool_output_chars=1000)
+    response = await model.ainvoke(
+        [SystemMessage(content=_SUMMARY_PROMPT), HumanMessage(content=transcript)]
+    )
+    return _content_text(response.content).strip()
+
+
+def summary_messages(summary: str, pinned: Iterable[str] = ()) -> list[Any]:
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    body = SUMMARY_TAG + "\n" + summary
+    facts = [f for f in pinned if f]
+    if facts:
+        body += "\n\nHechos fijados:\n" + "\n".join(f"- {f}" for f in facts)
+    return [
+        HumanMessage(content=body),
+        AIMessage(content="Entendido, continuo con ese contexto."),
+    ]
+
+
+async def compact_history(
+    messages: list[Any],
+    keep_turns: int = 4,
+    pinned: Iterable[str] = (),
+    summarize: Optional[Callable[[list[Any]], Awaitable[str]]] = None,
+) -> tuple[list[Any], int]:
+    """Fold all but the last ``keep_turns`` turns into a summary.
+
+    Returns the new message list and the estimated tokens saved (0 and the
+    original list when there is nothing worth compacting).
+    """
+    turns = split_turns(messages)
+    if len(turns) <= keep_turns:
+        return messages, 0
+    old = [m for turn in turns[:-keep_turns] for m in turn]
+    recent = [m for turn in turns[-keep_turns:] for m in turn]
+
+    summary = ""
+    if summarize is not None:
+        try:
+            summary = await summarize(old)
+        except Exception:
+            summary = ""
+    if not summary:
+        summary = extractive_summary(old)
+
+    compacted = summary_messages(summary, pinned) + recent
+    saved = message_tokens(messages) - message_tokens(compacted)
+    if saved <= 0:
+        return messages, 0
+    return compacted, saved
+
+
+async def compact_thread(
+    bot: Any,
+    thread_id: str,
+    keep_turns: int = 4,
+    pinned: Iterable[str] = (),
+    summary_model: Any = None,
+) -> int:
+    """Compact an orchestrator thread in place; returns estimated tokens saved."""
+    from langgraph.graph.message import REMOVE_ALL_MESSAGES
+    from langchain_core.messages import RemoveMessage
+
+    config = {"configurable": {"thread_id": thread_id}}
+    state = await bot.graph.aget_state(config)
+    if state.next:
+        # Mid-run (e.g. waiting for an approval): leave the thread alone
+        return 0
+    messages = list((state.values or {}).get("messages", []))
+
+    summarize = None
+    if summary_model is not None:
+        async def summarize(old: list[Any]) -> str:
+            return await _model_summary(summary_model, old)
+
+    compacted, saved = await compact_history(messages, keep_turns, pinned, summarize)
+    if saved:
+        await bot.graph.aupdate_state(
+            config,
+            {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES)] + compacted},
+            as_node="agent",
+        )
+    return saved
@@ -1,15 +1,20 @@
+import hashlib
+import json
 import os
 import sys
+import threading
+from collections import OrderedDict
 from typing import Optional, TYPE_CHECKING, Callable
-from dotenv import set_key
 
 if TYPE_CHECKING:
     from sonika_ai_toolkit.agents.orchestrator.graph import OrchestratorBot
     from sonika_ai_toolkit.agents.orchestrator.prompts import OrchestratorPrompts
     from sonika_ai_toolkit.utilities.types import ILanguageModel
+    from sonika.config_schema import SonikaAppConfig
+    from sonika.llm_cache import LLMCache
+    from sonika.rate_limit import RateLimiter
 
 from .bot import ExecutorBot
-from .interfaces.console.ui import console, ask_secret, ask_confirm
 
 def load_prompts(prompts_dir: Optional[str] = None) -> "OrchestratorPrompts":
     from sonika_ai_toolkit.agents.orchestrator.prompts import OrchestratorPrompts
@@ -38,19 +43,62 @@ def load_prompts(prompts_dir: Optional[str] = None) -> "OrchestratorPrompts":
                 loaded[key] = f.read()
     return OrchestratorPrompts(**loaded)
 
-def get_model(provider: str, model_name: str) -> "ILanguageModel":
+def api_key_env(provider: str) -> str:
+    """Environment variable holding ``provider``'s API key."""
+    if provider in ("gemini", "google"):
+        return "GOOGLE_API_KEY"
+    return f"{provider.upper()}_API_KEY"
+
+
+def get_model(
+    provider: str,
+    model_name: str,
+    cache: Optional["LLMCache"] = None,
+    limiter: Optional["RateLimiter"] = None,
+    rate_limits: Optional[dict] = None,
+) -> "ILanguageModel":
+    """Build the provider's model.
+
+    With ``limiter``, calls wait for the model's RPM/TPM budget (catalog limits,
+    overridden by ``rate_limits``); with ``cache``, exact repeats are served
+    locally without touching that budget.
+    """
+    model = _provider_model(provider, model_name)
+    if limiter is not None:
+        from sonika.rate_limit import RateLimitedChatModel, limits_for
+
+        rpm, tpm = limits_for(provider, model_name, rate_limits)
+        if rpm or tpm:
+            model.model = RateLimitedChatModel(
+                inner=model.model, limiter=limiter, key=f"{provider}/{model_name}", rpm=rpm, tpm=tpm
+            )
+    if cache is not None:
+        from sonika.llm_cache import CachedChatModel
+
+        model.model = CachedChatModel(
+            inner=model.model, store=cache, model_key=f"{provider}/{model_name}"
+        )
+    return model
+
+
+def _provider_model(provider: str, model_name: str) -> "ILanguageModel":
+    if provider == "mock":
+        from sonika.mock_provider import MockLanguageModel
+        # No model name: SONIKA_MOCK_SCRIPT or the echo script
+        return MockLanguageModel(model_name or None)
+
     from sonika_ai_toolkit.utilities.models import (
         OpenAILanguageModel,
         DeepSeekLanguageModel,
         GeminiLanguageModel,
     )
-    env_key = f"{provider.upper()}_API_KEY"
-    if provider in ("gemini", "google"):
-        env_key = "GOOGLE_API_KEY"
-
+    env_key = api_key_env(provider)
     api_key = os.getenv(env_key)
 
     if not api_key:
+        from dotenv import set_key
+        from .interfaces.console.ui import console, ask_secret, ask_confirm
+
         if not sys.stdin.isatty():
             console.print(f"[bold red]❌ {env_key} no encontrada en el entorno.[/bold red]")
             sys.exit(1)
@@ -83,6 +131,100 @@ def get_model(provider: str, model_name: str) -> "ILanguageModel":
         raise ValueError(f"Proveedor desconocido: {provider}")
 
 
+# ── Orchestrator cache ────────────────────────────────────────────────────────
+#
+# Building an orchestrator re-imports and instantiates every tool group, reads
+# all prompt files, creates the model client and compiles the graph. The
+# compiled bot is session-independent (state is keyed by thread_id), so it is
+# cached per configuration and only the memory path is swapped per session.
+# Lookup, build and rebind happen under one lock: the CLI's warm-up thread and
+# the main thread may ask for the same key at once.
+
+_CACHE_MAX = 4
+_ORCHESTRATOR_CACHE: "OrderedDict[tuple, OrchestratorBot]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+_PROMPT_FILES = (
+    "core.txt", "manager.txt", "planner.txt", "evaluator.txt",
+    "retry.txt", "reporter.txt", "save_memory.txt",
+)
+
+
+def _prompts_hash(prompts_dir: Optional[str]) -> str:
+    """Cheap fingerprint of the prompt files (name + mtime + size, no reads)."""
+    if prompts_dir is None:
+        pkg_prompts = os.path.join(os.path.dirname(__file__), "prompts")
+        root_prompts = os.path.join(os.path.dirname(__file__), "..", "prompts")
+        prompts_dir = pkg_prompts if os.path.isdir(pkg_prompts) else root_prompts
+    h = hashlib.sha1(os.path.abspath(prompts_dir).encode("utf-8"))
+    for filename in _PROMPT_FILES:
+        try:
+            st = os.stat(os.path.join(prompts_dir, filename))
+        except OSError:
+            continue
+        h.update(f"{filename}:{st.st_mtime_ns}:{st.st_size}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _api_key_fingerprint(provider: str) -> str:
+    return hashlib.sha256((os.getenv(api_key_env(provider)) or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_key(
+    provider: str,
+    model_name: str,
+    risk_level: int,
+    prompts_dir: Optional[str],
+    config: "SonikaAppConfig",
+    hedge_providers: tuple = (),
+) -> tuple:
+    return (
+        provider,
+        model_name,
+        tuple(config.tool_groups),
+        _prompts_hash(config.prompts_dir or prompts_dir),
+        risk_level,
+        hashlib.sha1(config.system_instructions.encode("utf-8")).hexdigest(),
+        tuple(sorted(config.extra_tool_groups)),
+        tuple(id(t) for t in config.extra_tools),
+        tuple(sorted(config.model_routing.items())),
+        config.escalate_on_failure,
+        (config.llm_cache, config.llm_cache_ttl, config.llm_cache_max_mb),
+        _api_key_fingerprint(provider),
+        tuple((p, _api_key_fingerprint(p)) for p in hedge_providers),
+        config.hedge_max,
+        (config.rate_limit, json.dumps(config.rate_limits, sort_keys=True)),
+    )
+
+
+def _bind_session(bot: "OrchestratorBot", session_path: str) -> None:
+    """Point a (cached) orchestrator at another session.
+
+    Besides the memory directory, everything the toolkit derives from it or
+    keeps per session is reset: ``skills_dir``, a pending resume or abort and
+    the in-memory checkpointer of the previous session's threads.
+    """
+    manager = getattr(bot, "memory_manager", None)
+    if manager is None or getattr(manager, "memory_path", None) == session_path:
+        return
+    bot.memory_manager = type(manager)(session_path)
+    if hasattr(bot, "skills_dir"):
+        # Same derivation as OrchestratorBot.__init__
+        bot.skills_dir = bot.memory_manager.sessions_dir.replace("sessions", "skills")
+    bot._last_resume_command = None
+    bot._abort_requested = False
+    from langgraph.checkpoint.memory import MemorySaver
+
+    graph = getattr(bot, "graph", None)
+    if isinstance(getattr(bot, "checkpointer", None), MemorySaver) and graph is not None:
+        bot.checkpointer = graph.checkpointer = MemorySaver()
+
+
+def clear_orchestrator_cache() -> None:
+    with _CACHE_LOCK:
+        _ORCHESTRATOR_CACHE.clear()
+
+
 def create_orchestrator(
     provider: str,
     model_name: str,
@@ -90,14 +232,105 @@ def create_orchestrator(
     session_id: str,
     prompts_dir: Optional[str] = None,
     config: Optional["SonikaAppConfig"] = None,
+    use_cache: bool = False,
+    hedge_providers: Optional[list[str]] = None,
 ) -> "OrchestratorBot":
-    from sonika_ai_toolkit.agents.orchestrator.graph import OrchestratorBot
+    """Build the orchestrator for a session.
+
+    With ``config.hedging``, ``hedge_providers`` (other providers whose API
+    keys are in the environment) are raced when ``provider`` is slow.
+    """
     from sonika.config_schema import SonikaAppConfig
 
     if config is None:
         config = SonikaAppConfig()
+    hedge = tuple(
+        p for p in (hedge_providers or [])
+        if config.hedging and p != provider and (p == "mock" or os.getenv(api_key_env(p)))
+    )
+
+    memory_base = str(config.config_dir / "memory")
+    session_path = os.path.join(memory_base, session_id)
+    os.makedirs(session_path, exist_ok=True)
+
+    if not use_cache:
+        return _build_orchestrator(
+            provider, model_name, risk_level, session_path, prompts_dir, config, hedge_providers=hedge
+        )
+
+    key = _cache_key(provider, model_name, risk_level, prompts_dir, config, hedge)
+    with _CACHE_LOCK:
+        bot = _ORCHESTRATOR_CACHE.get(key)
+        if bot is None:
+            bot = _build_orchestrator(
+                provider, model_name, risk_level, session_path, prompts_dir, config,
+                hedge_providers=hedge,
+            )
+            _ORCHESTRATOR_CACHE[key] = bot
+            while len(_ORCHESTRATOR_CACHE) > _CACHE_MAX:
+                _ORCHESTRATOR_CACHE.popitem(last=False)
+        else:
+            _ORCHESTRATOR_CACHE.move_to_end(key)
+            _bind_session(bot, session_path)
+    return bot
+
 
-    model = get_model(provider, model_name)
+def _build_orchestrator(
+    provider: str,
+    model_name: str,
+    risk_level: int,
+    session_path: str,
+    prompts_dir: Optional[str],
+    config: "SonikaAppConfig",
+    hedge_providers: tuple = (),
+) -> "OrchestratorBot":
+    from sonika_ai_toolkit.agents.orchestrator.graph import OrchestratorBot
+    from sonika.routing import RoleRouter, resolve_routing
+
+    cache = None
+    if config.llm_cache:
+        from sonika.llm_cache import get_llm_cache
+
+        cache = get_llm_cache(
+            config.config_dir / "llm_cache.sqlite",
+            ttl_seconds=config.llm_cache_ttl,
+            max_bytes=config.llm_cache_max_mb * 1024 * 1024,
+        )
+
+    limiter = None
+    if config.rate_limit:
+        from sonika.rate_limit import get_rate_limiter
+
+        limiter = get_rate_limiter(config.config_dir / "ratelimit.json")
+    limits = {"limiter": limiter, "rate_limits": config.rate_limits}
+
+    routing = resolve_routing(provider, model_name, config.model_routing)
+    models = {}
+    for mid in dict.fromkeys(routing.values()):
+        models[mid] = get_model(provider, mid, cache=cache, **limits)
+
+    tracker = None
+    if hedge_providers:
+        from sonika.cli.models_catalog import models_for_provider
+        from sonika.hedging import HedgedChatModel, get_tracker
+
+        tracker = get_tracker()
+        tracker.max_hedges = config.hedge_max
+        secondaries = {}
+        secondary_models = {}
+        for p in hedge_providers:
+            catalog = models_for_provider(p)
+            secondary_models[p] = catalog[0].model_id if catalog else ""
+            secondary = get_model(p, secondary_models[p], cache=cache, **limits)
+            secondaries[p] = (secondary.model, {})
+        for lm in models.values():
+            lm.model = HedgedChatModel(
+                primary=lm.model,
+                primary_provider=provider,
+                secondaries=secondaries,
+                secondary_models=secondary_models,
+                tracker=tracker,
+            )
 
     # Register extra tool groups from config
     from sonika.tools import TOOL_GROUPS, register_tool_group
@@ -111,18 +344,28 @@ def create_orchestrator(
     # Append any extra standalone tools
     tools = raw_tools + list(config.extra_tools)
 
-    memory_base = str(config.config_dir / "memory")
-    session_path = os.path.join(memory_base, session_id)
-    os.makedirs(session_path, exist_ok=True)
-
     prompts = load_prompts(config.prompts_dir or prompts_dir)
 
-    return OrchestratorBot(
-        strong_model=model,
-        fast_model=model,
+    bot = OrchestratorBot(
+        strong_model=models[routing["planner"]],
+        fast_model=models[routing["reporter"]],
         instructions=config.system_instructions,
         tools=tools,
         risk_threshold=risk_level,
         memory_path=session_path,
         prompts=prompts
     )
+
+    # The agent node calls model_with_tools for every step; route each call
+    # by role and keep per-role latency/cost (see sonika.routing).
+    if hasattr(bot, "model_with_tools"):
+        bot.role_router = RoleRouter(
+            provider, routing, models, tools, escalate=config.escalate_on_failure
+        )
+        bot.model_with_tools = bot.role_router
+    # Cheap model for side jobs such as context summaries
+    bot.fast_model = models[routing["reporter"]]
+    bot.llm_cache = cache
+    bot.latency_tracker = tracker
+    bot.rate_limiter = limiter
+    return bot
@@ -0,0 +1,341 @@
+"""Hedged requests across providers.
+
+:class:`HedgedChatModel` streams from the primary provider. If no first token
+arrives within a threshold derived from the primary's recent first-token
+latencies (:class:`LatencyTracker`), the same request is fired at the fastest
+secondary provider; whichever streams first wins and the other is cancelled.
+A primary that fails before its first token fails over the same way. Hedges
+are capped per rolling window (``max_hedges`` per ``hedge_window_s``) so a
+provider outage cannot double every request.
+Output served by a secondary carries ``sonika_provider`` and ``sonika_model``
+in its ``response_metadata``, so usage is priced with the model that answered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+
+class LatencyTracker:
+    """Rolling first-token latencies per provider, plus hedge counters.
+
+    ``requests``, ``hedges`` and ``hedge_wins`` are lifetime totals for
+    ``/stats``; the cap only counts the hedges of the last ``hedge_window_s``.
+    """
+
+    def __init__(
+        self,
+        window: int = 50,
+        percentile: float = 0.95,
+        default_ms: float = 4000.0,
+        min_ms: float = 250.0,
+        max_ms: float = 30000.0,
+        min_samples: int = 5,
+        max_hedges: int = 20,
+        hedge_window_s: float = 60.0,
+    ) -> None:
+        self.window = window
+        self.percentile = percentile
+        self.default_ms = default_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.hedge_window_s = hedge_window_s
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._samples: dict[str, deque] = {}
+        self._recent_hedges: deque = deque()  # monotonic times within the window
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(provider, deque(maxlen=self.window)).append(ms)
+
+    def samples(self, provider: str) -> list[float]:
+        with self._lock:
+            return list(self._samples.get(provider, ()))
+
+    def quantile(self, provider: str, q: float) -> Optional[float]:
+        samples = sorted(self.samples(provider))
+        if not samples:
+            return None
+        return samples[max(0, math.ceil(q * len(samples)) - 1)]
+
+    def threshold_ms(self, provider: str) -> float:
+        """How long to wait for the first token before hedging."""
+        if len(self.samples(provider)) < self.min_samples:
+            return self.default_ms
+        value = self.quantile(provider, self.percentile) or self.default_ms
+        return min(self.max_ms, max(self.min_ms, value))
+
+    def fastest(self, providers: list[str]) -> Optional[str]:
+        """Provider with the lowest median; unknown providers keep list order."""
+        if not providers:
+            return None
+
+        def _median(p: str) -> float:
+            m = self.quantile(p, 0.5)
+            return m if m is not None else math.inf
+
+        return min(providers, key=_median)
+
+    def note_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def note_hedge_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def _expire(self, now: float) -> None:
+        while self._recent_hedges and now - self._recent_hedges[0] >= self.hedge_window_s:
+            self._recent_hedges.popleft()
+
+    def can_hedge(self) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._recent_hedges) < self.max_hedges
+
+    def try_hedge(self) -> bool:
+        """Count a hedge if the window has room; False when capped."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if len(self._recent_hedges) >= self.max_hedges:
+                return False
+            self._recent_hedges.append(now)
+            self.hedges += 1
+            return True
+
+    def stats_lines(self) -> list[str]:
+        with self._lock:
+            self._expire(time.monotonic())
+            recent = len(self._recent_hedges)
+        lines = [
+            f"hedging    {self.hedges} disparados ({recent}/{self.max_hedges} en "
+            f"{self.hedge_window_s:.0f}s), {self.hedge_wins} ganados por el secundario, "
+            f"{self.requests} solicitudes"
+        ]
+        for provider in sorted(self._samples):
+            p50 = self.quantile(provider, 0.5) or 0.0
+            p95 = self.quantile(provider, 0.95) or 0.0
+            lines.append(
+                f"{provider:<10} primer token p50 {p50:.0f}ms  p95 {p95:.0f}ms  "
+                f"umbral {self.threshold_ms(provider):.0f}ms"
+            )
+        return lines
+
+
+_TRACKER: Optional[LatencyTracker] = None
+
+
+def get_tracker() -> LatencyTracker:
+    global _TRACKER
+    if _TRACKER is None:
+        _TRACKER = LatencyTracker()
+    return _TRACKER
+
+
+def _unbind(bound: Any, fallback: Any) -> tuple[Any, dict]:
+    """Split a RunnableBinding from bind_tools into (model, call kwargs)."""
+    return getattr(bound, "bound", fallback), dict(getattr(bound, "kwargs", {}))
+
+
+def _since(started: dict[str, float], provider: str) -> float:
+    """Milliseconds since ``provider``'s request was sent."""
+    return (time.monotonic() - started[provider]) * 1000
+
+
+def _served_by(message: Any, provider: str, model_id: str) -> None:
+    """Stamp a secondary's output with the provider and model that produced it."""
+    message.response_metadata = {
+        **(message.response_metadata or {}),
+        "sonika_provider": provider,
+        "sonika_model": model_id,
+    }
+
+
+async def _aclose(it: Any) -> None:
+    try:
+        await it.aclose()
+    except Exception:
+        pass
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that races a secondary provider when the primary is slow."""
+
+    primary: Any
+    primary_provider: str
+    # provider -> (chat model, call kwargs)
+    secondaries: dict = {}
+    # provider -> model id of its secondary, for usage attribution
+    secondary_models: dict = {}
+    primary_kwargs: dict = {}
+    tracker: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"hedged-{getattr(self.primary, '_llm_type', 'chat')}"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "HedgedChatModel":
+        primary, primary_kwargs = _unbind(self.primary.bind_tools(tools, **kwargs), self.primary)
+        secondaries = {}
+        for provider, (model, _) in self.secondaries.items():
+            try:
+                secondaries[provider] = _unbind(model.bind_tools(tools, **kwargs), model)
+            except Exception:
+                continue
+        return self.model_copy(
+            update={
+                "primary": primary,
+                "primary_kwargs": primary_kwargs,
+                "secondaries": secondaries,
+            }
+        )
+
+    def _tracker(self) -> LatencyTracker:
+        return self.tracker or get_tracker()
+
+    def _pick_secondary(self) -> Optional[str]:
+        tracker = self._tracker()
+        if not self.secondaries or not tracker.try_hedge():
+            return None
+        return tracker.fastest(list(self.secondaries))
+
+    # ── Streaming ─────────────────────────────────────────────────────────────
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        tracker = self._tracker()
+        tracker.note_request()
+
+        def _open(model: Any, call_kwargs: dict) -> Any:
+            return model._astream(messages, stop=stop, **{**call_kwargs, **kwargs})
+
+        # Each provider's latency counts from its own request, not the primary's
+        started = {self.primary_provider: time.monotonic()}
+        streams = {self.primary_provider: _open(self.primary, self.primary_kwargs)}
+        tasks = {
+            self.primary_provider: asyncio.ensure_future(anext(streams[self.primary_provider]))
+        }
+        threshold = tracker.threshold_ms(self.primary_provider) / 1000
+        done, _ = await asyncio.wait(tasks.values(), timeout=threshold)
+
+        primary_exc = tasks[self.primary_provider].exception() if done else None
+        primary_failed = primary_exc is not None and not isinstance(primary_exc, StopAsyncIteration)
+        secondary = None
+        if not done or primary_failed:
+            secondary = self._pick_secondary()
+            if secondary is not None:
+                model, call_kwargs = self.secondaries[secondary]
+                started[secondary] = time.monotonic()
+                streams[secondary] = _open(model, call_kwargs)
+                tasks[secondary] = asyncio.ensure_future(anext(streams[secondary]))
+
+        winner, first = None, None
+        pending = dict(tasks)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending.values(), return_when=asyncio.FIRST_COMPLETED)
+                for provider, task in list(pending.items()):
+                    if task not in done:
+                        continue
+                    del pending[provider]
+                    exc = task.exception()
+                    tracker.record(provider, _since(started, provider))
+                    if exc is None or isinstance(exc, StopAsyncIteration):
+                        winner = provider
+                        first = task.result() if exc is None else None
+                        break
+                    error = error or exc
+                if winner is not None:
+                    break
+        finally:
+            for provider, task in pending.items():
+                task.cancel()
+                # The loser is at least this slow; keep it in its distribution
+                tracker.record(provider, _since(started, provider))
+            if pending:
+                await asyncio.gather(*pending.values(), return_exceptions=True)
+            for provider, stream in streams.items():
+                if provider != winner:
+                    await _aclose(stream)
+
+        if winner is None:
+            raise error or RuntimeError("no provider produced a response")
+        if winner == self.primary_provider:
+            if first is None:
+                return
+            yield first
+            async for chunk in streams[winner]:
+                yield chunk
+            return
+
+        tracker.note_hedge_win()
+        if first is None:
+            return
+        model_id = self.secondary_models.get(winner, "")
+        _served_by(first.message, winner, model_id)
+        yield first
+        async for chunk in streams[winner]:
+            _served_by(chunk.message, winner, model_id)
+            yield chunk
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tracker = self._tracker()
+        tracker.note_request()
+        started = {self.primary_provider: time.monotonic()}
+        primary = asyncio.ensure_future(
+            self.primary._agenerate(messages, stop=stop, **{**self.primary_kwargs, **kwargs})
+        )
+        done, _ = await asyncio.wait({primary}, timeout=tracker.threshold_ms(self.primary_provider) / 1000)
+        if done and primary.exception() is None:
+            tracker.record(self.primary_provider, _since(started, self.primary_provider))
+            return primary.result()
+        secondary = self._pick_secondary()
+        if secondary is None:
+            result = await primary
+            tracker.record(self.primary_provider, _since(started, self.primary_provider))
+            return result
+        model, call_kwargs = self.secondaries[secondary]
+        started[secondary] = time.monotonic()
+        backup = asyncio.ensure_future(
+            model._agenerate(messages, stop=stop, **{**call_kwargs, **kwargs})
+        )
+        racers = {primary: self.primary_provider, backup: secondary}
+        error: Optional[BaseException] = None
+        while racers:
+            done, _ = await asyncio.wait(racers, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = racers.pop(task)
+                tracker.record(provider, _since(started, provider))
+                if task.exception() is None:
+                    for other in racers:
+                        other.cancel()
+                    result = task.result()
+                    if provider != self.primary_provider:
+                        tracker.note_hedge_win()
+                        for gen in result.generations:
+                            _served_by(gen.message, provider, self.secondary_models.get(provider, ""))
+                    return result
+                error = error or task.exception()
+        raise error or RuntimeError("no provider produced a response")
+
+    # ── Sync: no hedging ──────────────────────────────────────────────────────
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self.primary._generate(messages, stop=stop, **{**self.primary_kwargs, **kwargs})
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        yield from self.primary._stream(messages, stop=stop, **{**self.primary_kwargs, **kwargs})
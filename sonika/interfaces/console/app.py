@@ -3,22 +3,14 @@ import sys
 import asyncio
 from typing import Optional, Dict, Any
 
-from prompt_toolkit import PromptSession
-from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.formatted_text import HTML
+# prompt_toolkit, langchain and the Rich UI are imported on first use to keep
+# `import sonika.interfaces.console.app` cheap.
 
-from langchain_core.messages import AIMessageChunk
-
-from .ui import (
-    console,
-    ConsoleInterface,
-    print_welcome,
-    print_result,
-    print_model_info,
-)
 
 class ConsoleApp:
     def __init__(self):
+        from .ui import ConsoleInterface
+
         self.provider = "gemini"
         self.model_name = "gemini-2.0-flash"
         self.session = "default"
@@ -36,6 +28,7 @@ class ConsoleApp:
 
     def start_bot(self, provider: str, model_name: str, risk: int, session: str, prompts: Optional[str] = None):
         from sonika.factory import create_orchestrator
+        from .ui import console
         
         self.provider = provider
         self.model_name = model_name
@@ -52,6 +45,10 @@ class ConsoleApp:
             prompts,
         )
         
+        limiter = getattr(self.bot, "rate_limiter", None)
+        if limiter is not None:
+            limiter.on_wait = self.ui.on_queued
+
         # Pre-warm connection asíncrono
         try:
             loop = asyncio.get_event_loop()
@@ -63,81 +60,41 @@ class ConsoleApp:
             # Fallback for cli contexts
             pass
 
-    async def _process_stream(self, stream_gen):
+    async def _process_stream(self, stream_gen, norm=None):
         """Consume el generador de astream_events y actualiza la UI."""
+        from sonika.stream_events import (
+            FinalReport, Interrupt, Retry, StreamNormalizer, Thinking, Token, ToolEnd, ToolStart,
+        )
+
+        norm = norm or StreamNormalizer()
         interrupt_data = None
         final_content = None
-        last_text_buffer = ""
+        text_parts: list[str] = []
 
         try:
             async for stream_mode, payload in stream_gen:
-                if stream_mode == "messages":
-                    chunk, metadata = payload
-                    if isinstance(chunk, AIMessageChunk):
-                        # Extract thinking and accumulate plain text as fallback
-                        if isinstance(chunk.content, list):
-                            for part in chunk.content:
-                                if isinstance(part, dict):
-                                    if part.get("type") == "thinking":
-                                        self.ui.on_thought(part.get("thinking", ""))
-                                    else:
-                                        last_text_buffer += str(part.get("text", "") or part.get("content", ""))
-                        elif isinstance(chunk.content, str):
-                            last_text_buffer += chunk.content
-
-                elif stream_mode == "updates":
-                    # Mapeo de eventos
-                    for node_name, update in payload.items():
-                        if node_name == "tools":
-                            tools_executed = update.get("tools_executed", [])
-                            for t in tools_executed:
-                                if t.get("status") == "success":
-                                    self.ui.on_tool_end(t.get("tool_name"), t.get("output"))
-                                elif t.get("status") == "error":
-                                    self.ui.on_error(t.get("tool_name"), t.get("output"))
-
-                        elif node_name == "agent":
-                            # Dispatch retry status events before anything else
-                            for ev in update.get("status_events", []):
-                                if ev.get("type") == "retrying":
-                                    self.ui.on_retry(ev["attempt"], ev["wait_s"])
-
-                            msgs = update.get("messages", [])
-                            last_msg = msgs[-1] if msgs else None
-
-                            # Detect tool calls first so we never capture a stale
-                            # final_report when the agent is still mid-execution.
-                            has_tool_calls = bool(last_msg and getattr(last_msg, "tool_calls", None))
-
-                            if has_tool_calls:
-                                for tcall in last_msg.tool_calls:
-                                    self.ui.on_tool_start(tcall.get("name", "unknown"), tcall.get("args", {}))
-                                # Reset buffer — agent is still working
-                                last_text_buffer = ""
-                            else:
-                                # Only accept final_report when no tools are being called.
-                                if update.get("final_report"):
-                                    final_content = update.get("final_report")
-                                elif last_msg and hasattr(last_msg, "content"):
-                                    c = last_msg.content
-                                    if isinstance(c, list):
-                                        parts = []
-                                        for p in c:
-                                            if isinstance(p, str):
-                                                parts.append(p)
-                                            elif isinstance(p, dict) and p.get("type") != "thinking":
-                                                parts.append(str(p.get("text", "") or p.get("content", "")))
-                                        c = "\n".join(parts)
-                                    if c:
-                                        final_content = c
-
-
-                # Detectar interrupción usando el método de LangGraph state o catching payload
-                if stream_mode == "updates" and '__interrupt__' in payload:
-                    # LangGraph >= 0.2 __interrupt__ channel
-                    interrupts = payload['__interrupt__']
-                    if interrupts:
-                        interrupt_data = interrupts[0].value
+                for ev in norm.feed(stream_mode, payload):
+                    kind = type(ev)
+                    if kind is Token:
+                        text_parts.append(ev.text)
+                    elif kind is Thinking:
+                        self.ui.on_thought(ev.text)
+                    elif kind is ToolStart:
+                        self.ui.on_tool_start(ev.name, ev.args)
+                        # Agent is still working: drop text and any stale report
+                        text_parts = []
+                        final_content = None
+                    elif kind is ToolEnd:
+                        if ev.status == "success":
+                            self.ui.on_tool_end(ev.name, ev.output)
+                        elif ev.status == "error":
+                            self.ui.on_error(ev.name, ev.output)
+                    elif kind is Retry:
+                        self.ui.on_retry(ev.attempt, ev.wait_s)
+                    elif kind is FinalReport:
+                        final_content = ev.text
+                    elif kind is Interrupt:
+                        interrupt_data = ev.value
 
         except Exception as e:
             # We don't crash stream errors aggressively in terminal
@@ -145,8 +102,9 @@ class ConsoleApp:
 
         # Fallback: use accumulated messages-stream text when updates stream
         # didn't produce a final_report (e.g. simple conversational turns).
-        if final_content is None and last_text_buffer.strip():
-            final_content = last_text_buffer.strip()
+        text = "".join(text_parts).strip()
+        if final_content is None and text:
+            final_content = text
 
         return final_content, interrupt_data
 
@@ -155,11 +113,15 @@ class ConsoleApp:
         self.ui.start_turn()
         
         async def run_async():
+            from sonika.stream_events import StreamNormalizer
+
             final_content = None
-            
+            # One normalizer per turn: tool calls are matched across resumes
+            norm = StreamNormalizer()
+
             # Start initial generation stream
             stream_gen = self.bot.astream_events(user_msg, mode=self.mode, thread_id=self.session)
-            content, interrupt_data = await self._process_stream(stream_gen)
+            content, interrupt_data = await self._process_stream(stream_gen, norm)
             
             if content:
                 final_content = content
@@ -178,7 +140,7 @@ class ConsoleApp:
                     
                     # Consume resume stream
                     resume_gen = self.bot.astream_events(None, mode=self.mode, thread_id=self.session)
-                    content, _ = await self._process_stream(resume_gen)
+                    content, _ = await self._process_stream(resume_gen, norm)
                     if content:
                         final_content = content
                 else:
@@ -195,6 +157,11 @@ class ConsoleApp:
         return content, duration
 
     def run_interactive_loop(self):
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.key_binding import KeyBindings
+        from prompt_toolkit.formatted_text import HTML
+        from .ui import console, print_welcome, print_result, print_model_info
+
         print_welcome(f"{self.provider}:{self.model_name}")
         
         session = PromptSession()
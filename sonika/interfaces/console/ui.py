@@ -1,17 +1,17 @@
 import time
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from rich.console import Console, Group
 from rich.panel import Panel
-from rich.markdown import Markdown
 from rich.text import Text
-from rich.live import Live
-from rich.spinner import Spinner
-from rich.prompt import Confirm
-from rich.syntax import Syntax
-from rich.box import MINIMAL
 
 from sonika_ai_toolkit.interfaces.base import BaseInterface
 
+if TYPE_CHECKING:
+    from rich.live import Live
+
+# Markdown (markdown-it), Live, Spinner, Syntax (pygments) and Confirm are
+# imported where they are used.
+
 console = Console()
 
 class ExecutionDisplay:
@@ -40,6 +40,8 @@ def print_welcome(model_info: str):
     ))
 
 def print_result(content: str):
+    from rich.markdown import Markdown
+
     if content:
         console.print("\n[bold cyan]sonika ❯[/bold cyan]")
         console.print(Markdown(content))
@@ -48,6 +50,8 @@ def print_model_info(provider: str, model: str):
     console.print(f"[bold]Current model:[/bold] {provider}:{model}")
 
 def ask_confirm(prompt: str = "Continue?") -> bool:
+    from rich.prompt import Confirm
+
     return Confirm.ask(f"[bold yellow]{prompt}[/bold yellow]")
 
 def ask_secret(prompt: str) -> str:
@@ -68,10 +72,12 @@ class ConsoleInterface(BaseInterface):
         self.current_thought_chunk = ""
         self._is_thinking = False
         self.active_tool = None
-        self.live: Optional[Live] = None
+        self.live: Optional["Live"] = None
 
     def start_turn(self):
         """Inicia el layout dinámico de un nuevo turno."""
+        from rich.live import Live
+
         self.turn_start_time = time.time()
         self.events = []
         self.current_thought_chunk = ""
@@ -104,6 +110,10 @@ class ConsoleInterface(BaseInterface):
 
     def render_layout(self, final=False):
         """Genera el árbol de componentes a renderizar en este frame."""
+        from rich.box import MINIMAL
+        from rich.markdown import Markdown
+        from rich.spinner import Spinner
+
         elapsed = time.time() - self.turn_start_time
         elements = []
         
@@ -192,6 +202,9 @@ class ConsoleInterface(BaseInterface):
         """
         Pausa el layout en vivo para pedir confirmación interactiva.
         """
+        from rich.prompt import Confirm
+        from rich.syntax import Syntax
+
         # Temporalmente detenemos la animación para mostrar el prompt de confirmación limpio
         if self.live:
             self.live.stop()
@@ -222,3 +235,6 @@ class ConsoleInterface(BaseInterface):
 
     def on_retry(self, attempt: int, wait_s: float, reason: str = "rate_limit") -> None:
         console.print(f"[dim]↻ Rate limit — reintentando ({attempt}º intento, espera {wait_s}s)[/dim]")
+
+    def on_queued(self, key: str, wait_s: float) -> None:
+        console.print(f"[dim]⏳ Limite de {key} — en cola, espera estimada {wait_s:.1f}s[/dim]")
@@ -0,0 +1,352 @@
+"""Opt-in local LLM response cache (SQLite, exact match).
+
+``get_model(..., cache=LLMCache(...))`` wraps the provider's chat model in a
+:class:`CachedChatModel`. Entries are keyed on the model, the normalized
+messages and a hash of the bound tool schemas; hits replay as streamed chunks
+so callers (and LangGraph's ``messages`` stream) see the same events as a live
+call. Calls without a system prompt — connection pre-warm pings, ad-hoc
+probes — bypass the cache. The async paths run the SQLite lookups in a worker
+thread so they never block the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+CACHE_FILE = Path.home() / ".sonika" / "llm_cache.sqlite"
+
+_PIECE = re.compile(r"\s*\S+\s*|\s+")
+
+
+# ── Keys ──────────────────────────────────────────────────────────────────────
+
+def normalize_messages(messages: list[BaseMessage]) -> list:
+    """Provider-independent view of a conversation.
+
+    Content is kept exactly, except trailing whitespace: indentation matters
+    in code and YAML. Thinking blocks are dropped (they differ between runs)
+    and tool call ids are ignored (they are random per call).
+    """
+    out = []
+    for m in messages:
+        content = m.content
+        if isinstance(content, list):
+            parts = []
+            for p in content:
+                if isinstance(p, str):
+                    parts.append(p)
+                elif isinstance(p, dict) and p.get("type") not in ("thinking", "reasoning"):
+                    parts.append(str(p.get("text", "") or p.get("content", "")))
+            content = "".join(parts)
+        entry: list = [m.type, str(content).rstrip()]
+        tool_calls = getattr(m, "tool_calls", None)
+        if tool_calls:
+            entry.append([[tc.get("name"), tc.get("args")] for tc in tool_calls])
+        out.append(entry)
+    return out
+
+
+def tool_schema_hash(tools: list | None) -> str:
+    if not tools:
+        return ""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    schemas = []
+    for tool in tools:
+        try:
+            schemas.append(convert_to_openai_tool(tool))
+        except Exception:
+            schemas.append(repr(tool))
+    blob = json.dumps(schemas, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(model_key: str, tool_hash: str, messages: list[BaseMessage], params: dict) -> str:
+    blob = json.dumps(
+        [model_key, tool_hash, params, normalize_messages(messages)],
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class LLMCache:
+    """SQLite store with TTL and total-size (LRU by last hit) eviction."""
+
+    def __init__(
+        self,
+        path: Path | str = CACHE_FILE,
+        ttl_seconds: float = 24 * 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, payload TEXT,"
+            " size INTEGER, created REAL, last_hit REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_hit ON responses(last_hit)")
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_hit = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, payload: dict) -> None:
+        blob = json.dumps(payload, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, blob, len(blob), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_hit ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_CACHES: dict[str, LLMCache] = {}
+
+
+def get_llm_cache(
+    path: Path | str = CACHE_FILE,
+    ttl_seconds: float = 24 * 3600,
+    max_bytes: int = 64 * 1024 * 1024,
+) -> LLMCache:
+    """Process-wide cache instance per file (hit counters are shared)."""
+    key = str(Path(path).resolve())
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = _CACHES[key] = LLMCache(path, ttl_seconds, max_bytes)
+    else:
+        cache.ttl_seconds = ttl_seconds
+        cache.max_bytes = max_bytes
+    return cache
+
+
+# ── Payloads ──────────────────────────────────────────────────────────────────
+
+def _to_payload(message: BaseMessage) -> Optional[dict]:
+    """Serializable form of a complete response, or None if not cacheable."""
+    if getattr(message, "invalid_tool_calls", None):
+        return None
+    tool_calls = [
+        {"name": tc["name"], "args": tc.get("args", {})}
+        for tc in getattr(message, "tool_calls", None) or []
+    ]
+    content = message.content
+    if not tool_calls and not (content.strip() if isinstance(content, str) else content):
+        return None
+    return {"content": content, "tool_calls": tool_calls}
+
+
+def _new_call_id() -> str:
+    # Replayed tool calls get fresh ids so a thread never holds duplicates
+    return f"call_{uuid.uuid4().hex[:24]}"
+
+
+def _replay_chunks(payload: dict) -> Iterator[ChatGenerationChunk]:
+    content = payload.get("content", "")
+    if isinstance(content, str):
+        for piece in _PIECE.findall(content):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+    else:
+        for part in content:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=[part]))
+    tool_calls = payload.get("tool_calls") or []
+    if tool_calls:
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": tc["name"],
+                        "args": json.dumps(tc.get("args", {}), ensure_ascii=False),
+                        "id": _new_call_id(),
+                        "index": i,
+                    }
+                    for i, tc in enumerate(tool_calls)
+                ],
+            )
+        )
+    yield ChatGenerationChunk(
+        message=AIMessageChunk(content="", response_metadata={"sonika_cache": "hit"})
+    )
+
+
+def _replay_message(payload: dict) -> AIMessage:
+    return AIMessage(
+        content=payload.get("content", ""),
+        tool_calls=[
+            {"name": tc["name"], "args": tc.get("args", {}), "id": _new_call_id()}
+            for tc in payload.get("tool_calls") or []
+        ],
+        response_metadata={"sonika_cache": "hit"},
+    )
+
+
+# ── Chat model wrapper ────────────────────────────────────────────────────────
+
+class CachedChatModel(BaseChatModel):
+    """Chat model that serves exact repeats from an :class:`LLMCache`."""
+
+    inner: Any
+    store: Any
+    model_key: str
+    tool_hash: str = ""
+    call_kwargs: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cached-{getattr(self.inner, '_llm_type', 'chat')}"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "CachedChatModel":
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.model_copy(
+            update={
+                "inner": getattr(bound, "bound", self.inner),
+                "call_kwargs": {**self.call_kwargs, **dict(getattr(bound, "kwargs", {}))},
+                "tool_hash": tool_schema_hash(tools),
+            }
+        )
+
+    def _key(self, messages: list[BaseMessage], stop: Optional[list[str]], kwargs: dict) -> Optional[str]:
+        if not any(m.type == "system" for m in messages):
+            return None
+        params = {k: v for k, v in {**self.call_kwargs, **kwargs}.items() if k != "tools"}
+        if stop:
+            params["stop"] = stop
+        return cache_key(self.model_key, self.tool_hash, messages, params)
+
+    async def _aget(self, key: Optional[str]) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, key) if key else None
+
+    async def _astore(self, key: Optional[str], message: Optional[BaseMessage]) -> None:
+        if key is not None and message is not None:
+            await asyncio.to_thread(self._store, key, message)
+
+    def _store(self, key: Optional[str], message: Optional[BaseMessage]) -> None:
+        if key is None or message is None:
+            return
+        payload = _to_payload(message)
+        if payload is not None:
+            self.store.put(key, self.model_key, payload)
+
+    # Sync
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        payload = self.store.get(key) if key else None
+        if payload is not None:
+            return ChatResult(generations=[ChatGeneration(message=_replay_message(payload))])
+        result = self.inner._generate(messages, stop=stop, **{**self.call_kwargs, **kwargs})
+        if result.generations:
+            self._store(key, result.generations[0].message)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        payload = self.store.get(key) if key else None
+        if payload is not None:
+            yield from _replay_chunks(payload)
+            return
+        acc = None
+        for chunk in self.inner._stream(messages, stop=stop, **{**self.call_kwargs, **kwargs}):
+            acc = chunk.message if acc is None else acc + chunk.message
+            yield chunk
+        self._store(key, acc)
+
+    # Async
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        payload = await self._aget(key)
+        if payload is not None:
+            return ChatResult(generations=[ChatGeneration(message=_replay_message(payload))])
+        result = await self.inner._agenerate(messages, stop=stop, **{**self.call_kwargs, **kwargs})
+        if result.generations:
+            await self._astore(key, result.generations[0].message)
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        payload = await self._aget(key)
+        if payload is not None:
+            for chunk in _replay_chunks(payload):
+                yield chunk
+            return
+        acc = None
+        async for chunk in self.inner._astream(messages, stop=stop, **{**self.call_kwargs, **kwargs}):
+            acc = chunk.message if acc is None else acc + chunk.message
+            yield chunk
+        await self._astore(key, acc)
@@ -0,0 +1,235 @@
+"""Deterministic offline ``mock`` provider.
+
+``get_model("mock", "<script.yaml|script.json>")`` returns a model that replays
+scripted responses instead of calling an API, so the real orchestrator, tools
+and renderers can be exercised (and profiled) with no network or keys. Without
+a script path (or ``SONIKA_MOCK_SCRIPT``) the model echoes the last user
+message.
+
+Script format::
+
+    delay_ms: 10            # default inter-token delay
+    first_token_ms: 0       # default latency before the first chunk
+    loop: false             # start over when the responses run out
+    responses:
+      - match: "log"        # optional regex on the last user message
+        rate_limit: 2       # fail with a 429 this many times first
+        thinking: "Voy a leer el log"   # also reported as reasoning tokens
+        cached_tokens: 100    # prompt tokens reported as prompt-cache hits
+        text: "Listo."      # split into word tokens, or give `tokens: [...]`
+        delay_ms: 5
+        first_token_ms: 800
+        tool_calls:
+          - name: read_file
+            args: {path: /var/log/syslog}
+
+Responses are consumed in order; a response with ``match`` is only used when
+the pattern matches, otherwise the next one without ``match`` is taken. Calls
+without a system prompt (connection pre-warm pings) get the echo reply and do
+not advance the script.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+from sonika_ai_toolkit.utilities.types import ILanguageModel
+
+_TOKEN = re.compile(r"\s*\S+\s*|\s+")
+
+
+class MockRateLimitError(Exception):
+    """Raised for scripted 429s (matched by the orchestrator's retry policy)."""
+
+
+def load_script(source: str | Path | dict | list | None) -> dict:
+    """Load a script from a path, a dict/list, or (``source=None``)
+    ``SONIKA_MOCK_SCRIPT``. A path that does not exist is an error, not an
+    echo script: a misspelled path must not make tests pass on echo output."""
+    if source is None:
+        source = os.environ.get("SONIKA_MOCK_SCRIPT") or None
+    if source is None:
+        return {"responses": [], "loop": False}
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if not path.is_file():
+            raise FileNotFoundError(f"Guion mock no encontrado: {path}")
+        text = path.read_text(encoding="utf-8")
+        if path.suffix in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as exc:
+                raise ImportError("Los scripts YAML requieren PyYAML (pip install pyyaml)") from exc
+            source = yaml.safe_load(text)
+        else:
+            source = json.loads(text)
+    if isinstance(source, list):
+        source = {"responses": source}
+    if not isinstance(source, dict) or not isinstance(source.get("responses", []), list):
+        raise ValueError("El script mock debe ser una lista o un objeto con 'responses'")
+    return source
+
+
+def _last_user_text(messages: list[BaseMessage]) -> str:
+    for m in reversed(messages):
+        if isinstance(m, HumanMessage):
+            return m.content if isinstance(m.content, str) else str(m.content)
+    return ""
+
+
+def _estimate_tokens(messages: list[BaseMessage]) -> int:
+    return max(1, sum(len(str(m.content)) for m in messages) // 4)
+
+
+class MockChatModel(BaseChatModel):
+    """Chat model that replays a script; tools are accepted and ignored."""
+
+    script: dict = {}
+    cursor: int = 0
+    calls: int = 0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _rate_limits: dict = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "sonika-mock"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "MockChatModel":
+        # Share the cursor with the unbound model: the script is one timeline
+        return self
+
+    # ── Script cursor ─────────────────────────────────────────────────────────
+
+    def _next_response(self, messages: list[BaseMessage]) -> dict:
+        """Pick the next scripted response (raising scripted 429s first)."""
+        responses = self.script.get("responses", [])
+        user_text = _last_user_text(messages)
+        with self._lock:
+            self.calls += 1
+            if not any(m.type == "system" for m in messages):
+                return {"text": f"mock: {user_text}"}
+            if self.cursor >= len(responses) and self.script.get("loop") and responses:
+                self.cursor = 0
+            index = None
+            for i in range(self.cursor, len(responses)):
+                pattern = responses[i].get("match")
+                if pattern is None or re.search(pattern, user_text):
+                    index = i
+                    break
+            if index is None:
+                return {"text": f"mock: {user_text}"}
+            response = responses[index]
+            failures = self._rate_limits.get(index, 0)
+            if failures < int(response.get("rate_limit", 0)):
+                self._rate_limits[index] = failures + 1
+                raise MockRateLimitError("429 Resource exhausted (mock rate limit)")
+            self.cursor = index + 1
+            return response
+
+    def _chunks(self, response: dict, messages: list[BaseMessage]) -> list[AIMessageChunk]:
+        thinking = response.get("thinking") or ""
+        tokens = response.get("tokens")
+        if tokens is None:
+            tokens = _TOKEN.findall(response.get("text", ""))
+        chunks: list[AIMessageChunk] = []
+        if thinking:
+            for piece in _TOKEN.findall(thinking):
+                chunks.append(AIMessageChunk(content=[{"type": "thinking", "thinking": piece}]))
+        for tok in tokens:
+            content: Any = [{"type": "text", "text": tok}] if thinking else tok
+            chunks.append(AIMessageChunk(content=content))
+        tool_calls = response.get("tool_calls") or []
+        if tool_calls:
+            chunks.append(
+                AIMessageChunk(
+                    content=[] if thinking else "",
+                    tool_call_chunks=[
+                        {
+                            "name": tc["name"],
+                            "args": json.dumps(tc.get("args", {}), ensure_ascii=False),
+                            "id": tc.get("id") or f"mock_call_{self.calls}_{i}",
+                            "index": i,
+                        }
+                        for i, tc in enumerate(tool_calls)
+                    ],
+                )
+            )
+        out_tokens = max(1, (len(thinking) + sum(len(t) for t in tokens)) // 4)
+        in_tokens = _estimate_tokens(messages)
+        usage: dict = {
+            "input_tokens": in_tokens,
+            "output_tokens": out_tokens,
+            "total_tokens": in_tokens + out_tokens,
+        }
+        if thinking:
+            usage["output_token_details"] = {"reasoning": max(1, len(thinking) // 4)}
+        if response.get("cached_tokens"):
+            usage["input_token_details"] = {
+                "cache_read": min(in_tokens, int(response["cached_tokens"]))
+            }
+        chunks.append(AIMessageChunk(content=[] if thinking else "", usage_metadata=usage))
+        return chunks
+
+    def _delay(self, response: dict) -> float:
+        return float(response.get("delay_ms", self.script.get("delay_ms", 0))) / 1000
+
+    def _first_token_delay(self, response: dict) -> float:
+        return float(response.get("first_token_ms", self.script.get("first_token_ms", 0))) / 1000
+
+    # ── BaseChatModel ─────────────────────────────────────────────────────────
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        response = self._next_response(messages)
+        time.sleep(self._first_token_delay(response))
+        message = None
+        for chunk in self._chunks(response, messages):
+            message = chunk if message is None else message + chunk
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        response = self._next_response(messages)
+        await asyncio.sleep(self._first_token_delay(response))
+        message = None
+        for chunk in self._chunks(response, messages):
+            message = chunk if message is None else message + chunk
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        response = self._next_response(messages)
+        delay = self._delay(response)
+        time.sleep(self._first_token_delay(response))
+        for i, chunk in enumerate(self._chunks(response, messages)):
+            if delay and i:
+                time.sleep(delay)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        response = self._next_response(messages)
+        delay = self._delay(response)
+        await asyncio.sleep(self._first_token_delay(response))
+        for i, chunk in enumerate(self._chunks(response, messages)):
+            if delay and i:
+                await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=chunk)
+
+
+class MockLanguageModel(ILanguageModel):
+    """ILanguageModel wrapper, mirroring the toolkit's provider classes."""
+
+    def __init__(self, script: str | Path | dict | list | None = None):
+        self.model = MockChatModel(script=load_script(script))
+
+    def predict(self, prompt: str) -> str:
+        return str(self.model.invoke([HumanMessage(content=prompt)]).content)
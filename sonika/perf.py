@@ -0,0 +1,193 @@
+"""Observed model performance: first-token latency, throughput and errors.
+
+The catalog (:mod:`sonika.cli.models_catalog`) knows prices and context
+windows; :class:`PerfStore` adds how each (provider, model) has actually
+behaved for this user. Every turn records its time to first token, output
+tokens per second and whether it failed. The last ``WINDOW`` samples per model
+live in ``~/.sonika/perf.json``, which all Sonika processes share: saves merge
+into the file under a lock.
+
+:func:`pick_auto` resolves the ``auto`` model choice: the configured model
+with the lowest expected answer time whose context window and price fit.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sonika.filelock import atomic_write_text, locked
+
+STATE_FILE = Path.home() / ".sonika" / "perf.json"
+WINDOW = 50
+AUTO = "auto"
+
+# Answer length used to weigh first-token latency against throughput
+_TYPICAL_OUTPUT_TOKENS = 400
+# Models failing more often than this are not picked by ``auto``
+_MAX_ERROR_RATE = 0.3
+
+
+@dataclass
+class ModelPerf:
+    samples: int
+    ttft_ms: Optional[float]  # median time to first token
+    tokens_per_s: Optional[float]  # median output throughput
+    error_rate: float
+
+    def expected_ms(self, output_tokens: int = _TYPICAL_OUTPUT_TOKENS) -> float:
+        """Expected time for a typical answer; inf when nothing succeeded yet."""
+        if self.ttft_ms is None:
+            return math.inf
+        if not self.tokens_per_s:
+            return self.ttft_ms
+        return self.ttft_ms + output_tokens / self.tokens_per_s * 1000
+
+
+def _key(provider: str, model: str) -> str:
+    return f"{provider}/{model}"
+
+
+class PerfStore:
+    """Rolling per-model samples, persisted in a lock-protected JSON file."""
+
+    def __init__(self, path: Path | str = STATE_FILE, window: int = WINDOW) -> None:
+        self.path = Path(path)
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Optional[dict[str, list[dict]]] = None
+        self._pending: dict[str, list[dict]] = {}
+
+    def _read(self) -> dict[str, list[dict]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _view(self) -> dict[str, list[dict]]:
+        if self._samples is None:
+            self._samples = self._read()
+        return self._samples
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        ttft_ms: Optional[float],
+        output_tokens: int,
+        seconds: float,
+        ok: bool,
+        now: Optional[float] = None,
+    ) -> None:
+        """Add one turn's sample; ``seconds`` is the time spent streaming after
+        the first token. Call :meth:`save` to persist it."""
+        tps = output_tokens / seconds if ok and output_tokens > 1 and seconds > 0.05 else None
+        sample = {
+            "t": round(time.time() if now is None else now),
+            "ttft": None if ttft_ms is None else round(ttft_ms, 1),
+            "tps": None if tps is None else round(tps, 2),
+            "ok": ok,
+        }
+        key = _key(provider, model)
+        with self._lock:
+            samples = self._view().setdefault(key, [])
+            samples.append(sample)
+            del samples[: -self.window]
+            self._pending.setdefault(key, []).append(sample)
+
+    def save(self) -> None:
+        """Merge pending samples into the shared file."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with locked(self.path):
+            data = self._read()
+            for key, samples in pending.items():
+                merged = data.setdefault(key, []) + samples
+                data[key] = merged[-self.window:]
+            atomic_write_text(self.path, json.dumps(data))
+        with self._lock:
+            # Keep samples recorded while the file was being written
+            for key, samples in self._pending.items():
+                data[key] = (data.get(key, []) + samples)[-self.window:]
+            self._samples = data
+
+    def stats(self, provider: str, model: str) -> Optional[ModelPerf]:
+        with self._lock:
+            samples = list(self._view().get(_key(provider, model), ()))
+        if not samples:
+            return None
+        ttfts = [s["ttft"] for s in samples if s.get("ok") and s.get("ttft") is not None]
+        tps = [s["tps"] for s in samples if s.get("ok") and s.get("tps")]
+        return ModelPerf(
+            samples=len(samples),
+            ttft_ms=statistics.median(ttfts) if ttfts else None,
+            tokens_per_s=statistics.median(tps) if tps else None,
+            error_rate=sum(1 for s in samples if not s.get("ok")) / len(samples),
+        )
+
+    def all_stats(self) -> dict[tuple[str, str], ModelPerf]:
+        with self._lock:
+            keys = list(self._view())
+        out = {}
+        for key in keys:
+            provider, _, model = key.partition("/")
+            perf = self.stats(provider, model)
+            if perf is not None:
+                out[(provider, model)] = perf
+        return out
+
+
+_STORES: dict[str, PerfStore] = {}
+
+
+def get_perf_store(path: Path | str = STATE_FILE) -> PerfStore:
+    """Process-wide store per state file."""
+    key = str(Path(path).resolve())
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = PerfStore(path)
+    return store
+
+
+def pick_auto(
+    store: PerfStore,
+    models: Iterable,
+    providers: list[str],
+    min_context: int = 0,
+    max_price: float = 0.0,
+):
+    """The fastest adequate catalog model, or None if none is adequate.
+
+    Adequate: its provider is configured, its window holds ``min_context``
+    tokens, its input + output price per 1M tokens is at most ``max_price``
+    (0 = no cap), and it does not fail too often. Models never observed rank
+    after observed ones; with no observations at all the cheapest adequate
+    model is returned.
+    """
+    candidates = []
+    for m in models:
+        if m.provider not in providers or m.context_k < min_context:
+            continue
+        if max_price and m.input_per_1m + m.output_per_1m > max_price:
+            continue
+        if "-exp" in m.model_id:
+            continue
+        perf = store.stats(m.provider, m.model_id)
+        if perf is not None and perf.error_rate > _MAX_ERROR_RATE:
+            continue
+        candidates.append((perf.expected_ms() if perf else math.inf, m))
+    if not candidates:
+        return None
+    best_ms, best = min(candidates, key=lambda c: c[0])
+    if best_ms == math.inf:
+        return min((m for _, m in candidates), key=lambda m: m.input_per_1m + m.output_per_1m)
+    return best
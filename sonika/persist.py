@@ -0,0 +1,114 @@
+"""Background persistence worker.
+
+Saving a session or the config is disk I/O that does not need to finish
+before the next prompt appears. :class:`BackgroundWriter` runs those writes
+on one daemon thread. Pending writes are keyed by the object they persist
+(``("session", id)``, ``("config", path)``): a write submitted while an older
+one for the same key is still queued replaces it, so a burst of saves costs
+one write of the latest state.
+
+Callers that need the data on disk (loading a session, listing, exiting)
+call :meth:`BackgroundWriter.flush`; the process-wide writer is also flushed
+at interpreter exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWriter:
+    """Coalescing write queue drained by a single daemon thread."""
+
+    def __init__(self) -> None:
+        self._pending: "OrderedDict[Hashable, Callable[[], None]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.written = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.last_error: Optional[str] = None
+        self._latencies_ms: deque = deque(maxlen=256)
+
+    @property
+    def depth(self) -> int:
+        """Writes queued or in progress."""
+        return len(self._pending) + int(self._busy)
+
+    def submit(self, key: Hashable, write: Callable[[], None]) -> None:
+        """Queue ``write``; it supersedes a queued write with the same key."""
+        with self._cond:
+            self.submitted += 1
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = write
+            self.max_depth = max(self.max_depth, self.depth)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="sonika-writer", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                _, write = self._pending.popitem(last=False)
+                self._busy = True
+            t0 = time.perf_counter()
+            try:
+                write()
+            except Exception as exc:
+                with self._cond:
+                    self.errors += 1
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.warning("background write failed: %s", exc)
+            finally:
+                with self._cond:
+                    self._latencies_ms.append((time.perf_counter() - t0) * 1000)
+                    self.written += 1
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write is on disk; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stats_lines(self) -> list[str]:
+        lat = list(self._latencies_ms)
+        line = (
+            f"escrituras {self.written} ({self.coalesced} agrupadas), "
+            f"cola {self.depth} (max {self.max_depth})"
+        )
+        if lat:
+            line += f", p50 {statistics.median(lat):.2f}ms max {max(lat):.2f}ms"
+        lines = [line]
+        if self.errors:
+            lines.append(f"{self.errors} escrituras fallidas, ultima: {self.last_error}")
+        return lines
+
+
+_WRITER: Optional[BackgroundWriter] = None
+
+
+def get_writer() -> BackgroundWriter:
+    """Process-wide writer, flushed at interpreter exit."""
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = BackgroundWriter()
+        atexit.register(_WRITER.flush)
+    return _WRITER
@@ -0,0 +1,229 @@
+"""Client-side token-bucket rate limiting shared across Sonika processes.
+
+Each (provider, model) gets two buckets: requests per minute and tokens per
+minute, with limits from :mod:`sonika.cli.models_catalog` (overridable through
+``SonikaAppConfig.rate_limits``). Bucket state lives in a small JSON file
+(``~/.sonika/ratelimit.json``) guarded by an ``flock`` so every Sonika process
+on the host draws from the same budget.
+
+A call *reserves* its share up front: the buckets may go negative, and the
+caller sleeps until the debt is refilled. Concurrent callers therefore queue
+in arrival order with a known wait instead of all hitting the provider, all
+getting 429s and all backing off at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from sonika.filelock import atomic_write_text, locked
+
+STATE_FILE = Path.home() / ".sonika" / "ratelimit.json"
+
+# Buckets untouched for this long are full again and dropped from the file
+_IDLE_S = 3600
+
+
+def limits_for(
+    provider: str, model_id: str, overrides: Optional[dict] = None
+) -> tuple[int, int]:
+    """(rpm, tpm) for a model; 0 means unlimited."""
+    from sonika.cli.models_catalog import get_model
+
+    info = get_model(provider, model_id)
+    rpm, tpm = (info.rpm, info.tpm) if info else (0, 0)
+    override = (overrides or {}).get(f"{provider}/{model_id}") or {}
+    return int(override.get("rpm", rpm)), int(override.get("tpm", tpm))
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    """Rough prompt size for the up-front TPM reservation (corrected later)."""
+    from sonika.context import message_tokens
+
+    return max(1, message_tokens(messages))
+
+
+class RateLimiter:
+    """Token buckets persisted in a lock-protected file."""
+
+    def __init__(self, path: Path | str = STATE_FILE) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.on_wait: Optional[Callable[[str, float], None]] = None
+        self.requests = 0
+        self.waits = 0
+        self.waited_s = 0.0
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[dict]:
+        with locked(self.path):
+            try:
+                state = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                state = {}
+            yield state
+            atomic_write_text(self.path, json.dumps(state))
+
+    @staticmethod
+    def _refill(bucket: dict, rpm: int, tpm: int, now: float) -> None:
+        elapsed = max(0.0, now - bucket["ts"])
+        bucket["req"] = min(rpm, bucket["req"] + elapsed * rpm / 60)
+        bucket["tok"] = min(tpm, bucket["tok"] + elapsed * tpm / 60)
+        bucket["ts"] = now
+
+    def reserve(
+        self, key: str, rpm: int, tpm: int, tokens: int, now: Optional[float] = None
+    ) -> float:
+        """Debit one request and ``tokens``; return seconds to wait before sending."""
+        if not rpm and not tpm:
+            return 0.0
+        now = time.time() if now is None else now
+        with self._locked() as state:
+            for k in [k for k, b in state.items() if now - b.get("ts", 0) > _IDLE_S]:
+                del state[k]
+            bucket = state.setdefault(key, {"req": rpm, "tok": tpm, "ts": now})
+            self._refill(bucket, rpm, tpm, now)
+            wait = 0.0
+            if rpm:
+                if bucket["req"] < 1:
+                    wait = (1 - bucket["req"]) * 60 / rpm
+                bucket["req"] -= 1
+            if tpm:
+                # A prompt larger than the whole bucket can never fit; cap it
+                tokens = min(tokens, tpm)
+                if bucket["tok"] < tokens:
+                    wait = max(wait, (tokens - bucket["tok"]) * 60 / tpm)
+                bucket["tok"] -= tokens
+        self.requests += 1
+        return wait
+
+    def adjust(self, key: str, tpm: int, delta: int) -> None:
+        """Correct a reservation by ``delta`` tokens once real usage is known."""
+        if not tpm or not delta:
+            return
+        with self._locked() as state:
+            bucket = state.get(key)
+            if bucket is not None:
+                bucket["tok"] = min(tpm, bucket["tok"] - delta)
+
+    async def acquire(self, key: str, rpm: int, tpm: int, tokens: int) -> float:
+        # reserve() waits on the shared file lock; another process may hold it
+        wait = await asyncio.to_thread(self.reserve, key, rpm, tpm, tokens)
+        if wait > 0:
+            self.waits += 1
+            self.waited_s += wait
+            if self.on_wait is not None:
+                self.on_wait(key, wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    def wait_blocking(self, key: str, rpm: int, tpm: int, tokens: int) -> float:
+        wait = self.reserve(key, rpm, tpm, tokens)
+        if wait > 0:
+            self.waits += 1
+            self.waited_s += wait
+            if self.on_wait is not None:
+                self.on_wait(key, wait)
+            time.sleep(wait)
+        return wait
+
+    def stats_lines(self) -> list[str]:
+        return [
+            f"rate limit {self.requests} solicitudes, {self.waits} en cola, "
+            f"{self.waited_s:.1f}s de espera"
+        ]
+
+
+_LIMITERS: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(path: Path | str = STATE_FILE) -> RateLimiter:
+    """Process-wide limiter per state file."""
+    key = str(Path(path).resolve())
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = _LIMITERS[key] = RateLimiter(path)
+    return limiter
+
+
+def _usage_tokens(message: Optional[BaseMessage]) -> Optional[int]:
+    usage = getattr(message, "usage_metadata", None) if message is not None else None
+    if not usage:
+        return None
+    return int(usage.get("input_tokens", 0)) + int(usage.get("output_tokens", 0))
+
+
+class RateLimitedChatModel(BaseChatModel):
+    """Chat model that waits for its share of the provider's RPM/TPM budget."""
+
+    inner: Any
+    limiter: Any
+    key: str
+    rpm: int = 0
+    tpm: int = 0
+    call_kwargs: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"rate-limited-{getattr(self.inner, '_llm_type', 'chat')}"
+
+    def bind_tools(self, tools: list, **kwargs: Any) -> "RateLimitedChatModel":
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.model_copy(
+            update={
+                "inner": getattr(bound, "bound", self.inner),
+                "call_kwargs": {**self.call_kwargs, **dict(getattr(bound, "kwargs", {}))},
+            }
+        )
+
+    def _settle(self, estimate: int, message: Optional[BaseMessage]) -> None:
+        used = _usage_tokens(message)
+        if used is not None:
+            self.limiter.adjust(self.key, self.tpm, used - min(estimate, self.tpm or estimate))
+
+    # Sync
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        estimate = estimate_tokens(messages)
+        self.limiter.wait_blocking(self.key, self.rpm, self.tpm, estimate)
+        result = self.inner._generate(messages, stop=stop, **{**self.call_kwargs, **kwargs})
+        self._settle(estimate, result.generations[0].message if result.generations else None)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        estimate = estimate_tokens(messages)
+        self.limiter.wait_blocking(self.key, self.rpm, self.tpm, estimate)
+        acc = None
+        for chunk in self.inner._stream(messages, stop=stop, **{**self.call_kwargs, **kwargs}):
+            acc = chunk.message if acc is None else acc + chunk.message
+            yield chunk
+        self._settle(estimate, acc)
+
+    # Async
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        estimate = estimate_tokens(messages)
+        await self.limiter.acquire(self.key, self.rpm, self.tpm, estimate)
+        result = await self.inner._agenerate(messages, stop=stop, **{**self.call_kwargs, **kwargs})
+        await asyncio.to_thread(
+            self._settle, estimate, result.generations[0].message if result.generations else None
+        )
+        return result
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        estimate = estimate_tokens(messages)
+        await self.limiter.acquire(self.key, self.rpm, self.tpm, estimate)
+        acc = None
+        async for chunk in self.inner._astream(messages, stop=stop, **{**self.call_kwargs, **kwargs}):
+            acc = chunk.message if acc is None else acc + chunk.message
+            yield chunk
+        await asyncio.to_thread(self._settle, estimate, acc)
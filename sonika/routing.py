@@ -0,0 +1,248 @@
+"""Per-role model routing for the orchestrator (strong vs. fast tiers).
+
+Every agent step uses the active (strong) model by default: in the
+orchestrator the step after a tool result ("evaluator", or "retry" when a tool
+failed) plans the next calls and writes the answer, so it is not low-stakes.
+Only the "reporter" role — the bot's fast model for side jobs such as context
+summaries — defaults to the cheapest adequate model of the same provider.
+Routing an agent role to a cheaper model is opt-in (``model_routing``) and is
+listed by ``/stats``. A routed call that fails or comes back empty is escalated
+to the planner model; rate-limit errors are not, they go to the orchestrator's
+retry policy and the rate limiter.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from sonika.cli.models_catalog import ModelInfo, get_model as get_model_info, models_for_provider
+from sonika.usage import usage_cost, usage_counts
+
+ROLES = ("planner", "evaluator", "retry", "reporter")
+# Roles the agent node calls through RoleRouter (see classify_role)
+AGENT_ROLES = ("planner", "evaluator", "retry")
+LOW_STAKES_ROLES = ("reporter",)
+AUTO = "auto"
+
+
+def cheapest_adequate(provider: str, min_context: int = 0) -> Optional[ModelInfo]:
+    """Cheapest catalog model of ``provider`` with at least ``min_context`` tokens.
+
+    Experimental (``-exp``) models are skipped: they are free but rate limited
+    and may disappear, which makes them a poor unattended default.
+    """
+    candidates = [
+        m for m in models_for_provider(provider)
+        if m.context_k >= min_context and "-exp" not in m.model_id
+    ]
+    if not candidates:
+        return None
+    # min() keeps catalog order on ties
+    return min(candidates, key=lambda m: m.input_per_1m + m.output_per_1m)
+
+
+def resolve_routing(provider: str, model_name: str, routing: dict[str, str]) -> dict[str, str]:
+    """Map every role to a concrete model id.
+
+    ``routing`` entries are model ids or ``"auto"``. Unset low-stakes roles
+    default to ``"auto"``; the planner defaults to ``model_name``. ``"auto"``
+    never picks a model pricier than the strong one, and falls back to it when
+    the strong model is not in the catalog.
+    """
+    strong = get_model_info(provider, model_name)
+    resolved: dict[str, str] = {}
+    for role in ROLES:
+        choice = routing.get(role) or (AUTO if role in LOW_STAKES_ROLES else model_name)
+        if choice == AUTO:
+            choice = model_name
+            if strong is not None:
+                cheap = cheapest_adequate(provider, strong.context_k)
+                if cheap and (cheap.input_per_1m + cheap.output_per_1m) < (
+                    strong.input_per_1m + strong.output_per_1m
+                ):
+                    choice = cheap.model_id
+        resolved[role] = choice
+    return resolved
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    """429 / quota errors: retried later by the orchestrator, never escalated."""
+    status = getattr(exc, "status_code", None) or getattr(
+        getattr(exc, "response", None), "status_code", None
+    )
+    if status == 429:
+        return True
+    text = str(exc).lower().replace("_", " ")
+    return any(k in text for k in ("429", "quota", "rate limit", "resource exhausted"))
+
+
+def classify_role(messages: list) -> str:
+    """Infer the orchestrator role of a model call from the conversation tail.
+
+    Trailing tool results mean the model is judging a step ("evaluator"), or
+    recovering from one ("retry") when any of them failed; anything else is a
+    fresh goal ("planner").
+    """
+    results = []
+    for msg in reversed(messages):
+        if getattr(msg, "type", None) != "tool":
+            break
+        results.append(str(msg.content))
+    if not results:
+        return "planner"
+    if any(r.startswith("Error") for r in results):
+        return "retry"
+    return "evaluator"
+
+
+def _is_empty(message: Any) -> bool:
+    if message is None:
+        return True
+    if getattr(message, "tool_calls", None):
+        return False
+    content = message.content
+    if isinstance(content, list):
+        return not any(
+            (p.strip() if isinstance(p, str) else (p.get("text") or p.get("thinking")))
+            for p in content
+        )
+    return not str(content).strip()
+
+
+@dataclass
+class RoleStats:
+    calls: int = 0
+    escalations: int = 0
+    seconds: float = 0.0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost: float = 0.0
+    tokens_cached: int = 0
+    tokens_thinking: int = 0
+
+    @property
+    def avg_ms(self) -> float:
+        return (self.seconds / self.calls) * 1000 if self.calls else 0.0
+
+
+class RoleRouter:
+    """Drop-in replacement for ``OrchestratorBot.model_with_tools``.
+
+    Exposes the ``astream``/``ainvoke`` surface the agent node uses and
+    dispatches each call to the model routed for its role.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        routing: dict[str, str],
+        models: dict[str, Any],
+        tools: list | None = None,
+        escalate: bool = True,
+    ) -> None:
+        self.provider = provider
+        self.routing = routing
+        self.escalate = escalate
+        self._bound: dict[str, Any] = {}
+        for model_id, lm in models.items():
+            self._bound[model_id] = lm.model.bind_tools(tools) if tools else lm.model
+        self.stats: dict[str, RoleStats] = {role: RoleStats() for role in ROLES}
+        self.last_role: str | None = None
+        # Model serving the call in flight (differs from routing after escalation)
+        self.last_model: str | None = None
+
+    # ── Accounting ────────────────────────────────────────────────────────────
+
+    def _record(self, role: str, model_id: str, started: float, message: Any) -> None:
+        stats = self.stats[role]
+        stats.calls += 1
+        stats.seconds += time.monotonic() - started
+        usage = getattr(message, "usage_metadata", None)
+        tin, tout, cached, thinking = usage_counts(usage)
+        stats.tokens_in += tin
+        stats.tokens_out += tout
+        stats.tokens_cached += cached
+        stats.tokens_thinking += thinking
+        stats.cost += usage_cost(self.provider, model_id, usage)
+
+    def stats_lines(self) -> list[str]:
+        lines = []
+        for role in ROLES:
+            s = self.stats[role]
+            if not s.calls:
+                continue
+            line = (
+                f"{role:<10} {self.routing[role]:<22} {s.calls:>3} llamadas  "
+                f"{s.avg_ms:>6.0f}ms prom  {s.tokens_in}↑ {s.tokens_out}↓  ${s.cost:.4f}"
+            )
+            if s.tokens_cached or s.tokens_thinking:
+                line += f"  ({s.tokens_cached} cache, {s.tokens_thinking} razonamiento)"
+            if s.escalations:
+                line += f"  ({s.escalations} escaladas)"
+            lines.append(line)
+        return lines
+
+    def routed(self) -> dict[str, str]:
+        """Agent roles served by a model other than the planner's."""
+        strong = self.routing["planner"]
+        return {
+            role: self.routing[role]
+            for role in AGENT_ROLES
+            if self.routing[role] != strong
+        }
+
+    def _targets(self, role: str) -> list[str]:
+        model_id = self.routing[role]
+        strong = self.routing["planner"]
+        if self.escalate and role != "planner" and model_id != strong:
+            return [model_id, strong]
+        return [model_id]
+
+    # ── Runnable surface ──────────────────────────────────────────────────────
+
+    async def astream(self, messages: list, *args, **kwargs) -> AsyncIterator[Any]:
+        role = classify_role(messages)
+        self.last_role = role
+        targets = self._targets(role)
+        for i, model_id in enumerate(targets):
+            last = i == len(targets) - 1
+            started = time.monotonic()
+            self.last_model = model_id
+            acc = None
+            try:
+                async for chunk in self._bound[model_id].astream(messages, *args, **kwargs):
+                    acc = chunk if acc is None else acc + chunk
+                    yield chunk
+            except Exception as exc:
+                # Chunks already reached the caller: escalating would duplicate them
+                if last or acc is not None or _is_rate_limited(exc):
+                    raise
+                self.stats[role].escalations += 1
+                continue
+            self._record(role, model_id, started, acc)
+            if last or not _is_empty(acc):
+                return
+            self.stats[role].escalations += 1
+
+    async def ainvoke(self, messages: list, *args, **kwargs) -> Any:
+        role = classify_role(messages)
+        self.last_role = role
+        targets = self._targets(role)
+        for i, model_id in enumerate(targets):
+            last = i == len(targets) - 1
+            started = time.monotonic()
+            self.last_model = model_id
+            try:
+                response = await self._bound[model_id].ainvoke(messages, *args, **kwargs)
+            except Exception as exc:
+                if last or _is_rate_limited(exc):
+                    raise
+                self.stats[role].escalations += 1
+                continue
+            self._record(role, model_id, started, response)
+            if last or not _is_empty(response):
+                return response
+            self.stats[role].escalations += 1
+        raise RuntimeError("no model routed")  # pragma: no cover
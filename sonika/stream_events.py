@@ -0,0 +1,411 @@
+"""Typed events from the orchestrator's ``astream_events`` stream.
+
+``OrchestratorBot.astream_events`` yields raw ``(stream_mode, payload)``
+tuples: ``("messages", (chunk, metadata))`` for model output and
+``("updates", {node: update})`` for graph state changes. Every front end
+needs the same things from them: text tokens, thinking, tool calls and
+their results, retries, approval interrupts and the final report.
+:class:`StreamNormalizer` parses each tuple once into small ``__slots__``
+event objects, so the CLI (:meth:`SonikaCLI._send`), the legacy console
+(:class:`ConsoleApp`) and headless consumers (:mod:`sonika.cli.compare`)
+share one parser::
+
+    norm = StreamNormalizer()
+    async for raw in bot.astream_events(goal, mode=mode, thread_id=tid):
+        for ev in norm.feed(*raw):
+            if type(ev) is Token: ...
+
+Tool calls are correlated by ``tool_call_id``: a :class:`ToolEnd` carries the
+name, arguments and elapsed time of the :class:`ToolStart` it closes. One
+normalizer follows one turn (including resumes after an interrupt).
+
+:class:`TextBuffer` accumulates the deltas (answer text, thinking) in time
+linear in their total length, however long the response gets.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Any, Callable, Optional
+
+_NONE: tuple = ()
+
+
+class Token:
+    """Answer text. ``pre_tool``: no tool has been called yet this turn."""
+
+    __slots__ = ("text", "pre_tool")
+
+    def __init__(self, text: str, pre_tool: bool) -> None:
+        self.text = text
+        self.pre_tool = pre_tool
+
+
+class Thinking:
+    """A piece of the model's reasoning (a delta, not the whole buffer)."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class ModelUsage:
+    """Provider usage reported on a chunk, or a response-cache hit.
+
+    ``provider``/``model`` name the model that answered when it was not the
+    session's own (a hedged request won by a secondary provider).
+    """
+
+    __slots__ = ("usage", "metadata", "cache_hit", "provider", "model")
+
+    def __init__(
+        self,
+        usage: Optional[dict],
+        metadata: Optional[dict],
+        cache_hit: bool,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> None:
+        self.usage = usage
+        self.metadata = metadata
+        self.cache_hit = cache_hit
+        self.provider = provider
+        self.model = model
+
+
+class ToolStart:
+    __slots__ = ("id", "name", "args")
+
+    def __init__(self, id: str, name: str, args: dict) -> None:
+        self.id = id
+        self.name = name
+        self.args = args
+
+
+class ToolEnd:
+    """Result of a tool call; ``status`` is success, error or skipped."""
+
+    __slots__ = ("id", "name", "args", "status", "output", "elapsed")
+
+    def __init__(
+        self, id: str, name: str, args: dict, status: str, output: str, elapsed: float
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.args = args
+        self.status = status
+        self.output = output
+        self.elapsed = elapsed
+
+
+class Retry:
+    __slots__ = ("attempt", "wait_s")
+
+    def __init__(self, attempt: int, wait_s: float) -> None:
+        self.attempt = attempt
+        self.wait_s = wait_s
+
+
+class Partial:
+    """Intermediate progress text from the agent."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class Interrupt:
+    """The graph paused for approval; resume with ``set_resume_command``."""
+
+    __slots__ = ("tool", "params", "value")
+
+    def __init__(self, tool: str, params: dict, value: dict) -> None:
+        self.tool = tool
+        self.params = params
+        self.value = value
+
+
+class FinalReport:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class _Call:
+    __slots__ = ("name", "args", "started")
+
+    def __init__(self, name: str, args: dict, started: float) -> None:
+        self.name = name
+        self.args = args
+        self.started = started
+
+
+def brief_args(args: dict, value_len: int = 40, total: int = 120) -> str:
+    """``k='v', ...`` preview of tool arguments for one status line."""
+    return ", ".join(f"{k}={repr(v)[:value_len]}" for k, v in args.items())[:total]
+
+
+class StreamNormalizer:
+    """Turns raw ``astream_events`` tuples into events, one pass per tuple."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        from langchain_core.messages import AIMessageChunk
+
+        self._chunk_type = AIMessageChunk
+        self._clock = clock
+        self.tools_started = False
+        # Monotonic time of the first model chunk of the turn (any content)
+        self.first_chunk_at: Optional[float] = None
+        # tool_call_id -> call in flight
+        self._calls: dict[str, _Call] = {}
+        self._seq = 0
+
+    @property
+    def pending_tools(self) -> int:
+        return len(self._calls)
+
+    def feed(self, stream_mode: str, payload: Any) -> tuple:
+        if stream_mode == "messages":
+            return self._message(*payload)
+        if stream_mode == "updates":
+            events: list = []
+            for node, update in payload.items():
+                if node == "agent":
+                    self._agent(update, events)
+                elif node == "__interrupt__":
+                    self._interrupt(update, events)
+                elif isinstance(update, dict):
+                    self._tools(update, events)
+            return tuple(events)
+        return _NONE
+
+    # ── messages ──────────────────────────────────────────────────────────────
+
+    def _message(self, chunk: Any, metadata: Optional[dict]) -> tuple:
+        if not isinstance(chunk, self._chunk_type):
+            return _NONE
+        if self.first_chunk_at is None:
+            self.first_chunk_at = self._clock()
+        content = chunk.content
+        usage = chunk.usage_metadata
+        meta = chunk.response_metadata
+        cache_hit = bool(meta) and meta.get("sonika_cache") == "hit"
+        if content.__class__ is str and not usage and not cache_hit:
+            # The common case: one text delta
+            return (Token(content, not self.tools_started),) if content else _NONE
+        events: list = []
+        if usage or cache_hit:
+            events.append(ModelUsage(
+                usage, metadata, cache_hit,
+                meta.get("sonika_provider") if meta else None,
+                meta.get("sonika_model") if meta else None,
+            ))
+        if isinstance(content, str):
+            if content:
+                events.append(Token(content, not self.tools_started))
+            return tuple(events)
+        for part in content or _NONE:
+            if isinstance(part, str):
+                if part:
+                    events.append(Token(part, not self.tools_started))
+            elif isinstance(part, dict):
+                if part.get("type") == "thinking":
+                    text = part.get("thinking", "")
+                    if text:
+                        events.append(Thinking(text))
+                else:
+                    text = part.get("text", "") or part.get("content", "")
+                    if text:
+                        events.append(Token(str(text), not self.tools_started))
+        return tuple(events)
+
+    # ── updates ───────────────────────────────────────────────────────────────
+
+    def _agent(self, update: dict, events: list) -> None:
+        for ev in update.get("status_events", _NONE):
+            if ev.get("type") == "retrying":
+                events.append(Retry(ev["attempt"], ev["wait_s"]))
+        msgs = update.get("messages")
+        calls = getattr(msgs[-1], "tool_calls", None) if msgs else None
+        if calls:
+            self.tools_started = True
+            now = self._clock()
+            for tc in calls:
+                name = tc.get("name", "unknown")
+                args = tc.get("args") or {}
+                call_id = tc.get("id") or self._next_id(name)
+                self._calls[call_id] = _Call(name, args, now)
+                events.append(ToolStart(call_id, name, args))
+        for partial in update.get("partial_responses", _NONE):
+            events.append(Partial(partial))
+        # A report next to new tool calls is stale: the agent is still working
+        if update.get("final_report") and not calls:
+            events.append(FinalReport(update["final_report"]))
+
+    def _tools(self, update: dict, events: list) -> None:
+        """Results from the tools node (or plan / ask_user nodes)."""
+        executed = list(update.get("tools_executed", _NONE))
+        now = self._clock()
+        # ToolMessages carry the tool_call_id, in the order the node ran the
+        # calls; tools_executed has an entry for each call that ran
+        for msg in update.get("messages", _NONE):
+            call_id = getattr(msg, "tool_call_id", None)
+            call = self._calls.pop(call_id, None) if call_id else None
+            if call is None:
+                continue
+            if executed and executed[0].get("tool_name") == call.name:
+                t = executed.pop(0)
+                status, output = t.get("status", "?"), str(t.get("output", ""))
+            else:
+                output = str(getattr(msg, "content", ""))
+                status = (
+                    "error" if output.startswith("Error")
+                    else "skipped" if output.startswith("Not executed")
+                    else "success"
+                )
+            events.append(ToolEnd(call_id, call.name, call.args, status, output, now - call.started))
+        # Entries without a ToolMessage: oldest pending call with that name
+        for t in executed:
+            name = t.get("tool_name", "?")
+            call_id = next((cid for cid, c in self._calls.items() if c.name == name), None)
+            call = self._calls.pop(call_id) if call_id else None
+            events.append(ToolEnd(
+                call_id or self._next_id(name),
+                name,
+                call.args if call else t.get("args") or {},
+                t.get("status", "?"),
+                str(t.get("output", "")),
+                now - call.started if call else 0.0,
+            ))
+
+    def _interrupt(self, update: Any, events: list) -> None:
+        value = update[0].value if update else {}
+        if not isinstance(value, dict):
+            value = {"value": value}
+        events.append(Interrupt(
+            value.get("tool", value.get("tool_name", "?")),
+            value.get("params", {}),
+            value,
+        ))
+
+    def _next_id(self, name: str) -> str:
+        self._seq += 1
+        return f"{name}#{self._seq}"
+
+
+# ── Accumulation ──────────────────────────────────────────────────────────────
+
+# Characters of the start and end of a spilled buffer kept in memory
+SPILL_KEEP_CHARS = 4096
+
+
+class TextBuffer:
+    """Append-only text built from stream deltas.
+
+    Deltas are kept as a list and joined only when :meth:`text` is asked for;
+    ``chars`` and ``line_count`` (``len(text.splitlines())`` for ``\\n`` line
+    ends) are updated per delta, so no call rescans what came before.
+
+    With ``cap`` > 0 and a ``spill`` path, once the text outgrows ``cap``
+    characters it is moved to that file and later deltas are appended there;
+    only the first and last :data:`SPILL_KEEP_CHARS` characters stay in memory
+    for :meth:`head` and :meth:`tail`. Call :meth:`close` when the stream ends.
+    """
+
+    __slots__ = ("cap", "spill", "chars", "_newlines", "_parts", "_head", "_kept", "_file")
+
+    def __init__(self, cap: int = 0, spill: Optional[Path] = None) -> None:
+        self.cap = cap if spill is not None else 0
+        self.spill = spill
+        self.chars = 0
+        self._newlines = 0
+        self._parts: Any = []  # a deque of the last deltas once spilled
+        self._head = ""
+        self._kept = 0  # characters in _parts once spilled
+        self._file: Optional[IO[str]] = None
+
+    def __len__(self) -> int:
+        return self.chars
+
+    def __bool__(self) -> bool:
+        return self.chars > 0
+
+    @property
+    def line_count(self) -> int:
+        open_line = self._parts and not self._parts[-1].endswith("\n")
+        return self._newlines + (1 if open_line else 0)
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None or bool(self._head)
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        self.chars += len(text)
+        self._newlines += text.count("\n")
+        if self._file is not None:
+            self._file.write(text)
+            parts = self._parts
+            parts.append(text)
+            self._kept += len(text)
+            while self._kept - len(parts[0]) >= SPILL_KEEP_CHARS:
+                self._kept -= len(parts.popleft())
+            return
+        self._parts.append(text)
+        if self.cap and self.chars > self.cap:
+            self._spill()
+
+    def text(self) -> str:
+        """The whole text (read back from the spill file if it was spilled)."""
+        if self.spilled:
+            if self._file is not None:
+                self._file.flush()
+            return self.spill.read_text(encoding="utf-8")
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def head(self, n: int) -> str:
+        """The first ``n`` lines, without reading the whole buffer."""
+        if self.spilled:
+            return "\n".join(self._head.splitlines()[:n])
+        taken, newlines = [], 0
+        for part in self._parts:
+            taken.append(part)
+            newlines += part.count("\n")
+            if newlines >= n:
+                break
+        return "\n".join("".join(taken).splitlines()[:n])
+
+    def tail(self, n: int) -> str:
+        """The last ``n`` lines, without reading the whole buffer."""
+        taken, newlines = [], 0
+        for part in reversed(self._parts):
+            taken.append(part)
+            newlines += part.count("\n")
+            if newlines > n + 1:
+                # The first line taken may be partial: it is never among the last n
+                break
+        taken.reverse()
+        return "\n".join("".join(taken).splitlines()[-n:])
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _spill(self) -> None:
+        text = "".join(self._parts)
+        self.spill.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.spill, "w", encoding="utf-8")
+        self._file.write(text)
+        self._head = text[:SPILL_KEEP_CHARS]
+        self._parts = deque([text[-SPILL_KEEP_CHARS:]])
+        self._kept = len(self._parts[0])
+
@@ -44,7 +44,8 @@ def _get_integrations_tools():
 
 def _get_scheduler_tools():
     from sonika.tools.cron import CronTool
-    return [CronTool]
+    from sonika.tools.watch import WatchTool
+    return [CronTool, WatchTool]
 
 
 TOOL_GROUPS = {
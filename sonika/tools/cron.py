@@ -1,9 +1,11 @@
-"""CronTool — gestión de crontabs y launchd plists para macOS/Linux."""
+"""CronTool — gestión de crontabs, launchd plists y units systemd para macOS/Linux."""
 
 from __future__ import annotations
 
+import hashlib
 import os
 import re
+import shlex
 import subprocess
 import textwrap
 import xml.etree.ElementTree as ET
@@ -17,14 +19,17 @@ from pydantic import BaseModel, Field
 # ── Input schema ──────────────────────────────────────────────────────────────
 
 class CronInput(BaseModel):
-    action: Literal["list", "add", "remove", "validate", "generate_plist"] = Field(
+    action: Literal[
+        "list", "add", "remove", "validate", "generate_plist", "generate_systemd"
+    ] = Field(
         description=(
             "Action to perform: "
             "'list' — show current crontab entries; "
             "'validate' — check a cron expression syntax and show next runs; "
             "'add' — add a new cron entry (requires expression + command); "
             "'remove' — remove entries matching a command pattern; "
-            "'generate_plist' — generate a macOS launchd .plist file (requires plist_label + command)."
+            "'generate_plist' — generate a macOS launchd .plist file (requires plist_label + command); "
+            "'generate_systemd' — generate Linux systemd .service/.timer units (requires unit_name + command)."
         )
     )
     expression: Optional[str] = Field(
@@ -47,6 +52,41 @@ class CronInput(BaseModel):
         default=None,
         description="If provided, use StartInterval (repeat every N seconds). Otherwise use cron expression via StartCalendarInterval.",
     )
+    single_instance: Optional[Literal["skip", "queue"]] = Field(
+        default=None,
+        description=(
+            "Wrap the command with a lock (flock) so only one run is active: "
+            "'skip' drops a new run while one is active, 'queue' waits for it to finish."
+        ),
+    )
+    nice: Optional[int] = Field(
+        default=None,
+        description="CPU niceness (-20..19) applied to the scheduled command.",
+    )
+    ionice_class: Optional[int] = Field(
+        default=None,
+        description="I/O scheduling class (1=realtime, 2=best-effort, 3=idle). Linux only.",
+    )
+    cpu_limit_seconds: Optional[int] = Field(
+        default=None,
+        description="CPU time limit per run in seconds (rlimit via 'ulimit -t').",
+    )
+    memory_limit_mb: Optional[int] = Field(
+        default=None,
+        description="Memory limit per run in MB ('ulimit -v' in crontab, MemoryMax in systemd).",
+    )
+    unit_name: Optional[str] = Field(
+        default=None,
+        description="Name for the systemd units, e.g. 'backup' -> backup.service + backup.timer.",
+    )
+    cpu_quota_percent: Optional[int] = Field(
+        default=None,
+        description="systemd CPUQuota in percent of one CPU, e.g. 50.",
+    )
+    io_weight: Optional[int] = Field(
+        default=None,
+        description="systemd IOWeight (1..10000, default 100).",
+    )
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -126,6 +166,178 @@ def _matches(value: int, pattern: str, lo: int, hi: int) -> bool:
     return value == int(pattern)
 
 
+def _wrap_command(
+    command: str,
+    single_instance: Optional[str] = None,
+    nice: Optional[int] = None,
+    ionice_class: Optional[int] = None,
+    cpu_limit_seconds: Optional[int] = None,
+    memory_limit_mb: Optional[int] = None,
+) -> str:
+    """Wrap a shell command with flock / nice / ionice / ulimit as requested."""
+    inner = command
+    limits = []
+    if cpu_limit_seconds:
+        limits.append(f"ulimit -t {int(cpu_limit_seconds)}")
+    if memory_limit_mb:
+        limits.append(f"ulimit -v {int(memory_limit_mb) * 1024}")
+    if limits:
+        inner = "; ".join(limits) + "; " + command
+
+    prefix: list[str] = []
+    if single_instance:
+        if single_instance not in ("skip", "queue"):
+            raise ValueError(f"single_instance inválido: {single_instance!r} (usa 'skip' o 'queue')")
+        digest = hashlib.sha1(command.encode("utf-8")).hexdigest()[:12]
+        prefix.append("flock")
+        if single_instance == "skip":
+            prefix.append("-n")
+        prefix.append(f"/tmp/sonika-cron-{digest}.lock")
+    if nice is not None:
+        prefix += ["nice", "-n", str(int(nice))]
+    if ionice_class is not None:
+        prefix += ["ionice", "-c", str(int(ionice_class))]
+
+    if not prefix and not limits:
+        return command
+    return " ".join(prefix + ["/bin/sh", "-c", shlex.quote(inner)])
+
+
+# systemd weeks run Monday..Sunday; cron days are 0 (or 7) = Sunday .. 6
+_SYSTEMD_DOW = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def _systemd_field(part: str, lo: int) -> str:
+    """Translate one cron field (not day-of-week) into systemd calendar syntax."""
+    if part == "*":
+        return "*"
+    out = []
+    for item in part.split(","):
+        base, _, step = item.partition("/")
+        if base == "*":
+            value = f"{lo:02d}"
+        elif "-" in base:
+            a, b = base.split("-", 1)
+            value = f"{int(a):02d}..{int(b):02d}"
+        else:
+            value = f"{int(base):02d}"
+        out.append(f"{value}/{int(step)}" if step else value)
+    return ",".join(out)
+
+
+def _systemd_weekdays(part: str) -> str:
+    """Translate a cron day-of-week field into systemd weekday names.
+
+    The days are expanded (7 is Sunday, like 0) and written back as
+    Monday-first runs, so ``0-7`` is every day (``*``) and ``0-2`` is
+    ``Mon..Tue,Sun``.
+    """
+    if part == "*":
+        return "*"
+    days: set[int] = set()
+    for item in part.split(","):
+        base, _, step = item.partition("/")
+        if base == "*":
+            a, b = 0, 6
+        elif "-" in base:
+            a, b = (int(x) for x in base.split("-", 1))
+        else:
+            a = b = int(base)
+        days.update(d % 7 for d in range(a, b + 1, int(step) if step else 1))
+    if len(days) == 7:
+        return "*"
+    # cron day -> Monday-first index
+    idx = sorted((d - 1) % 7 for d in days)
+    runs: list[list[int]] = []
+    for i in idx:
+        if runs and i == runs[-1][1] + 1:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    return ",".join(
+        _SYSTEMD_DOW[a] if a == b else f"{_SYSTEMD_DOW[a]}..{_SYSTEMD_DOW[b]}" for a, b in runs
+    )
+
+
+def _cron_to_oncalendar(expr: str) -> str:
+    """Convert a 5-field cron expression into a systemd OnCalendar value.
+
+    Note: cron ORs day-of-month and day-of-week when both are restricted,
+    systemd ANDs them.
+    """
+    minute_p, hour_p, dom_p, month_p, dow_p = expr.strip().split()
+    date = f"*-{_systemd_field(month_p, 1)}-{_systemd_field(dom_p, 1)}"
+    time_ = f"{_systemd_field(hour_p, 0)}:{_systemd_field(minute_p, 0)}:00"
+    weekdays = _systemd_weekdays(dow_p)
+    if weekdays != "*":
+        return f"{weekdays} {date} {time_}"
+    return f"{date} {time_}"
+
+
+def _build_systemd_units(
+    unit_name: str,
+    command: str,
+    expression: Optional[str] = None,
+    interval_seconds: Optional[int] = None,
+    description: Optional[str] = None,
+    nice: Optional[int] = None,
+    ionice_class: Optional[int] = None,
+    cpu_limit_seconds: Optional[int] = None,
+    memory_limit_mb: Optional[int] = None,
+    cpu_quota_percent: Optional[int] = None,
+    io_weight: Optional[int] = None,
+) -> tuple[str, str]:
+    """Return (service, timer) unit file contents.
+
+    systemd never starts a second copy of a running service, so the units are
+    single-instance by construction.
+    """
+    desc = description or f"Sonika scheduled task: {unit_name}"
+    # '%' introduces specifiers in unit files
+    exec_start = f"/bin/sh -c {shlex.quote(command)}".replace("%", "%%")
+
+    service = [
+        "[Unit]",
+        f"Description={desc}",
+        "",
+        "[Service]",
+        "Type=oneshot",
+        f"ExecStart={exec_start}",
+    ]
+    if nice is not None:
+        service.append(f"Nice={int(nice)}")
+    if ionice_class is not None:
+        classes = {1: "realtime", 2: "best-effort", 3: "idle"}
+        service.append(f"IOSchedulingClass={classes.get(int(ionice_class), 'best-effort')}")
+    if cpu_quota_percent:
+        service.append(f"CPUQuota={int(cpu_quota_percent)}%")
+    if memory_limit_mb:
+        service.append(f"MemoryMax={int(memory_limit_mb)}M")
+    if io_weight:
+        service.append(f"IOWeight={int(io_weight)}")
+    if cpu_limit_seconds:
+        service.append(f"LimitCPU={int(cpu_limit_seconds)}")
+
+    timer = [
+        "[Unit]",
+        f"Description=Timer for {unit_name}",
+        "",
+        "[Timer]",
+    ]
+    if interval_seconds:
+        timer.append(f"OnBootSec={int(interval_seconds)}s")
+        timer.append(f"OnUnitActiveSec={int(interval_seconds)}s")
+    elif expression:
+        timer.append(f"OnCalendar={_cron_to_oncalendar(expression)}")
+        timer.append("Persistent=true")
+    else:
+        raise ValueError("se requiere 'expression' o 'plist_interval_seconds'")
+    timer.append(f"Unit={unit_name}.service")
+    timer += ["", "[Install]", "WantedBy=timers.target"]
+
+    return "\n".join(service) + "\n", "\n".join(timer) + "\n"
+
+
 def _read_crontab() -> str:
     result = subprocess.run(["crontab", "-l"], capture_output=True, text=True)
     if result.returncode != 0:
@@ -152,13 +364,15 @@ def _write_crontab(content: str) -> None:
 class CronTool(BaseTool):
     name: str = "manage_cron"
     description: str = (
-        "Gestiona crontabs del sistema y launchd plists en macOS/Linux. "
+        "Gestiona crontabs del sistema, launchd plists en macOS y units systemd en Linux. "
         "Acciones disponibles: "
         "'list' — listar entradas actuales del crontab; "
         "'validate' — validar expresión cron y ver próximas ejecuciones; "
-        "'add' — agregar nueva tarea programada (requiere expression + command); "
+        "'add' — agregar nueva tarea programada (requiere expression + command; "
+        "opcional single_instance, nice, ionice_class, cpu_limit_seconds, memory_limit_mb); "
         "'remove' — eliminar entradas que coincidan con un comando; "
-        "'generate_plist' — generar archivo .plist para launchd de macOS."
+        "'generate_plist' — generar archivo .plist para launchd de macOS; "
+        "'generate_systemd' — generar .service + .timer de systemd con CPUQuota/MemoryMax/IOWeight."
     )
     args_schema: type[BaseModel] = CronInput
     risk_level: int = 0  # default; overridden per-action in _run
@@ -175,6 +389,11 @@ class CronTool(BaseTool):
                     kwargs.get("expression"),
                     kwargs.get("command"),
                     kwargs.get("description"),
+                    single_instance=kwargs.get("single_instance"),
+                    nice=kwargs.get("nice"),
+                    ionice_class=kwargs.get("ionice_class"),
+                    cpu_limit_seconds=kwargs.get("cpu_limit_seconds"),
+                    memory_limit_mb=kwargs.get("memory_limit_mb"),
                 )
             elif action == "remove":
                 return self._remove(kwargs.get("command"))
@@ -186,8 +405,25 @@ class CronTool(BaseTool):
                     kwargs.get("plist_interval_seconds"),
                     kwargs.get("description"),
                 )
+            elif action == "generate_systemd":
+                return self._generate_systemd(
+                    kwargs.get("unit_name"),
+                    kwargs.get("command"),
+                    kwargs.get("expression"),
+                    kwargs.get("plist_interval_seconds"),
+                    kwargs.get("description"),
+                    nice=kwargs.get("nice"),
+                    ionice_class=kwargs.get("ionice_class"),
+                    cpu_limit_seconds=kwargs.get("cpu_limit_seconds"),
+                    memory_limit_mb=kwargs.get("memory_limit_mb"),
+                    cpu_quota_percent=kwargs.get("cpu_quota_percent"),
+                    io_weight=kwargs.get("io_weight"),
+                )
             else:
-                return f"Acción desconocida: {action!r}. Usa: list, add, remove, validate, generate_plist."
+                return (
+                    f"Acción desconocida: {action!r}. "
+                    "Usa: list, add, remove, validate, generate_plist, generate_systemd."
+                )
         except Exception as exc:
             return f"Error en CronTool({action}): {exc}"
 
@@ -220,6 +456,11 @@ class CronTool(BaseTool):
         expression: Optional[str],
         command: Optional[str],
         description: Optional[str],
+        single_instance: Optional[str] = None,
+        nice: Optional[int] = None,
+        ionice_class: Optional[int] = None,
+        cpu_limit_seconds: Optional[int] = None,
+        memory_limit_mb: Optional[int] = None,
     ) -> str:
         if not expression:
             return "Error: se requiere 'expression' para agregar una tarea."
@@ -230,12 +471,21 @@ class CronTool(BaseTool):
         if not ok:
             return f"Expresión inválida, tarea no agregada: {msg}"
 
+        scheduled = _wrap_command(
+            command,
+            single_instance=single_instance,
+            nice=nice,
+            ionice_class=ionice_class,
+            cpu_limit_seconds=cpu_limit_seconds,
+            memory_limit_mb=memory_limit_mb,
+        )
+
         current = _read_crontab()
 
         new_lines = []
         if description:
             new_lines.append(f"# {description}")
-        new_lines.append(f"{expression} {command}")
+        new_lines.append(f"{expression} {scheduled}")
         new_entry = "\n".join(new_lines)
 
         separator = "\n" if current.endswith("\n") else "\n\n"
@@ -249,6 +499,8 @@ class CronTool(BaseTool):
             f"  Expresión : {expression}",
             f"  Comando   : {command}",
         ]
+        if scheduled != command:
+            result.append(f"  Ejecución : {scheduled}")
         if description:
             result.append(f"  Descripción: {description}")
         result.append("Próximas ejecuciones:")
@@ -392,3 +644,68 @@ class CronTool(BaseTool):
             result = f"# {description}\n\n" + result
 
         return result
+
+    def _generate_systemd(
+        self,
+        unit_name: Optional[str],
+        command: Optional[str],
+        expression: Optional[str],
+        interval_seconds: Optional[int],
+        description: Optional[str],
+        nice: Optional[int] = None,
+        ionice_class: Optional[int] = None,
+        cpu_limit_seconds: Optional[int] = None,
+        memory_limit_mb: Optional[int] = None,
+        cpu_quota_percent: Optional[int] = None,
+        io_weight: Optional[int] = None,
+    ) -> str:
+        if not unit_name:
+            return "Error: se requiere 'unit_name' (ej. 'backup')."
+        if not command:
+            return "Error: se requiere 'command' para la unit."
+        if not interval_seconds:
+            if not expression:
+                return "Error: se requiere 'expression' o 'plist_interval_seconds' para generar el timer."
+            ok, msg = _validate_expression(expression)
+            if not ok:
+                return f"Expresión cron inválida para systemd: {msg}"
+
+        service, timer = _build_systemd_units(
+            unit_name,
+            command,
+            expression=expression,
+            interval_seconds=interval_seconds,
+            description=description,
+            nice=nice,
+            ionice_class=ionice_class,
+            cpu_limit_seconds=cpu_limit_seconds,
+            memory_limit_mb=memory_limit_mb,
+            cpu_quota_percent=cpu_quota_percent,
+            io_weight=io_weight,
+        )
+
+        units_dir = os.path.expanduser("~/.config/systemd/user")
+        os.makedirs(units_dir, exist_ok=True)
+        service_path = os.path.join(units_dir, f"{unit_name}.service")
+        timer_path = os.path.join(units_dir, f"{unit_name}.timer")
+        with open(service_path, "w", encoding="utf-8") as f:
+            f.write(service)
+        with open(timer_path, "w", encoding="utf-8") as f:
+            f.write(timer)
+
+        return "\n".join([
+            "Units systemd generadas:",
+            f"  {service_path}",
+            f"  {timer_path}",
+            "",
+            "Para activar:",
+            f"  systemctl --user daemon-reload && systemctl --user enable --now {unit_name}.timer",
+            "",
+            "Para desactivar:",
+            f"  systemctl --user disable --now {unit_name}.timer",
+            "",
+            f"# {unit_name}.service",
+            service,
+            f"# {unit_name}.timer",
+            timer,
+        ])
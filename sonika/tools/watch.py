@@ -0,0 +1,582 @@
+"""WatchTool — triggers por eventos de archivos (inotify) como alternativa a cron de sondeo.
+
+Un trigger observa un directorio, filtra por glob y, tras una ventana de
+debounce sin eventos nuevos, ejecuta un comando de shell o un goal del agente.
+En Linux usa inotify vía ctypes (latencia de milisegundos, coste cero en reposo);
+en otras plataformas cae a un sondeo por ``os.scandir``.
+
+Ejecutar el daemon:  python -m sonika.tools.watch
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import logging
+import os
+import selectors
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Literal, Optional
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+WATCHES_FILE = Path.home() / ".sonika" / "watches.json"
+
+EVENT_NAMES = ("create", "write", "move", "delete")
+
+
+# ── Trigger model ─────────────────────────────────────────────────────────────
+
+@dataclass
+class WatchTrigger:
+    path: str
+    pattern: str = "*"
+    command: Optional[str] = None
+    goal: Optional[str] = None
+    debounce_ms: int = 500
+    events: list[str] = field(default_factory=lambda: ["write", "move"])
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    # Absolute directory actually watched, resolved once when the trigger is
+    # created (WatchTool._add) so a watched file may be deleted and recreated
+    directory: str = ""
+    # In-process action (embedding / tests); never persisted
+    callback: Optional[Callable[[str, str], None]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        if not self.directory:
+            # Triggers built directly or saved before ``directory`` existed
+            p = os.path.abspath(os.path.expanduser(self.path))
+            is_file = os.path.isfile(p) or (
+                not os.path.isdir(p) and self.pattern == os.path.basename(p)
+            )
+            self.directory = os.path.dirname(p) if is_file else p
+
+    def matches(self, directory: str, name: str, event: str) -> bool:
+        return (
+            event in self.events
+            and directory == self.directory
+            and fnmatch.fnmatch(name, self.pattern)
+        )
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("callback", None)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WatchTrigger":
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        known.pop("callback", None)
+        return cls(**known)
+
+
+def load_triggers(path: Path | None = None) -> list[WatchTrigger]:
+    path = path or WATCHES_FILE
+    if not path.exists():
+        return []
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        return []
+    return [WatchTrigger.from_dict(d) for d in data.get("triggers", [])]
+
+
+def save_triggers(triggers: list[WatchTrigger], path: Path | None = None) -> None:
+    path = path or WATCHES_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps({"triggers": [t.to_dict() for t in triggers]}, indent=2, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+# ── Watch backends ────────────────────────────────────────────────────────────
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HDR = struct.Struct("iIII")
+
+
+def _inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    libc = ctypes.util.find_library("c")
+    try:
+        return hasattr(ctypes.CDLL(libc or "libc.so.6"), "inotify_init1")
+    except OSError:
+        return False
+
+
+class _InotifyWatcher:
+    """Thin ctypes wrapper around inotify(7)."""
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: dict[int, str] = {}
+
+    def fileno(self) -> Optional[int]:
+        return self._fd
+
+    def add(self, directory: str) -> None:
+        if directory in self._dirs.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({directory}): {os.strerror(err)}")
+        self._dirs[wd] = directory
+
+    def read(self) -> list[tuple[str, str, str]]:
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events: list[tuple[str, str, str]] = []
+        offset = 0
+        while offset + _EVENT_HDR.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT_HDR.unpack_from(buf, offset)
+            offset += _EVENT_HDR.size
+            name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflow — some events were dropped")
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            if mask & _IN_CLOSE_WRITE:
+                events.append((directory, name, "write"))
+            if mask & _IN_MOVED_TO:
+                events.append((directory, name, "move"))
+            if mask & _IN_CREATE:
+                events.append((directory, name, "create"))
+            if mask & _IN_DELETE:
+                events.append((directory, name, "delete"))
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingWatcher:
+    """Portable fallback: diff ``os.scandir`` snapshots every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 1.0) -> None:
+        self.interval = interval
+        self._snapshots: dict[str, dict[str, tuple[float, int]]] = {}
+
+    def fileno(self) -> Optional[int]:
+        return None
+
+    @staticmethod
+    def _snapshot(directory: str) -> dict[str, tuple[float, int]]:
+        snap: dict[str, tuple[float, int]] = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    snap[entry.name] = (st.st_mtime, st.st_size)
+        except OSError:
+            pass
+        return snap
+
+    def add(self, directory: str) -> None:
+        self._snapshots.setdefault(directory, self._snapshot(directory))
+
+    def read(self) -> list[tuple[str, str, str]]:
+        events: list[tuple[str, str, str]] = []
+        for directory, before in self._snapshots.items():
+            after = self._snapshot(directory)
+            for name, sig in after.items():
+                if name not in before:
+                    events.append((directory, name, "create"))
+                    events.append((directory, name, "write"))
+                elif before[name] != sig:
+                    events.append((directory, name, "write"))
+            for name in before.keys() - after.keys():
+                events.append((directory, name, "delete"))
+            self._snapshots[directory] = after
+        return events
+
+    def close(self) -> None:
+        self._snapshots.clear()
+
+
+# ── Scheduler ─────────────────────────────────────────────────────────────────
+
+class WatchScheduler:
+    """Event loop that dispatches triggers after their debounce window.
+
+    With inotify the loop blocks in ``select`` with no timeout while idle, so
+    there are no periodic wake-ups.
+    """
+
+    def __init__(
+        self,
+        triggers: list[WatchTrigger],
+        on_goal: Optional[Callable[[WatchTrigger, str], None]] = None,
+        use_inotify: Optional[bool] = None,
+    ) -> None:
+        self.triggers = list(triggers)
+        self._on_goal = on_goal or _run_goal
+        if use_inotify is None:
+            use_inotify = _inotify_available()
+        self._watcher = _InotifyWatcher() if use_inotify else _PollingWatcher()
+        self._pending: dict[str, tuple[float, str, str]] = {}  # id -> (deadline, path, event)
+        self._children: list[subprocess.Popen] = []
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._stopped = False
+        self._closed = False
+        self.ready = threading.Event()
+        self.fired = 0
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if isinstance(self._watcher, _InotifyWatcher) else "polling"
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._closed:
+            return
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name="sonika-watch", daemon=True)
+        thread.start()
+        self.ready.wait(timeout=5)
+        return thread
+
+    def run(self) -> None:
+        for trigger in list(self.triggers):
+            try:
+                self._watcher.add(trigger.directory)
+            except OSError as exc:
+                # One bad trigger (directory removed, watch limit) must not
+                # stop the others
+                logger.error(f"Watch trigger {trigger.id} skipped: {exc}")
+                self.triggers.remove(trigger)
+
+        sel = selectors.DefaultSelector()
+        sel.register(self._wake_r, selectors.EVENT_READ)
+        fd = self._watcher.fileno()
+        if fd is not None:
+            sel.register(fd, selectors.EVENT_READ)
+        self.ready.set()
+
+        try:
+            while not self._stopped:
+                timeout: Optional[float] = None
+                if self._pending:
+                    nearest = min(d for d, _, _ in self._pending.values())
+                    timeout = max(0.0, nearest - time.monotonic())
+                if fd is None:
+                    poll_every = self._watcher.interval  # type: ignore[union-attr]
+                    timeout = poll_every if timeout is None else min(timeout, poll_every)
+
+                for key, _ in sel.select(timeout):
+                    if key.fd == self._wake_r:
+                        try:
+                            os.read(self._wake_r, 64)
+                        except BlockingIOError:
+                            pass
+                    else:
+                        self._collect(self._watcher.read())
+                if fd is None:
+                    self._collect(self._watcher.read())
+
+                self._fire_due()
+                self._reap()
+        finally:
+            self._closed = True
+            sel.close()
+            self._watcher.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _collect(self, events: list[tuple[str, str, str]]) -> None:
+        now = time.monotonic()
+        for directory, name, event in events:
+            for trigger in self.triggers:
+                if trigger.matches(directory, name, event):
+                    deadline = now + trigger.debounce_ms / 1000
+                    self._pending[trigger.id] = (deadline, os.path.join(directory, name), event)
+
+    def _fire_due(self) -> None:
+        now = time.monotonic()
+        due = [tid for tid, (deadline, _, _) in self._pending.items() if deadline <= now]
+        by_id = {t.id: t for t in self.triggers}
+        for tid in due:
+            _, path, event = self._pending.pop(tid)
+            trigger = by_id.get(tid)
+            if trigger is not None:
+                self._fire(trigger, path, event)
+
+    def _fire(self, trigger: WatchTrigger, path: str, event: str) -> None:
+        self.fired += 1
+        try:
+            if trigger.callback is not None:
+                trigger.callback(path, event)
+            if trigger.command:
+                env = dict(os.environ, SONIKA_WATCH_PATH=path, SONIKA_WATCH_EVENT=event)
+                self._children.append(
+                    subprocess.Popen(["/bin/sh", "-c", trigger.command], env=env)
+                )
+            if trigger.goal:
+                threading.Thread(
+                    target=self._on_goal,
+                    args=(trigger, path),
+                    name=f"sonika-watch-goal-{trigger.id}",
+                    daemon=True,
+                ).start()
+        except Exception as exc:
+            logger.error(f"Watch trigger {trigger.id} failed: {exc}")
+
+    def _reap(self) -> None:
+        self._children = [p for p in self._children if p.poll() is None]
+
+
+_GOAL_CONFIG = None
+
+
+def _run_goal(trigger: WatchTrigger, path: str) -> None:
+    """Run an agent goal headlessly with the active model from ~/.sonika/config.json."""
+    global _GOAL_CONFIG
+    from sonika.cli.config import Config
+    from sonika.factory import api_key_env, create_orchestrator
+
+    # One Config for the daemon's lifetime: it re-reads the file only when
+    # another process changed it
+    if _GOAL_CONFIG is None:
+        _GOAL_CONFIG = Config()
+    cfg = _GOAL_CONFIG
+    provider, model = cfg.active_provider, cfg.active_model
+    if not provider or not model:
+        logger.error("Watch goal skipped: no active model configured")
+        return
+    key = cfg.get_key(provider)
+    if key:
+        os.environ[api_key_env(provider)] = key
+    bot = create_orchestrator(
+        provider=provider,
+        model_name=model,
+        risk_level=0,
+        session_id=f"watch-{trigger.id}",
+    )
+    bot.run(goal=f"{trigger.goal}\n\n(Archivo: {path})")
+
+
+# ── Input schema ──────────────────────────────────────────────────────────────
+
+class WatchInput(BaseModel):
+    action: Literal["list", "add", "remove"] = Field(
+        description=(
+            "Action to perform: "
+            "'list' — show registered watch triggers; "
+            "'add' — register a trigger on a path (requires path + command or goal); "
+            "'remove' — delete a trigger by trigger_id."
+        )
+    )
+    path: Optional[str] = Field(
+        default=None,
+        description="Directory (or file) to watch, e.g. '/var/spool/incoming'.",
+    )
+    pattern: Optional[str] = Field(
+        default=None,
+        description="Glob filter on file names, e.g. '*.csv'. Defaults to '*'.",
+    )
+    command: Optional[str] = Field(
+        default=None,
+        description="Shell command to run; receives SONIKA_WATCH_PATH and SONIKA_WATCH_EVENT.",
+    )
+    goal: Optional[str] = Field(
+        default=None,
+        description="Agent goal to run when the trigger fires.",
+    )
+    debounce_ms: Optional[int] = Field(
+        default=None,
+        description="Quiet window in ms before firing; bursts collapse into one run. Default 500.",
+    )
+    events: Optional[list[str]] = Field(
+        default=None,
+        description="Events that fire the trigger: create, write, move, delete. Default ['write', 'move'].",
+    )
+    trigger_id: Optional[str] = Field(
+        default=None,
+        description="Trigger id for 'remove'.",
+    )
+
+
+# ── WatchTool ─────────────────────────────────────────────────────────────────
+
+class WatchTool(BaseTool):
+    name: str = "manage_watch"
+    description: str = (
+        "Gestiona triggers por eventos de archivos (inotify) como alternativa a crons de sondeo. "
+        "Acciones disponibles: "
+        "'list' — listar triggers registrados; "
+        "'add' — registrar trigger sobre un path con filtro glob y debounce (requiere path + command o goal); "
+        "'remove' — eliminar trigger por trigger_id."
+    )
+    args_schema: type[BaseModel] = WatchInput
+    risk_level: int = 0
+
+    def _run(self, **kwargs) -> str:  # type: ignore[override]
+        action = kwargs.get("action", "list")
+        try:
+            if action == "list":
+                return self._list()
+            elif action == "add":
+                return self._add(
+                    kwargs.get("path"),
+                    kwargs.get("pattern"),
+                    kwargs.get("command"),
+                    kwargs.get("goal"),
+                    kwargs.get("debounce_ms"),
+                    kwargs.get("events"),
+                )
+            elif action == "remove":
+                return self._remove(kwargs.get("trigger_id"))
+            else:
+                return f"Acción desconocida: {action!r}. Usa: list, add, remove."
+        except Exception as exc:
+            return f"Error en WatchTool({action}): {exc}"
+
+    # ── actions ───────────────────────────────────────────────────────────────
+
+    def _list(self) -> str:
+        triggers = load_triggers()
+        if not triggers:
+            return "No hay triggers de archivos registrados."
+        result = [f"Triggers registrados ({len(triggers)}):"]
+        for t in triggers:
+            action = f"cmd: {t.command}" if t.command else f"goal: {t.goal}"
+            result.append(
+                f"  [{t.id}] {t.path} ({t.pattern}) {','.join(t.events)} "
+                f"debounce={t.debounce_ms}ms → {action}"
+            )
+        return "\n".join(result)
+
+    def _add(
+        self,
+        path: Optional[str],
+        pattern: Optional[str],
+        command: Optional[str],
+        goal: Optional[str],
+        debounce_ms: Optional[int],
+        events: Optional[list[str]],
+    ) -> str:
+        if not path:
+            return "Error: se requiere 'path' para registrar un trigger."
+        if not command and not goal:
+            return "Error: se requiere 'command' o 'goal' para registrar un trigger."
+        if events:
+            unknown = [e for e in events if e not in EVENT_NAMES]
+            if unknown:
+                return f"Error: eventos desconocidos {unknown}. Usa: {', '.join(EVENT_NAMES)}."
+
+        # A file path watches its directory, filtered by the file name
+        directory = os.path.abspath(os.path.expanduser(path))
+        if os.path.isfile(directory):
+            pattern = pattern or os.path.basename(directory)
+            directory = os.path.dirname(directory)
+
+        trigger = WatchTrigger(
+            path=path,
+            pattern=pattern or "*",
+            command=command,
+            goal=goal,
+            debounce_ms=500 if debounce_ms is None else int(debounce_ms),
+            events=list(events) if events else ["write", "move"],
+            directory=directory,
+        )
+        if not os.path.isdir(trigger.directory):
+            return f"Error: el directorio no existe: {trigger.directory}"
+
+        triggers = load_triggers()
+        triggers.append(trigger)
+        save_triggers(triggers)
+
+        return "\n".join([
+            f"Trigger agregado [{trigger.id}]:",
+            f"  Path     : {trigger.directory}",
+            f"  Patrón   : {trigger.pattern}",
+            f"  Eventos  : {', '.join(trigger.events)}",
+            f"  Debounce : {trigger.debounce_ms}ms",
+            f"  Acción   : {command or goal}",
+            "Para activarlo ejecuta (o reinicia) el daemon:",
+            "  python -m sonika.tools.watch",
+        ])
+
+    def _remove(self, trigger_id: Optional[str]) -> str:
+        if not trigger_id:
+            return "Error: se requiere 'trigger_id' para eliminar un trigger."
+        triggers = load_triggers()
+        kept = [t for t in triggers if t.id != trigger_id]
+        if len(kept) == len(triggers):
+            return f"No se encontró el trigger: {trigger_id!r}"
+        save_triggers(kept)
+        return f"Trigger {trigger_id} eliminado."
+
+
+# ── Daemon entry ──────────────────────────────────────────────────────────────
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    while True:
+        triggers = load_triggers()
+        if not triggers:
+            print(f"Sin triggers en {WATCHES_FILE}")
+            return
+        scheduler = WatchScheduler(triggers)
+        reload = {"requested": False}
+
+        def _on_hup(signum, frame):
+            reload["requested"] = True
+            scheduler.stop()
+
+        signal.signal(signal.SIGHUP, _on_hup)
+        logger.info(f"Watching {len(triggers)} trigger(s) via {scheduler.backend}")
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            return
+        if not reload["requested"]:
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Token and cost accounting from provider-reported usage.
+
+Model chunks carry LangChain ``usage_metadata``: ``input_tokens`` and
+``output_tokens`` plus optional details (``input_token_details.cache_read``
+for prompt-cache hits, ``output_token_details.reasoning`` for thinking).
+Streamed chunks report deltas, so summing every chunk of a call gives its
+usage. :class:`TurnUsage` sums them per orchestrator role and prices each
+call with the provider and model that served it (:meth:`ModelInfo.cost_for`),
+which for a hedged request may be a secondary provider.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sonika.cli.models_catalog import get_model as get_model_info
+
+
+def usage_counts(usage: Optional[dict]) -> tuple[int, int, int, int]:
+    """(input, output, cached, thinking) tokens from a ``usage_metadata`` dict."""
+    if not usage:
+        return 0, 0, 0, 0
+    details_in = usage.get("input_token_details") or {}
+    details_out = usage.get("output_token_details") or {}
+    return (
+        int(usage.get("input_tokens", 0) or 0),
+        int(usage.get("output_tokens", 0) or 0),
+        int(details_in.get("cache_read", 0) or 0),
+        int(details_out.get("reasoning", 0) or 0),
+    )
+
+
+def usage_cost(provider: str, model_id: str, usage: Optional[dict]) -> float:
+    """USD cost of one ``usage_metadata`` dict; 0 for models not in the catalog."""
+    info = get_model_info(provider, model_id)
+    if info is None:
+        return 0.0
+    tin, tout, cached, _ = usage_counts(usage)
+    return info.cost_for(tin, tout, cached)
+
+
+@dataclass
+class Usage:
+    input: int = 0
+    output: int = 0
+    cached: int = 0
+    thinking: int = 0
+    cost: float = 0.0
+
+    def add(self, provider: str, model_id: str, usage: Optional[dict]) -> None:
+        tin, tout, cached, thinking = usage_counts(usage)
+        self.input += tin
+        self.output += tout
+        self.cached += cached
+        self.thinking += thinking
+        self.cost += usage_cost(provider, model_id, usage)
+
+    def to_dict(self) -> dict:
+        return {
+            "input": self.input,
+            "output": self.output,
+            "cached": self.cached,
+            "thinking": self.thinking,
+            "cost": round(self.cost, 8),
+        }
+
+
+@dataclass
+class TurnUsage:
+    """Usage of one user turn, split by the orchestrator role of each call."""
+
+    provider: str
+    roles: dict[str, Usage] = field(default_factory=dict)
+    models: dict[str, str] = field(default_factory=dict)
+
+    def observe(
+        self, role: str, model_id: str, usage: Optional[dict], provider: Optional[str] = None
+    ) -> None:
+        """Add one chunk's usage; ``provider`` defaults to the session's."""
+        if not usage:
+            return
+        self.roles.setdefault(role, Usage()).add(provider or self.provider, model_id, usage)
+        self.models[role] = model_id
+
+    @property
+    def seen(self) -> bool:
+        return bool(self.roles)
+
+    @property
+    def total(self) -> Usage:
+        total = Usage()
+        for u in self.roles.values():
+            total.input += u.input
+            total.output += u.output
+            total.cached += u.cached
+            total.thinking += u.thinking
+            total.cost += u.cost
+        return total
+
+    def to_dict(self) -> dict:
+        return {
+            **self.total.to_dict(),
+            "roles": {
+                role: {**u.to_dict(), "model": self.models.get(role, "")}
+                for role, u in self.roles.items()
+            },
+        }
+
+
+def chunk_role(
+    bot: Any, metadata: Optional[dict], default_model: str, served_model: Optional[str] = None
+) -> tuple[str, str]:
+    """(role, model id) that produced a streamed chunk.
+
+    With a :class:`sonika.routing.RoleRouter` the role and model of the call in
+    flight are known; otherwise the graph node name stands in for the role and
+    the session's model is assumed. ``served_model`` (a hedge winner's model,
+    :attr:`ModelUsage.model`) overrides the model.
+    """
+    router = getattr(bot, "role_router", None)
+    if router is not None and router.last_role:
+        role = router.last_role
+        model = router.last_model or router.routing[router.last_role]
+    else:
+        role = (metadata or {}).get("langgraph_node") or "agent"
+        model = default_model
+    return role, served_model or model
@@ -0,0 +1,28 @@
+"""
+Tests for the benchmark harness (baseline comparison and a fast benchmark).
+"""
+
+from benchmarks.suite import bench_persistence, compare
+
+
+def _results(**values):
+    return {"metrics": {k: {"value": v, "unit": "ms"} for k, v in values.items()}}
+
+
+def test_compare_flags_regressions_above_threshold_and_noise():
+    baseline = _results(turn_ms=10.0, session_save_ms=0.2, new_metric=1.0)
+    rows = {r["metric"]: r for r in compare(_results(turn_ms=16.0, session_save_ms=0.6), baseline)}
+    assert rows["turn_ms"]["ok"] is False          # +60% > 50%
+    assert rows["session_save_ms"]["ok"] is True   # 3x, but within the 0.5 ms noise floor
+    assert compare(_results(turn_ms=16.0), baseline, threshold=1.0)[0]["ok"] is True
+
+
+def test_compare_skips_metrics_missing_from_baseline():
+    assert compare(_results(turn_ms=1.0), {"metrics": {}}) == []
+
+
+def test_persistence_benchmark_runs_in_sandbox():
+    metrics = bench_persistence(turns=5, repeats=3, listed=5)
+    assert metrics["session_save_ms"].value > 0
+    assert metrics["session_load_ms"].unit == "ms"
+    assert metrics["session_list_ms"].value > 0
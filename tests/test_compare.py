@@ -0,0 +1,143 @@
+"""
+Tests for /compare (sonika.cli.compare) on the offline mock provider.
+"""
+
+import json
+import os
+
+import pytest
+
+from sonika.cli.compare import (
+    CompareResult,
+    compare,
+    default_targets,
+    export_keys,
+    format_results,
+    main,
+    parse_targets,
+)
+from sonika.cli.config import Config
+from sonika.config_schema import SonikaAppConfig
+from sonika.perf import PerfStore
+
+
+def _script(tmp_path, name, responses):
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps({"responses": responses}))
+    return str(path)
+
+
+def test_parse_targets():
+    assert parse_targets("google/gemini-2.5-flash, openai/o4-mini,google/gemini-2.5-flash") == [
+        ("google", "gemini-2.5-flash"),
+        ("openai", "o4-mini"),
+    ]
+    assert parse_targets("mock//tmp/a.json") == [("mock", "/tmp/a.json")]
+    with pytest.raises(ValueError):
+        parse_targets("gemini-2.5-flash")
+    with pytest.raises(ValueError):
+        parse_targets("acme/model")
+
+
+def test_default_targets(tmp_path):
+    config = Config(tmp_path)
+    app_config = SonikaAppConfig(config_dir=tmp_path)
+    assert default_targets(config, app_config) == []
+
+    config.set_key("google", "k")
+    config.set_key("openai", "k")
+    config.set_active("openai", "o4-mini")
+    targets = default_targets(config, app_config)
+    assert targets[0] == ("openai", "o4-mini")
+    assert [p for p, _ in targets] == ["openai", "google"]
+
+    app_config.compare_models = ["google/a", "google/b"]
+    assert default_targets(config, app_config) == [("google", "a"), ("google", "b")]
+
+
+def test_export_keys_only_exports_the_given_providers(tmp_path, monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "old")  # restored after the test
+    config = Config(tmp_path)
+    config.set_key("google", "g-key")
+    config.set_key("openai", "o-key")
+    export_keys(config, ["openai", "mock"])
+    assert os.environ["OPENAI_API_KEY"] == "o-key"
+    assert "GOOGLE_API_KEY" not in os.environ
+
+
+@pytest.mark.asyncio
+async def test_compare_runs_models_concurrently_through_the_orchestrator(tmp_path):
+    tools = _script(tmp_path, "tools", [
+        {"tool_calls": [{"name": "get_datetime", "args": {}}]},
+        {"text": "Hoy es lunes.", "delay_ms": 1},
+    ])
+    plain = _script(tmp_path, "plain", [
+        {"text": "No lo se.", "delay_ms": 1, "first_token_ms": 50},
+    ])
+    streamed: dict[int, list[str]] = {0: [], 1: []}
+    perf = PerfStore(tmp_path / "perf.json")
+
+    results = await compare(
+        "que dia es?",
+        [("mock", tools), ("mock", plain)],
+        SonikaAppConfig(config_dir=tmp_path),
+        on_token=lambda i, t: streamed[i].append(t),
+        perf=perf,
+    )
+
+    assert [r.model for r in results] == [tools, plain]
+    assert all(r.error is None for r in results)
+    assert results[0].tools == 1 and results[0].answer == "Hoy es lunes."
+    assert results[1].tools == 0 and results[1].answer == "No lo se."
+    assert "".join(streamed[1]) == "No lo se."
+    assert results[1].ttft_ms >= 50 and results[1].total_s * 1000 >= results[1].ttft_ms
+    assert all(r.tokens_out > 0 for r in results)
+    assert perf.stats("mock", tools).samples == 1
+    assert perf.stats("mock", plain).error_rate == 0
+
+    text = "\n".join(format_results(results))
+    assert "Hoy es lunes." in text and "TTFT" in text
+
+
+@pytest.mark.asyncio
+async def test_compare_reports_a_failing_model_without_stopping_the_others(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    ok = _script(tmp_path, "ok", [{"text": "Hola.", "delay_ms": 1}])
+    results = await compare(
+        "hola",
+        [("mock", ok), ("openai", "no-such-model")],
+        SonikaAppConfig(config_dir=tmp_path),
+    )
+    assert results[0].answer == "Hola." and results[0].error is None
+    assert results[1].error
+
+
+@pytest.mark.asyncio
+async def test_run_without_streamed_tokens_is_recorded_as_a_success(tmp_path, monkeypatch):
+    async def fake_run(index, provider, model, prompt, app_config, on_token):
+        result = CompareResult(provider, model)
+        result.total_s, result.tokens_out, result.answer = 1.5, 40, "Informe final."
+        return result
+
+    monkeypatch.setattr("sonika.cli.compare.run_one", fake_run)
+    perf = PerfStore(tmp_path / "perf.json")
+    await compare("hola", [("mock", "report-only")], SonikaAppConfig(config_dir=tmp_path), perf=perf)
+
+    stats = perf.stats("mock", "report-only")
+    assert stats.samples == 1 and stats.error_rate == 0
+    assert stats.ttft_ms is None and stats.tokens_per_s is None
+
+
+def test_headless_main_writes_json(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("pathlib.Path.home", lambda: tmp_path)
+    a = _script(tmp_path, "a", [{"text": "Uno.", "delay_ms": 1}])
+    b = _script(tmp_path, "b", [{"text": "Dos.", "delay_ms": 1}])
+    out = tmp_path / "out.json"
+
+    assert main(["hola", "-m", f"mock/{a}", "-m", f"mock/{b}", "--json", str(out)]) == 0
+
+    data = json.loads(out.read_text())
+    assert [d["answer"] for d in data] == ["Uno.", "Dos."]
+    assert "Uno." in capsys.readouterr().out
+    assert (tmp_path / ".sonika" / "perf.json").exists()
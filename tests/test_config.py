@@ -0,0 +1,80 @@
+"""
+Tests for the shared, file-locked Config (sonika.cli.config).
+"""
+
+import json
+import threading
+
+from sonika.cli.config import Config
+
+
+def _disk(tmp_path) -> dict:
+    return json.loads((tmp_path / "config.json").read_text(encoding="utf-8"))
+
+
+def test_instances_do_not_lose_each_others_updates(tmp_path):
+    a, b = Config(tmp_path), Config(tmp_path)
+    a.set_key("google", "g")
+    b.set_key("openai", "o")
+    b.set_active("openai", "o3")
+    assert _disk(tmp_path)["keys"] == {"google": "g", "openai": "o"}
+    assert a.get_key("openai") == "o" and a.active_model == "o3"
+
+
+def test_concurrent_writers_keep_every_key(tmp_path):
+    configs = [Config(tmp_path) for _ in range(8)]
+    threads = [
+        threading.Thread(target=c.set_key, args=(f"p{i}", str(i)))
+        for i, c in enumerate(configs)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert _disk(tmp_path)["keys"] == {f"p{i}": str(i) for i in range(8)}
+
+
+def test_reads_are_cached_until_the_file_changes(tmp_path, monkeypatch):
+    cfg = Config(tmp_path)
+    cfg.set_key("google", "g")
+    reads = []
+    original = Config._read_disk
+    monkeypatch.setattr(Config, "_read_disk", lambda self: reads.append(1) or original(self))
+    for _ in range(50):
+        assert cfg.get_key("google") == "g"
+    assert reads == []
+    # Our own save does not need to re-read the unchanged file either
+    cfg.set_active("google", "gemini-2.5-flash")
+    assert reads == []
+
+    Config(tmp_path).set_key("google", "g2")
+    assert cfg.get_key("google") == "g2" and len(reads) == 2
+
+
+def test_subscribers_hear_local_and_external_changes(tmp_path):
+    cfg = Config(tmp_path)
+    seen = []
+    unsubscribe = cfg.subscribe(seen.append)
+    cfg.set_key("google", "g")
+    cfg.set_key("google", "g")  # no-op: nothing changed
+    Config(tmp_path).set_active("google", "gemini-2.5-pro")
+    assert cfg.refresh() == {"active_provider", "active_model"}
+    assert seen == [{"keys"}, {"active_provider", "active_model"}]
+
+    unsubscribe()
+    cfg.set_key("openai", "o")
+    assert len(seen) == 2
+
+
+def test_writes_are_fsynced(tmp_path, monkeypatch):
+    import sonika.cli.config as config_module
+
+    calls = []
+    real = config_module.atomic_write_text
+    monkeypatch.setattr(
+        config_module,
+        "atomic_write_text",
+        lambda path, text, fsync=False: (calls.append(fsync), real(path, text, fsync=fsync)),
+    )
+    Config(tmp_path).set_key("google", "g")
+    assert calls == [True]
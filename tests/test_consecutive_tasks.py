@@ -7,7 +7,11 @@ Instrucción enviada al orquestador:
    y finalmente cuenta cuántas palabras tiene con bash."
 
 El orquestador debe planificar y ejecutar: write_file → read_file → run_bash
+
+La variante `_mock` usa el proveedor offline `mock` con un guion fijo, así que
+corre sin red ni API keys.
 """
+import json
 import os
 import pytest
 from dotenv import load_dotenv
@@ -58,3 +62,34 @@ def test_instruccion_unica_tres_herramientas(orchestrator, tmp_path):
     tool_names = [t.get("tool_name") or t.get("name") for t in tools]
     print(f"\nHerramientas ejecutadas: {tool_names}")
     print(f"Respuesta final: {result.content[:200]}")
+
+
+def test_instruccion_unica_tres_herramientas_mock(tmp_path):
+    from sonika.config_schema import SonikaAppConfig
+    from sonika.factory import create_orchestrator
+
+    target = str(tmp_path / "sonika_test.txt")
+    script = tmp_path / "script.json"
+    script.write_text(json.dumps({"responses": [
+        {"tool_calls": [{"name": "write_file", "args": {"path": target, "content": "hello from sonika"}}]},
+        {"thinking": "Verifico el archivo", "tool_calls": [{"name": "read_file", "args": {"path": target}}]},
+        {"tool_calls": [{"name": "run_bash", "args": {"command": f"wc -w < {target}"}}]},
+        {"text": "El archivo tiene 3 palabras."},
+    ]}))
+    orchestrator = create_orchestrator(
+        provider="mock",
+        model_name=str(script),
+        risk_level=2,
+        session_id="test-consecutive-mock",
+        config=SonikaAppConfig(config_dir=tmp_path),
+    )
+
+    result = orchestrator.run(goal="Crea, lee y cuenta las palabras del archivo")
+
+    tool_names = [t.get("tool_name") for t in result.tools_executed]
+    assert tool_names == ["write_file", "read_file", "run_bash"]
+    assert all(t["status"] == "success" for t in result.tools_executed)
+    assert "3" in result.tools_executed[-1]["output"]
+    assert result.content == "El archivo tiene 3 palabras."
+    with open(target) as f:
+        assert f.read() == "hello from sonika"
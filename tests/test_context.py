@@ -0,0 +1,89 @@
+"""
+Tests for context accounting and history compaction (sonika.context).
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from sonika.context import (
+    SUMMARY_TAG,
+    ContextAccount,
+    compact_history,
+    estimate_tokens,
+    message_tokens,
+    split_turns,
+)
+
+
+def _history(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages += [
+            HumanMessage(content=f"revisa el log numero {i}", id=f"h{i}"),
+            AIMessage(content="", tool_calls=[{"name": "read_file", "args": {"path": f"/tmp/{i}.log"}, "id": f"c{i}"}], id=f"a{i}"),
+            ToolMessage(content="linea de log\n" * 200, tool_call_id=f"c{i}", name="read_file", id=f"t{i}"),
+            AIMessage(content=f"El log {i} no tiene errores.", id=f"f{i}"),
+        ]
+    return messages
+
+
+def test_estimate_tokens_is_close_to_bpe_counts():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("hola mundo") == 2
+    # Long words split, punctuation and digits count separately
+    assert estimate_tokens("configuracion, 2024!") == 3 + 1 + 2 + 1
+    # Denser than the old len // 4 for code-like text
+    code = "def f(x):\n    return x[0] + 1\n"
+    assert estimate_tokens(code) > len(code) // 4
+
+
+def test_account_prefers_provider_usage():
+    account = ContextAccount(window=1000)
+    account.observe_estimate([HumanMessage(content="hola " * 100)])
+    assert not account.measured
+    assert account.observe_usage({"input_tokens": 700, "output_tokens": 50})
+    assert account.used == 750 and account.measured
+    assert account.fill == 0.75
+    assert not account.observe_usage({})
+    assert account.needs_compaction("x " * 100, threshold=0.8)
+    assert not ContextAccount(window=0, used=10**9).needs_compaction("x", 0.8)
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_recent_turns_and_pinned_facts():
+    messages = _history(6)
+    compacted, saved = await compact_history(messages, keep_turns=2, pinned=["el servidor es db-01"])
+
+    assert saved > 0
+    assert message_tokens(compacted) < message_tokens(messages)
+    summary = compacted[0].content
+    assert summary.startswith(SUMMARY_TAG)
+    assert "revisa el log numero 0" in summary
+    assert "- el servidor es db-01" in summary
+    # The last two turns are untouched, tool outputs included
+    assert compacted[2:] == messages[-8:]
+    assert [t[0].content for t in split_turns(compacted)][-2:] == [
+        "revisa el log numero 4", "revisa el log numero 5",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_compaction_uses_summarizer_and_falls_back():
+    messages = _history(4)
+
+    async def _summary(old):
+        return f"{len(old)} mensajes resumidos"
+
+    async def _broken(old):
+        raise RuntimeError("sin red")
+
+    compacted, _ = await compact_history(messages, keep_turns=1, summarize=_summary)
+    assert "12 mensajes resumidos" in compacted[0].content
+    compacted, _ = await compact_history(messages, keep_turns=1, summarize=_broken)
+    assert "revisa el log numero 0" in compacted[0].content
+
+
+@pytest.mark.asyncio
+async def test_nothing_to_compact():
+    messages = _history(2)
+    assert await compact_history(messages, keep_turns=4) == (messages, 0)
@@ -0,0 +1,132 @@
+"""
+Tests for CronTool helpers: command wrapping and systemd unit generation.
+
+Units are parsed offline with configparser — no systemd required.
+"""
+
+import configparser
+import shlex
+
+import pytest
+
+from sonika.tools.cron import (
+    _build_systemd_units,
+    _cron_to_oncalendar,
+    _wrap_command,
+)
+
+
+def _parse_unit(text: str) -> configparser.ConfigParser:
+    parser = configparser.ConfigParser(interpolation=None, strict=True)
+    parser.optionxform = str  # systemd keys are case-sensitive
+    parser.read_string(text)
+    return parser
+
+
+# ── _wrap_command ─────────────────────────────────────────────────────────────
+
+def test_wrap_command_passthrough():
+    assert _wrap_command("/scripts/backup.sh") == "/scripts/backup.sh"
+
+
+def test_wrap_command_skip_lock():
+    wrapped = _wrap_command("/scripts/backup.sh", single_instance="skip")
+    argv = shlex.split(wrapped)
+    assert argv[0] == "flock"
+    assert argv[1] == "-n"
+    assert argv[2].startswith("/tmp/sonika-cron-")
+    assert argv[-1] == "/scripts/backup.sh"
+
+
+def test_wrap_command_queue_lock_blocks():
+    argv = shlex.split(_wrap_command("job", single_instance="queue"))
+    assert argv[0] == "flock"
+    assert "-n" not in argv
+
+
+def test_wrap_command_lock_is_stable_per_command():
+    a = shlex.split(_wrap_command("job a", single_instance="skip"))[2]
+    b = shlex.split(_wrap_command("job a", single_instance="skip"))[2]
+    c = shlex.split(_wrap_command("job b", single_instance="skip"))[2]
+    assert a == b
+    assert a != c
+
+
+def test_wrap_command_nice_ionice_rlimits():
+    wrapped = _wrap_command(
+        "tar czf /tmp/x.tgz /data",
+        nice=10,
+        ionice_class=3,
+        cpu_limit_seconds=60,
+        memory_limit_mb=512,
+    )
+    argv = shlex.split(wrapped)
+    assert argv[:6] == ["nice", "-n", "10", "ionice", "-c", "3"]
+    assert argv[6:8] == ["/bin/sh", "-c"]
+    assert argv[8] == "ulimit -t 60; ulimit -v 524288; tar czf /tmp/x.tgz /data"
+
+
+def test_wrap_command_invalid_policy():
+    with pytest.raises(ValueError):
+        _wrap_command("job", single_instance="parallel")
+
+
+# ── systemd ───────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize(
+    "expr,expected",
+    [
+        ("0 3 * * *", "*-*-* 03:00:00"),
+        ("*/15 * * * *", "*-*-* *:00/15:00"),
+        ("30 9 * * 1-5", "Mon..Fri *-*-* 09:30:00"),
+        ("0 0 1 1,7 *", "*-01,07-01 00:00:00"),
+        ("0 12 * * 0", "Sun *-*-* 12:00:00"),
+        ("0 9 1-15/2 * *", "*-*-01..15/2 09:00:00"),
+        ("0 9 * * 0-7", "*-*-* 09:00:00"),
+        ("0 9 * * 7", "Sun *-*-* 09:00:00"),
+        ("0 9 * * 5-7", "Fri..Sun *-*-* 09:00:00"),
+        ("0 9 * * 0-2", "Mon..Tue,Sun *-*-* 09:00:00"),
+    ],
+)
+def test_cron_to_oncalendar(expr, expected):
+    assert _cron_to_oncalendar(expr) == expected
+
+
+def test_systemd_units_parse_with_limits():
+    service, timer = _build_systemd_units(
+        "backup",
+        "/scripts/backup.sh --gzip 50%",
+        expression="0 3 * * *",
+        nice=5,
+        ionice_class=3,
+        memory_limit_mb=256,
+        cpu_quota_percent=50,
+        io_weight=20,
+    )
+
+    svc = _parse_unit(service)
+    assert svc["Service"]["Type"] == "oneshot"
+    assert svc["Service"]["CPUQuota"] == "50%"
+    assert svc["Service"]["MemoryMax"] == "256M"
+    assert svc["Service"]["IOWeight"] == "20"
+    assert svc["Service"]["Nice"] == "5"
+    assert svc["Service"]["IOSchedulingClass"] == "idle"
+    # '%' must be escaped as a systemd specifier
+    assert svc["Service"]["ExecStart"].endswith("50%%'")
+
+    tmr = _parse_unit(timer)
+    assert tmr["Timer"]["OnCalendar"] == "*-*-* 03:00:00"
+    assert tmr["Timer"]["Unit"] == "backup.service"
+    assert tmr["Install"]["WantedBy"] == "timers.target"
+
+
+def test_systemd_units_interval():
+    _, timer = _build_systemd_units("poll", "true", interval_seconds=300)
+    tmr = _parse_unit(timer)
+    assert tmr["Timer"]["OnUnitActiveSec"] == "300s"
+    assert "OnCalendar" not in tmr["Timer"]
+
+
+def test_systemd_units_require_schedule():
+    with pytest.raises(ValueError):
+        _build_systemd_units("x", "true")
@@ -0,0 +1,158 @@
+"""
+Tests for the process-level orchestrator cache in sonika.factory.
+
+_build_orchestrator is patched, so no model client or graph is created.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from sonika import factory
+from sonika.config_schema import SonikaAppConfig
+
+
+class _FakeMemory:
+    def __init__(self, memory_path):
+        self.memory_path = memory_path
+        self.sessions_dir = os.path.join(memory_path, "sessions")
+
+
+class _FakeGraph:
+    checkpointer = None
+
+
+class _FakeBot:
+    """The session-scoped attributes of an OrchestratorBot."""
+
+    def __init__(self, memory_path):
+        self.memory_manager = _FakeMemory(memory_path)
+        self.skills_dir = self.memory_manager.sessions_dir.replace("sessions", "skills")
+        self.checkpointer = MemorySaver()
+        self.graph = _FakeGraph()
+        self.graph.checkpointer = self.checkpointer
+        self._last_resume_command = None
+        self._abort_requested = False
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+
+    def fake_build(provider, model_name, risk_level, session_path, prompts_dir, config, **kwargs):
+        calls.append((provider, model_name))
+        return _FakeBot(session_path)
+
+    factory.clear_orchestrator_cache()
+    monkeypatch.setattr(factory, "_build_orchestrator", fake_build)
+    monkeypatch.setenv("GOOGLE_API_KEY", "k1")
+    yield calls
+    factory.clear_orchestrator_cache()
+
+
+def _cfg(tmp_path) -> SonikaAppConfig:
+    return SonikaAppConfig(config_dir=Path(tmp_path))
+
+
+def test_cache_reuses_bot_and_swaps_memory(builds, tmp_path):
+    cfg = _cfg(tmp_path)
+    a = factory.create_orchestrator("google", "gemini-2.5-flash", 2, "s1", config=cfg, use_cache=True)
+    b = factory.create_orchestrator("google", "gemini-2.5-flash", 2, "s2", config=cfg, use_cache=True)
+
+    assert a is b
+    assert len(builds) == 1
+    assert b.memory_manager.memory_path == os.path.join(str(tmp_path), "memory", "s2")
+    assert os.path.isdir(tmp_path / "memory" / "s2")
+
+
+def test_rebind_resets_session_state(builds, tmp_path):
+    cfg = _cfg(tmp_path)
+    bot = factory.create_orchestrator("google", "m", 2, "s1", config=cfg, use_cache=True)
+    old_saver = bot.checkpointer
+    bot._last_resume_command = object()
+    bot._abort_requested = True
+
+    assert factory.create_orchestrator("google", "m", 2, "s2", config=cfg, use_cache=True) is bot
+    assert bot.skills_dir == os.path.join(str(tmp_path), "memory", "s2", "skills")
+    assert bot._last_resume_command is None and bot._abort_requested is False
+    assert bot.checkpointer is not old_saver and bot.graph.checkpointer is bot.checkpointer
+
+
+def test_cache_misses_on_model_key_and_groups(builds, tmp_path, monkeypatch):
+    cfg = _cfg(tmp_path)
+    factory.create_orchestrator("google", "gemini-2.5-flash", 2, "s1", config=cfg, use_cache=True)
+    factory.create_orchestrator("google", "gemini-2.5-pro", 2, "s1", config=cfg, use_cache=True)
+    monkeypatch.setenv("GOOGLE_API_KEY", "k2")
+    factory.create_orchestrator("google", "gemini-2.5-pro", 2, "s1", config=cfg, use_cache=True)
+    cfg.tool_groups = ["core"]
+    factory.create_orchestrator("google", "gemini-2.5-pro", 2, "s1", config=cfg, use_cache=True)
+    assert len(builds) == 4
+
+
+def test_cache_misses_when_prompts_change(builds, tmp_path):
+    prompts = tmp_path / "prompts"
+    prompts.mkdir()
+    (prompts / "core.txt").write_text("v1")
+    cfg = _cfg(tmp_path)
+    cfg.prompts_dir = str(prompts)
+
+    factory.create_orchestrator("google", "m", 2, "s1", config=cfg, use_cache=True)
+    (prompts / "core.txt").write_text("version 2")
+    factory.create_orchestrator("google", "m", 2, "s1", config=cfg, use_cache=True)
+    assert len(builds) == 2
+
+
+def test_no_cache_by_default(builds, tmp_path):
+    cfg = _cfg(tmp_path)
+    a = factory.create_orchestrator("google", "m", 2, "s1", config=cfg)
+    b = factory.create_orchestrator("google", "m", 2, "s1", config=cfg)
+    assert a is not b
+
+
+def test_cache_is_bounded(builds, tmp_path):
+    cfg = _cfg(tmp_path)
+    for i in range(factory._CACHE_MAX + 2):
+        factory.create_orchestrator("google", f"m{i}", 2, "s", config=cfg, use_cache=True)
+    assert len(factory._ORCHESTRATOR_CACHE) == factory._CACHE_MAX
+
+
+def test_cached_hit_is_fast(builds, tmp_path):
+    cfg = _cfg(tmp_path)
+    factory.create_orchestrator("google", "m", 2, "s0", config=cfg, use_cache=True)
+    t0 = time.perf_counter()
+    for i in range(20):
+        factory.create_orchestrator("google", "m", 2, f"s{i}", config=cfg, use_cache=True)
+    per_call_ms = (time.perf_counter() - t0) * 1000 / 20
+    assert per_call_ms < 10
+
+
+def test_concurrent_misses_build_once(monkeypatch, tmp_path):
+    calls = []
+
+    def slow_build(provider, model_name, risk_level, session_path, prompts_dir, config, **kwargs):
+        calls.append(session_path)
+        time.sleep(0.05)
+        return _FakeBot(session_path)
+
+    factory.clear_orchestrator_cache()
+    monkeypatch.setattr(factory, "_build_orchestrator", slow_build)
+    monkeypatch.setenv("GOOGLE_API_KEY", "k1")
+    cfg = _cfg(tmp_path)
+    bots = []
+    threads = [
+        threading.Thread(target=lambda sid=sid: bots.append(
+            factory.create_orchestrator("google", "m", 2, sid, config=cfg, use_cache=True)
+        ))
+        for sid in ("s1", "s2")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    factory.clear_orchestrator_cache()
+
+    assert len(calls) == 1 and bots[0] is bots[1]
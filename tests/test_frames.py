@@ -0,0 +1,130 @@
+"""
+Tests for frame-paced rendering (sonika.cli.frames).
+"""
+
+import asyncio
+import io
+from contextlib import redirect_stdout
+
+import pytest
+
+from sonika.cli.frames import FrameQueue
+
+
+class _Recorder:
+    """Duck-typed renderer recording calls and frame boundaries."""
+
+    def __init__(self):
+        self.calls = []
+
+    def begin_frame(self):
+        self.calls.append(("begin",))
+
+    def end_frame(self):
+        self.calls.append(("end",))
+
+    def __getattr__(self, name):
+        if not name.startswith("show_"):
+            raise AttributeError(name)
+        return lambda *args: self.calls.append((name, *args))
+
+    def shown(self):
+        return [c for c in self.calls if c[0] not in ("begin", "end")]
+
+
+@pytest.mark.asyncio
+async def test_tokens_and_thinking_coalesce_within_a_frame():
+    r = _Recorder()
+    frames = FrameQueue(r, fps=1000).start()
+    await frames.put("show_thinking", "a", 1)
+    await frames.put("show_thinking", "\nb", 2)
+    for tok in ("Hola", " ", "mundo"):
+        await frames.put("show_token", tok, True)
+    await frames.put("show_tool_start", "get_datetime", "")
+    await frames.put("show_token", "Listo", False)
+    await frames.put("show_token", ".", False)
+    await frames.close()
+
+    assert r.shown() == [
+        ("show_thinking", "a\nb", 2),
+        ("show_token", "Hola mundo", True),
+        ("show_tool_start", "get_datetime", ""),
+        ("show_token", "Listo.", False),
+    ]
+    assert r.calls[0] == ("begin",) and r.calls[-1] == ("end",)
+    assert frames.queued == 8 and frames.frames == 1
+
+
+@pytest.mark.asyncio
+async def test_render_task_draws_at_most_fps_frames():
+    r = _Recorder()
+    frames = FrameQueue(r, fps=20).start()
+    for i in range(100):
+        await frames.put("show_token", f"{i} ", False)
+        await asyncio.sleep(0.002)
+    await frames.close()
+
+    assert "".join(c[1] for c in r.shown()) == "".join(f"{i} " for i in range(100))
+    # ~0.2 s of streaming at 20 fps: a handful of frames, not 100 writes
+    assert 2 <= frames.frames <= 10
+
+
+@pytest.mark.asyncio
+async def test_unpaced_queue_renders_each_call():
+    r = _Recorder()
+    frames = FrameQueue(r, fps=0).start()
+    await frames.put("show_token", "a", True)
+    await frames.put("show_token", "b", True)
+    assert r.shown() == [("show_token", "a", True), ("show_token", "b", True)]
+    assert frames.frames == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_waits_for_the_renderer():
+    r = _Recorder()
+    frames = FrameQueue(r, fps=50, maxsize=2).start()
+    await frames.put("show_system", "1")
+    await frames.put("show_system", "2")
+    await frames.put("show_system", "3")  # waits for a frame to make room
+    await frames.drain()
+    assert [c[1] for c in r.shown()] == ["1", "2", "3"]
+    await frames.close()
+
+
+@pytest.mark.asyncio
+async def test_renderer_errors_surface_on_the_next_put():
+    class _Broken(_Recorder):
+        def show_tool_start(self, *args):
+            raise RuntimeError("terminal gone")
+
+    frames = FrameQueue(_Broken(), fps=1000).start()
+    await frames.put("show_tool_start", "x", "")
+    await asyncio.sleep(0.01)
+    with pytest.raises(RuntimeError, match="terminal gone"):
+        await frames.put("show_token", "a", True)
+    await frames.close()
+
+
+def test_claude_style_frame_is_one_write():
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    class _Out(io.StringIO):
+        writes = 0
+
+        def write(self, text):
+            self.writes += 1
+            return super().write(text)
+
+    out = _Out()
+    with redirect_stdout(out):
+        renderer = ClaudeStyleRenderer()
+        renderer.show_ai_start("mock", "m")
+        out.writes = 0
+        renderer.begin_frame()
+        renderer.show_token("Hola ", is_pre_tool=False)
+        renderer.show_tool_start("get_datetime", "")
+        renderer.show_token("mundo", is_pre_tool=False)
+        renderer.end_frame()
+
+    assert out.writes == 1
+    assert "Hola " in out.getvalue() and "get_datetime" in out.getvalue()
@@ -0,0 +1,123 @@
+"""
+Tests for hedged requests (sonika.hedging) with two mock providers.
+"""
+
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from sonika.hedging import HedgedChatModel, LatencyTracker
+from sonika.mock_provider import MockChatModel
+
+_MSGS = [SystemMessage(content="sys"), HumanMessage(content="hola")]
+
+
+def _mock(text, first_token_ms=0, fail=False):
+    response = {"text": text, "first_token_ms": first_token_ms}
+    if fail:
+        response["rate_limit"] = 99
+    return MockChatModel(script={"responses": [response], "loop": True})
+
+
+def _hedged(primary, secondary, **tracker_kwargs):
+    tracker = LatencyTracker(default_ms=50, min_ms=10, **tracker_kwargs)
+    model = HedgedChatModel(
+        primary=primary,
+        primary_provider="google",
+        secondaries={"openai": (secondary, {})},
+        secondary_models={"openai": "o4-mini"},
+        tracker=tracker,
+    )
+    return model, tracker
+
+
+async def _text(model):
+    return "".join([c.content async for c in model.astream(_MSGS)])
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    model, tracker = _hedged(_mock("primario"), _mock("secundario"))
+    assert await _text(model) == "primario"
+    assert tracker.hedges == 0
+    assert len(tracker.samples("google")) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    slow, fast = _mock("primario", first_token_ms=1000), _mock("secundario", first_token_ms=20)
+    model, tracker = _hedged(slow, fast)
+
+    t0 = time.perf_counter()
+    assert await _text(model) == "secundario"
+    assert time.perf_counter() - t0 < 0.5
+    assert (tracker.hedges, tracker.hedge_wins) == (1, 1)
+    # The cancelled primary is recorded as at least that slow
+    assert tracker.samples("google")[0] >= 50
+    # The secondary is timed from its own request, not from the primary's
+    assert tracker.samples("openai")[0] < 50
+
+
+@pytest.mark.asyncio
+async def test_primary_that_recovers_first_wins():
+    model, tracker = _hedged(
+        _mock("primario", first_token_ms=80), _mock("secundario", first_token_ms=1000)
+    )
+    assert await _text(model) == "primario"
+    assert (tracker.hedges, tracker.hedge_wins) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_hedge_cap_waits_for_primary():
+    model, tracker = _hedged(
+        _mock("primario", first_token_ms=120), _mock("secundario"), max_hedges=0
+    )
+    assert await _text(model) == "primario"
+    assert tracker.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_primary_fails_over():
+    model, tracker = _hedged(_mock("x", fail=True), _mock("secundario"))
+    assert await _text(model) == "secundario"
+    response = await model.ainvoke(_MSGS)
+    assert response.content == "secundario"
+    assert tracker.hedge_wins == 2
+
+
+@pytest.mark.asyncio
+async def test_output_names_the_provider_that_served_it():
+    model, _ = _hedged(_mock("x", fail=True), _mock("secundario"))
+    # LangChain closes the stream with an empty chunk of its own
+    chunks = [c async for c in model.astream(_MSGS) if c.content]
+    assert chunks and all(
+        c.response_metadata.get("sonika_provider") == "openai"
+        and c.response_metadata.get("sonika_model") == "o4-mini"
+        for c in chunks
+    )
+    response = await model.ainvoke(_MSGS)
+    assert response.response_metadata["sonika_provider"] == "openai"
+
+    model, _ = _hedged(_mock("primario"), _mock("secundario"))
+    chunks = [c async for c in model.astream(_MSGS)]
+    assert all("sonika_provider" not in c.response_metadata for c in chunks)
+
+
+def test_hedge_cap_is_a_rolling_window():
+    tracker = LatencyTracker(max_hedges=2, hedge_window_s=0.05)
+    assert tracker.try_hedge() and tracker.try_hedge()
+    assert not tracker.try_hedge() and not tracker.can_hedge()
+    time.sleep(0.06)
+    assert tracker.try_hedge()
+    assert tracker.hedges == 3
+
+
+def test_threshold_follows_latency_distribution():
+    tracker = LatencyTracker(default_ms=4000, min_ms=100, min_samples=5)
+    assert tracker.threshold_ms("google") == 4000
+    for ms in (200, 220, 250, 300, 900):
+        tracker.record("google", ms)
+    assert tracker.threshold_ms("google") == 900
+    tracker.record("openai", 150)
+    assert tracker.fastest(["deepseek", "google", "openai"]) == "openai"
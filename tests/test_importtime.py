@@ -0,0 +1,50 @@
+"""
+Cold-start regression harness.
+
+Each CLI entry module is imported in a fresh interpreter under
+``python -X importtime``; the test fails when it exceeds its budget
+(sonika.cli.importtime.BUDGETS_MS, or SONIKA_IMPORT_BUDGET_MS) or imports
+a heavy dependency eagerly.
+"""
+
+import pytest
+
+from sonika.cli.importtime import (
+    BUDGETS_MS,
+    HEAVY_MODULES,
+    budget_for,
+    measure,
+    parse_importtime,
+)
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | io
+import time:        50 |         50 |     json.scanner
+import time:       200 |        250 |   json.decoder
+import time:       100 |        350 | json
+"""
+
+
+def test_parse_importtime():
+    profile = parse_importtime(SAMPLE)
+    assert [e.module for e in profile.entries] == ["_io", "io", "json.scanner", "json.decoder", "json"]
+    assert [e.depth for e in profile.entries] == [1, 0, 2, 1, 0]
+    assert profile.total_us == 770
+    assert profile.cumulative_ms("json") == pytest.approx(0.35)
+    assert profile.cumulative_ms("missing") == 0.0
+    assert profile.top(1)[0].module == "io"
+    assert profile.imported(["json", "yaml"]) == ["json"]
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_cold_start_budget(module):
+    profile = measure(module, runs=3)
+    heavy = profile.imported(HEAVY_MODULES)
+    assert not heavy, f"{module} imports heavy modules eagerly: {heavy}"
+
+    cost = profile.cumulative_ms(module)
+    budget = budget_for(module)
+    slowest = ", ".join(f"{e.module}={e.self_us / 1000:.1f}ms" for e in profile.top(5))
+    assert cost <= budget, f"{module} took {cost:.1f}ms > {budget:.0f}ms ({slowest})"
@@ -0,0 +1,117 @@
+"""
+Tests for the local LLM response cache (sonika.llm_cache).
+
+The wrapped provider is a scripted fake chat model; the SQLite file lives in
+tmp_path.
+"""
+
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.tools import tool
+
+from sonika.llm_cache import CachedChatModel, LLMCache
+
+
+class _Scripted(GenericFakeChatModel):
+    calls: int = 0
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[t.name for t in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+@tool
+def read_log(path: str) -> str:
+    """Read a log file."""
+    return path
+
+
+@tool
+def grep_log(pattern: str) -> str:
+    """Search a log file."""
+    return pattern
+
+
+def _model(tmp_path, *responses, **cache_kwargs):
+    inner = _Scripted(messages=iter(list(responses)))
+    cache = LLMCache(tmp_path / "cache.sqlite", **cache_kwargs)
+    return CachedChatModel(inner=inner, store=cache, model_key="fake/m"), inner, cache
+
+
+_PROMPT = [SystemMessage(content="You are Sonika."), HumanMessage(content="summarize today's log")]
+
+
+async def _text(model, messages):
+    chunks = [c async for c in model.astream(messages)]
+    return chunks, "".join(c.content for c in chunks if isinstance(c.content, str))
+
+
+@pytest.mark.asyncio
+async def test_hit_replays_as_stream(tmp_path):
+    model, inner, cache = _model(tmp_path, AIMessage(content="all quiet on the log front"))
+
+    _, first = await _text(model, _PROMPT)
+    chunks, second = await _text(model, _PROMPT)
+
+    assert first == second == "all quiet on the log front"
+    assert inner.calls == 1
+    assert len([c for c in chunks if c.content]) > 1
+    st = cache.stats()
+    assert (st["hits"], st["misses"], st["entries"]) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_replay_with_fresh_ids(tmp_path):
+    call = {"name": "read_log", "args": {"path": "/var/log/x"}, "id": "c1"}
+    model, inner, _ = _model(tmp_path, AIMessage(content="", tool_calls=[call]))
+    bound = model.bind_tools([read_log])
+
+    first = await bound.ainvoke(_PROMPT)
+    second = await bound.ainvoke(_PROMPT)
+
+    assert inner.calls == 1
+    assert second.tool_calls[0]["name"] == "read_log"
+    assert second.tool_calls[0]["args"] == {"path": "/var/log/x"}
+    assert second.tool_calls[0]["id"] != first.tool_calls[0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_key_ignores_trailing_whitespace_but_not_indentation_or_tools(tmp_path):
+    model, inner, _ = _model(
+        tmp_path, AIMessage(content="a"), AIMessage(content="b"), AIMessage(content="c")
+    )
+
+    await model.bind_tools([read_log]).ainvoke(_PROMPT)
+    trailing = [SystemMessage(content="You are Sonika.\n"), HumanMessage(content="summarize today's log  ")]
+    assert (await model.bind_tools([read_log]).ainvoke(trailing)).content == "a"
+    indented = [SystemMessage(content="You are Sonika."), HumanMessage(content="  summarize today's log")]
+    assert (await model.bind_tools([read_log]).ainvoke(indented)).content == "b"
+    assert (await model.bind_tools([read_log, grep_log]).ainvoke(_PROMPT)).content == "c"
+    assert inner.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_calls_without_system_prompt_bypass_cache(tmp_path):
+    model, inner, cache = _model(tmp_path, AIMessage(content="1"), AIMessage(content="2"))
+    await model.ainvoke([HumanMessage(content="ping")])
+    await model.ainvoke([HumanMessage(content="ping")])
+    assert inner.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = LLMCache(tmp_path / "c.sqlite", ttl_seconds=60, max_bytes=200)
+    cache.put("old", "m", {"content": "x" * 80, "tool_calls": []})
+    cache.put("new", "m", {"content": "y" * 80, "tool_calls": []})
+    cache.put("newest", "m", {"content": "z" * 80, "tool_calls": []})
+    assert cache.get("old") is None
+    assert cache.get("newest") is not None
+
+    cache._conn.execute("UPDATE responses SET created = ?", (time.time() - 120,))
+    assert cache.get("newest") is None
@@ -0,0 +1,140 @@
+"""
+Tests for incremental Markdown block splitting (sonika.cli.markdown_stream)
+and its use by the terminal renderer.
+"""
+
+import io
+from contextlib import redirect_stdout
+
+from sonika.cli.markdown_stream import MarkdownStream
+
+_DOC = (
+    "Hola **mundo**,\nsegunda linea.\n\n"
+    "```python\nx = 1\n\ny = 2\n```\n"
+    "- uno\n\n- dos\n  sigue\n\nDespues de la lista.\n"
+    "# Titulo\n"
+    "| a | b |\n|---|---|\n| 1 | 2 |\n\n"
+    "Subtitulo\n---\n"
+    "fin"
+)
+
+_BLOCKS = [
+    "Hola **mundo**,\nsegunda linea.",
+    "```python\nx = 1\n\ny = 2\n```",
+    "- uno\n\n- dos\n  sigue",
+    "Despues de la lista.",
+    "# Titulo",
+    "| a | b |\n|---|---|\n| 1 | 2 |",
+    "Subtitulo\n---",
+    "fin",
+]
+
+
+def _split(text, step, **kwargs):
+    stream = MarkdownStream(**kwargs)
+    blocks = []
+    for i in range(0, len(text), step):
+        blocks += stream.feed(text[i:i + step])
+    return blocks + stream.finish()
+
+
+def test_blocks_are_the_same_whatever_the_chunking():
+    for step in (1, 3, 7, len(_DOC)):
+        assert _split(_DOC, step) == _BLOCKS
+
+
+def test_block_is_reported_when_it_completes():
+    stream = MarkdownStream()
+    assert stream.feed("Un parrafo") == []
+    assert stream.tail == "Un parrafo"
+    assert stream.feed(" largo.\n") == []
+    assert stream.feed("\n```\ncodigo") == ["Un parrafo largo."]
+    assert stream.tail == "```\ncodigo"
+    assert stream.feed("\n```") == []  # the fence line is not complete yet
+    assert stream.feed("\n") == ["```\ncodigo\n```"]
+    assert stream.tail == "" and stream.finish() == []
+
+
+def test_unclosed_fence_and_list_end_at_finish():
+    assert _split("- a\n- b\n\n", 2) == ["- a\n- b"]
+    assert _split("```\nsin cerrar\n", 4) == ["```\nsin cerrar"]
+
+
+def test_thematic_break_closes_a_list():
+    assert _split("- a\n- b\n---\nz", 1) == ["- a\n- b", "---", "z"]
+    assert _split("* a\n* * *\nz", 3) == ["* a", "* * *", "z"]
+
+
+def test_max_lines_splits_long_blocks_keeping_fences_balanced():
+    code = "```py\n" + "".join(f"x{i}\n" for i in range(7)) + "```\n"
+    blocks = _split(code, 5, max_lines=4)
+    assert all(b.startswith("```py\n") and b.endswith("\n```") for b in blocks)
+    assert "".join(b.split("\n", 1)[1].rsplit("\n", 1)[0] + "\n" for b in blocks) == "".join(
+        f"x{i}\n" for i in range(7)
+    )
+    assert _split("a\nb\nc\nd\ne\n", 1, max_lines=2) == ["a\nb", "c\nd", "e"]
+
+
+def test_max_lines_counts_wrapped_rows_of_a_line_without_newlines():
+    stream = MarkdownStream(max_lines=20, width=80)
+    blocks = []
+    for _ in range(3000):
+        blocks += stream.feed("palabra ")
+        assert len(stream.tail) < 20 * 80
+    blocks += stream.finish()
+    assert len(blocks) > 1 and all(len(b) < 20 * 80 for b in blocks)
+    assert " ".join(blocks).split() == ["palabra"] * 3000
+
+
+def test_renderer_draws_each_block_once_without_a_final_rerender():
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    out = io.StringIO()
+    with redirect_stdout(out):
+        renderer = ClaudeStyleRenderer()
+        renderer._console.width = 60
+        rendered = []
+        print_blocks = renderer._print_blocks
+        renderer._print_blocks = lambda blocks: (rendered.extend(blocks), print_blocks(blocks))
+        renderer.show_ai_start("mock", "m")
+        for i in range(0, len(_DOC), 4):
+            renderer.show_token(_DOC[i:i + 4], is_pre_tool=False)
+        assert rendered == _BLOCKS[:-1]  # "fin" is still the provisional tail
+        renderer.show_final_response(_DOC)
+        renderer.show_ai_end(1.0, "mock", "m")
+
+    assert rendered == _BLOCKS
+    assert "Titulo" in out.getvalue()
+
+
+def test_renderer_renders_an_answer_that_was_not_streamed():
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    out = io.StringIO()
+    with redirect_stdout(out):
+        renderer = ClaudeStyleRenderer()
+        renderer.show_ai_start("mock", "m")
+        renderer.show_token("Voy a mirar.", is_pre_tool=True)
+        renderer.show_tool_start("get_datetime", "")
+        renderer.show_final_response("Informe **final**")
+
+    text = out.getvalue()
+    assert "Voy a mirar." in text and "Informe final" in text
+
+
+def test_renderer_dims_narration_before_a_tool_call():
+    from rich.console import Console
+
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    out = io.StringIO()
+    with redirect_stdout(out):
+        renderer = ClaudeStyleRenderer()
+        renderer._console = Console(highlight=False, color_system="truecolor", force_terminal=True)
+        renderer.show_ai_start("mock", "m")
+        renderer.show_token("Voy a **mirar**.\n\n", is_pre_tool=True)
+        renderer.show_tool_start("get_datetime", "")
+
+    narration = out.getvalue().split("●")[1].split("▸")[0]
+    assert "mirar" in narration and "\x1b[2m" in narration
+    assert "38;2;166;227;161" not in out.getvalue()  # no green answer bullet
@@ -0,0 +1,104 @@
+"""
+Tests for the offline ``mock`` provider (sonika.mock_provider).
+"""
+
+import json
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from sonika.factory import get_model
+from sonika.mock_provider import MockRateLimitError, load_script
+
+_MSGS = [SystemMessage(content="sys"), HumanMessage(content="revisa el log")]
+
+
+def _script(tmp_path, data, suffix=".json"):
+    path = tmp_path / f"script{suffix}"
+    if suffix == ".json":
+        path.write_text(json.dumps(data))
+    else:
+        import yaml
+        path.write_text(yaml.safe_dump(data))
+    return str(path)
+
+
+async def _collect(model, messages=_MSGS):
+    acc = None
+    chunks = []
+    async for c in model.astream(messages):
+        chunks.append(c)
+        acc = c if acc is None else acc + c
+    return chunks, acc
+
+
+def test_load_script_formats(tmp_path):
+    data = {"responses": [{"text": "hola"}], "delay_ms": 3}
+    assert load_script(_script(tmp_path, data)) == data
+    assert load_script(_script(tmp_path, data, ".yaml")) == data
+    assert load_script([{"text": "x"}]) == {"responses": [{"text": "x"}]}
+    with pytest.raises(ValueError):
+        load_script({"responses": "nope"})
+
+
+def test_missing_script_path_is_an_error(tmp_path, monkeypatch):
+    env_script = _script(tmp_path, [{"text": "del entorno"}])
+    monkeypatch.setenv("SONIKA_MOCK_SCRIPT", env_script)
+    with pytest.raises(FileNotFoundError):
+        load_script(str(tmp_path / "guoin.yaml"))
+    # Only an absent source falls back to SONIKA_MOCK_SCRIPT
+    assert load_script(None) == {"responses": [{"text": "del entorno"}]}
+    monkeypatch.delenv("SONIKA_MOCK_SCRIPT")
+    assert load_script(None) == {"responses": [], "loop": False}
+
+
+@pytest.mark.asyncio
+async def test_token_stream_with_delay(tmp_path):
+    lm = get_model("mock", _script(tmp_path, {"responses": [{"text": "uno dos tres", "delay_ms": 20}]}))
+    t0 = time.perf_counter()
+    chunks, acc = await _collect(lm.model)
+    assert [c.content for c in chunks if c.content] == ["uno ", "dos ", "tres"]
+    assert acc.content == "uno dos tres"
+    assert acc.usage_metadata["output_tokens"] > 0
+    assert time.perf_counter() - t0 >= 0.06
+
+
+@pytest.mark.asyncio
+async def test_thinking_and_tool_calls(tmp_path):
+    script = [{
+        "thinking": "leo el log",
+        "text": "Voy.",
+        "tool_calls": [{"name": "read_file", "args": {"path": "/tmp/x"}}],
+    }]
+    lm = get_model("mock", _script(tmp_path, script))
+    _, acc = await _collect(lm.model.bind_tools([]))
+    kinds = [p["type"] for p in acc.content]
+    assert "thinking" in kinds and "text" in kinds
+    assert acc.tool_calls[0]["name"] == "read_file"
+    assert acc.tool_calls[0]["args"] == {"path": "/tmp/x"}
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_then_success_and_match(tmp_path):
+    script = [
+        {"match": "deploy", "text": "no"},
+        {"rate_limit": 2, "text": "ok"},
+    ]
+    lm = get_model("mock", _script(tmp_path, script))
+    for _ in range(2):
+        with pytest.raises(MockRateLimitError, match="429"):
+            await _collect(lm.model)
+    _, acc = await _collect(lm.model)
+    assert acc.content == "ok"
+    # Script exhausted: echo fallback
+    _, acc = await _collect(lm.model)
+    assert acc.content == "mock: revisa el log"
+
+
+@pytest.mark.asyncio
+async def test_prewarm_ping_does_not_consume_script(tmp_path):
+    lm = get_model("mock", _script(tmp_path, [{"text": "primera"}]))
+    await lm.model.ainvoke([HumanMessage(content="1")])
+    _, acc = await _collect(lm.model)
+    assert acc.content == "primera"
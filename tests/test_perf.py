@@ -0,0 +1,65 @@
+"""
+Tests for the observed-latency store and the "auto" model pick (sonika.perf).
+"""
+
+import math
+
+from sonika.cli.models_catalog import ModelInfo
+from sonika.perf import PerfStore, pick_auto
+
+_MODELS = [
+    ModelInfo("google", "slow-cheap", 1_000_000, 0.1, 0.4),
+    ModelInfo("google", "fast", 1_000_000, 1.0, 4.0),
+    ModelInfo("google", "small-window", 32_000, 0.1, 0.4),
+    ModelInfo("openai", "pricey", 200_000, 10.0, 40.0),
+]
+
+
+def _observe(store, model, ttft_ms, tps, n=3, ok=True, provider="google"):
+    for _ in range(n):
+        store.record(provider, model, ttft_ms, int(tps * 2), 2.0, ok=ok)
+
+
+def test_samples_roll_and_persist_across_processes(tmp_path):
+    path = tmp_path / "perf.json"
+    a = PerfStore(path, window=5)
+    for i in range(8):
+        a.record("google", "fast", 100 + i, 200, 2.0, ok=i != 7)
+    a.save()
+
+    perf = PerfStore(path).stats("google", "fast")
+    assert perf.samples == 5
+    assert perf.ttft_ms == 104.5  # median of the 4 successful of the last 5
+    assert perf.tokens_per_s == 100 and perf.error_rate == 0.2
+
+    b = PerfStore(path)
+    b.record("openai", "pricey", 900, 10, 1.0, ok=True)
+    b.save()
+    a.save()
+    assert set(PerfStore(path).all_stats()) == {("google", "fast"), ("openai", "pricey")}
+
+
+def test_auto_picks_fastest_adequate_model(tmp_path):
+    store = PerfStore(tmp_path / "perf.json")
+    _observe(store, "slow-cheap", 3000, 20)
+    _observe(store, "fast", 400, 150)
+    _observe(store, "small-window", 100, 500)
+    _observe(store, "pricey", 200, 300, provider="openai")
+
+    pick = pick_auto(store, _MODELS, ["google", "openai"], min_context=100_000)
+    assert pick.model_id == "pricey"
+    pick = pick_auto(store, _MODELS, ["google", "openai"], min_context=100_000, max_price=10)
+    assert pick.model_id == "fast"
+    # Failing models are skipped
+    _observe(store, "fast", None, 0, n=10, ok=False)
+    pick = pick_auto(store, _MODELS, ["google"], min_context=100_000)
+    assert pick.model_id == "slow-cheap"
+
+
+def test_auto_without_observations_takes_the_cheapest(tmp_path):
+    store = PerfStore(tmp_path / "perf.json")
+    assert pick_auto(store, _MODELS, ["google"]).model_id == "slow-cheap"
+    assert pick_auto(store, _MODELS, ["deepseek"]) is None
+    assert store.stats("google", "fast") is None
+    store.record("google", "fast", None, 0, 0.0, ok=False)
+    assert math.isinf(store.stats("google", "fast").expected_ms())
@@ -0,0 +1,60 @@
+"""
+Tests for the background persistence writer (sonika.persist).
+"""
+
+import json
+import threading
+
+from sonika.cli import session_manager
+from sonika.cli.config import Config
+from sonika.cli.session_manager import SessionManager
+from sonika.persist import BackgroundWriter
+
+
+def test_pending_writes_for_the_same_key_coalesce():
+    writer = BackgroundWriter()
+    gate = threading.Event()
+    done = []
+    writer.submit("block", gate.wait)
+    for i in range(5):
+        writer.submit("a", lambda i=i: done.append(("a", i)))
+    writer.submit("b", lambda: done.append(("b", 0)))
+    assert writer.depth == 3
+    gate.set()
+
+    assert writer.flush(timeout=5)
+    assert done == [("a", 4), ("b", 0)]
+    assert writer.coalesced == 4 and writer.written == 3 and writer.max_depth == 3
+    assert "4 agrupadas" in writer.stats_lines()[0]
+
+
+def test_failed_write_is_counted_and_does_not_stop_the_worker():
+    writer = BackgroundWriter()
+    writer.submit("x", lambda: 1 / 0)
+    done = []
+    writer.submit("y", lambda: done.append(1))
+    assert writer.flush(timeout=5)
+    assert done == [1] and writer.errors == 1
+    assert "ZeroDivisionError" in writer.stats_lines()[1]
+
+
+def test_manager_saves_in_background_and_flushes_before_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", tmp_path / "sessions")
+    mgr = SessionManager(writer=BackgroundWriter())
+    s = mgr.new_session("openai", "o3")
+    for i in range(10):
+        s.add_message("user", f"q{i}")
+        mgr.save(s)
+    assert mgr.load(s.id).messages == s.messages
+    assert mgr.list_sessions()[0]["message_count"] == 10
+
+
+def test_config_writes_atomically_through_the_writer(tmp_path):
+    writer = BackgroundWriter()
+    cfg = Config(tmp_path, writer=writer)
+    cfg.set_key("google", "k1")
+    cfg.set_active("google", "gemini-2.5-flash")
+    writer.flush()
+    data = json.loads((tmp_path / "config.json").read_text(encoding="utf-8"))
+    assert data["keys"] == {"google": "k1"} and data["active_model"] == "gemini-2.5-flash"
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,101 @@
+"""
+Tests for the client-side token-bucket rate limiter (sonika.rate_limit).
+
+Bucket state lives in tmp_path; the wrapped provider is a fake chat model.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from sonika.filelock import locked
+from sonika.rate_limit import RateLimitedChatModel, RateLimiter, limits_for
+
+
+def test_rpm_bucket_queues_in_arrival_order(tmp_path):
+    limiter = RateLimiter(tmp_path / "rl.json")
+    waits = [limiter.reserve("p/m", rpm=2, tpm=0, tokens=10, now=100.0) for _ in range(4)]
+    # Two fit in the bucket; the next ones wait one refill interval each
+    assert waits == [0.0, 0.0, pytest.approx(30.0), pytest.approx(60.0)]
+
+
+def test_tpm_bucket_refills_and_caps_oversized_prompts(tmp_path):
+    limiter = RateLimiter(tmp_path / "rl.json")
+    assert limiter.reserve("p/m", rpm=0, tpm=600, tokens=600, now=0.0) == 0.0
+    # 300 tokens at 10 tokens/s
+    assert limiter.reserve("p/m", rpm=0, tpm=600, tokens=300, now=0.0) == pytest.approx(30.0)
+    # A minute later the debt is repaid (300 left); an oversized prompt only needs a full bucket
+    assert limiter.reserve("p/m", rpm=0, tpm=600, tokens=5000, now=60.0) == pytest.approx(30.0)
+
+
+def test_adjust_returns_overestimated_tokens(tmp_path):
+    limiter = RateLimiter(tmp_path / "rl.json")
+    limiter.reserve("p/m", rpm=0, tpm=100, tokens=100, now=0.0)
+    limiter.adjust("p/m", 100, -100)
+    assert limiter.reserve("p/m", rpm=0, tpm=100, tokens=100, now=0.0) == 0.0
+
+
+def _reserve_in_child(path, out):
+    out.put(RateLimiter(path).reserve("p/m", rpm=1, tpm=0, tokens=1, now=50.0))
+
+
+def test_state_is_shared_across_processes(tmp_path):
+    path = tmp_path / "rl.json"
+    assert RateLimiter(path).reserve("p/m", rpm=1, tpm=0, tokens=1, now=50.0) == 0.0
+    out = multiprocessing.get_context("spawn").Queue()
+    child = multiprocessing.get_context("spawn").Process(target=_reserve_in_child, args=(path, out))
+    child.start()
+    child.join(30)
+    assert out.get(timeout=5) == pytest.approx(60.0)
+
+
+def test_limits_come_from_catalog_with_overrides():
+    assert limits_for("openai", "o3") == (500, 30_000)
+    assert limits_for("openai", "o3", {"openai/o3": {"tpm": 1000}}) == (500, 1000)
+    assert limits_for("mock", "script.json") == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_wrapper_waits_and_reports(tmp_path, monkeypatch):
+    slept = []
+
+    async def _sleep(s):
+        slept.append(s)
+
+    monkeypatch.setattr("sonika.rate_limit.asyncio.sleep", _sleep)
+    limiter = RateLimiter(tmp_path / "rl.json")
+    notices = []
+    limiter.on_wait = lambda key, wait: notices.append((key, round(wait)))
+    inner = GenericFakeChatModel(messages=iter([AIMessage(content="uno"), AIMessage(content="dos")]))
+    model = RateLimitedChatModel(inner=inner, limiter=limiter, key="p/m", rpm=1)
+
+    assert (await model.ainvoke([HumanMessage(content="hola")])).content == "uno"
+    assert (await model.ainvoke([HumanMessage(content="hola")])).content == "dos"
+    assert notices == [("p/m", 60)]
+    assert slept and slept[0] == pytest.approx(60, abs=1)
+    assert limiter.waits == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_keeps_the_loop_running_while_the_state_file_is_locked(tmp_path):
+    limiter = RateLimiter(tmp_path / "rl.json")
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with locked(limiter.path):
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+    task = asyncio.ensure_future(limiter.acquire("p/m", 10, 0, 1))
+    await asyncio.sleep(0.05)  # the loop still runs while acquire waits for the lock
+    assert not task.done()
+    release.set()
+    assert await task == 0
+    holder.join()
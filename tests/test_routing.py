@@ -0,0 +1,165 @@
+"""
+Tests for per-role model routing (sonika.routing).
+
+Models are fakes exposing the ILanguageModel ``.model`` surface; no provider
+client is created.
+"""
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+
+from sonika.routing import (
+    RoleRouter,
+    cheapest_adequate,
+    classify_role,
+    resolve_routing,
+)
+
+
+class _FakeChat:
+    def __init__(self, name, text="ok", fail=False, usage=None):
+        self.name = name
+        self.text = text
+        self.fail = fail
+        self.error = f"{name} down"
+        self.usage = usage or {"input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100}
+        self.calls = 0
+
+    def bind_tools(self, tools):
+        return self
+
+    def _chunk(self, text, usage=None):
+        return AIMessageChunk(content=text, usage_metadata=usage)
+
+    async def astream(self, messages):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError(self.error)
+        if self.text:
+            yield self._chunk(self.text)
+        yield self._chunk("", self.usage)
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError(self.error)
+        return self._chunk(self.text, self.usage)
+
+
+class _FakeLM:
+    def __init__(self, chat):
+        self.model = chat
+
+
+def _router(strong, fast, escalate=True):
+    routing = {
+        "planner": "gemini-2.5-pro",
+        "evaluator": "gemini-2.5-flash",
+        "retry": "gemini-2.5-flash",
+        "reporter": "gemini-2.5-flash",
+    }
+    models = {"gemini-2.5-pro": _FakeLM(strong), "gemini-2.5-flash": _FakeLM(fast)}
+    return RoleRouter("google", routing, models, tools=["t"], escalate=escalate)
+
+
+_AFTER_TOOL = [
+    HumanMessage(content="hola"),
+    ToolMessage(content="42", tool_call_id="c1"),
+]
+
+
+async def _drain(router, messages):
+    return [c async for c in router.astream(messages)]
+
+
+# ── Resolution ────────────────────────────────────────────────────────────────
+
+def test_cheapest_adequate_skips_experimental_models():
+    assert cheapest_adequate("google", 1_000_000).model_id == "gemini-2.5-flash"
+    assert cheapest_adequate("openai", 200_000).model_id == "o4-mini"
+    assert cheapest_adequate("openai", 10_000_000) is None
+
+
+def test_resolve_routing_keeps_agent_roles_on_the_active_model():
+    r = resolve_routing("google", "gemini-2.5-pro", {})
+    assert r["planner"] == r["evaluator"] == r["retry"] == "gemini-2.5-pro"
+    assert r["reporter"] == "gemini-2.5-flash"
+    r = resolve_routing("google", "gemini-2.5-pro", {"evaluator": "auto"})
+    assert r["evaluator"] == "gemini-2.5-flash" and r["retry"] == "gemini-2.5-pro"
+
+
+def test_resolve_routing_never_upgrades_and_honours_overrides():
+    assert set(resolve_routing("google", "gemini-2.5-flash", {}).values()) == {"gemini-2.5-flash"}
+    assert set(resolve_routing("openai", "custom-model", {}).values()) == {"custom-model"}
+    r = resolve_routing("openai", "o3", {"reporter": "o3", "planner": "o1", "retry": "auto"})
+    assert r == {"planner": "o1", "evaluator": "o3", "retry": "o4-mini", "reporter": "o3"}
+
+
+def test_classify_role():
+    assert classify_role([HumanMessage(content="x")]) == "planner"
+    assert classify_role(_AFTER_TOOL) == "evaluator"
+    failed = _AFTER_TOOL + [ToolMessage(content="Error: boom", tool_call_id="c2")]
+    assert classify_role(failed) == "retry"
+
+
+# ── Dispatch ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_router_dispatches_by_role_and_records_cost():
+    strong, fast = _FakeChat("pro", "plan"), _FakeChat("flash", "done")
+    router = _router(strong, fast)
+
+    await _drain(router, [HumanMessage(content="hola")])
+    chunks = await _drain(router, _AFTER_TOOL)
+
+    assert strong.calls == 1 and fast.calls == 1
+    assert "".join(c.content for c in chunks) == "done"
+    ev = router.stats["evaluator"]
+    assert ev.calls == 1 and ev.escalations == 0
+    assert ev.cost == pytest.approx(1000 / 1e6 * 0.15 + 100 / 1e6 * 0.60)
+    assert router.stats["planner"].cost == pytest.approx(1000 / 1e6 * 1.25 + 100 / 1e6 * 10.0)
+    assert any(line.startswith("evaluator") for line in router.stats_lines())
+
+
+@pytest.mark.asyncio
+async def test_router_escalates_failed_evaluator_to_strong_model():
+    strong, fast = _FakeChat("pro", "rescued"), _FakeChat("flash", fail=True)
+    router = _router(strong, fast)
+
+    chunks = await _drain(router, _AFTER_TOOL)
+    assert "".join(c.content for c in chunks) == "rescued"
+    assert router.stats["evaluator"].escalations == 1
+
+    response = await router.ainvoke(_AFTER_TOOL)
+    assert response.content == "rescued"
+    assert router.stats["evaluator"].escalations == 2
+
+
+@pytest.mark.asyncio
+async def test_router_does_not_escalate_rate_limits():
+    strong, fast = _FakeChat("pro", "rescued"), _FakeChat("flash", fail=True)
+    fast.error = "429 Resource exhausted: quota exceeded"
+    router = _router(strong, fast)
+
+    with pytest.raises(RuntimeError, match="429"):
+        await _drain(router, _AFTER_TOOL)
+    with pytest.raises(RuntimeError, match="quota"):
+        await router.ainvoke(_AFTER_TOOL)
+    assert strong.calls == 0 and router.stats["evaluator"].escalations == 0
+    assert router.routed() == {"evaluator": "gemini-2.5-flash", "retry": "gemini-2.5-flash"}
+
+
+@pytest.mark.asyncio
+async def test_router_escalates_empty_answer():
+    strong, fast = _FakeChat("pro", "rescued"), _FakeChat("flash", text="")
+    router = _router(strong, fast)
+    chunks = await _drain(router, _AFTER_TOOL)
+    assert "".join(c.content for c in chunks) == "rescued"
+    assert strong.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_router_without_escalation_raises():
+    router = _router(_FakeChat("pro"), _FakeChat("flash", fail=True), escalate=False)
+    with pytest.raises(RuntimeError):
+        await _drain(router, _AFTER_TOOL)
@@ -0,0 +1,111 @@
+"""
+Tests for the SQLite session store (sonika.cli.session_db) and the /search
+path shared with the journal store.
+"""
+
+import pytest
+
+from sonika.cli import session_db, session_manager
+from sonika.cli.session_db import SQLiteSessionStore, get_sqlite_store, migrate_from_files
+from sonika.cli.session_manager import JournalStore, SessionManager
+
+
+@pytest.fixture(autouse=True)
+def sessions_dir(tmp_path, monkeypatch):
+    path = tmp_path / "sessions"
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", path)
+    monkeypatch.setattr(session_db, "_STORES", {})
+    return path
+
+
+@pytest.fixture
+def mgr(tmp_path):
+    return SessionManager(SQLiteSessionStore(tmp_path / "s.sqlite"))
+
+
+def _chat(mgr, *pairs):
+    s = mgr.new_session("openai", "o3")
+    for question, answer in pairs:
+        s.add_message("user", question)
+        s.add_message("assistant", answer)
+        s.save()
+    return s
+
+
+def test_round_trip_and_incremental_rows(mgr):
+    s = _chat(mgr, ("hola", "que tal"), ("revisa nginx", "nginx esta caido"))
+    s.pinned.append("host db-01")
+    s.messages[-1]["usage"] = {"input_tokens": 5}
+    s.save()
+
+    loaded = mgr.load(s.id)
+    assert loaded.messages[:3] == s.messages[:3]
+    assert loaded.pinned == ["host db-01"]
+    assert loaded.title == "hola"
+    count = mgr.store._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    assert count == 4
+
+
+def test_listing_pages_by_updated_at(mgr):
+    ids = [_chat(mgr, (f"pregunta {i}", "ok")).id for i in range(5)]
+    page = mgr.list_sessions(limit=2, offset=1)
+    assert [p["id"] for p in page] == ids[::-1][1:3]
+    assert page[0]["message_count"] == 2
+
+
+def test_search_ranks_and_snippets(mgr):
+    a = _chat(mgr, ("el servidor nginx no responde", "reinicie nginx, nginx ya responde"))
+    _chat(mgr, ("configuración del firewall", "listo"))
+
+    hits = mgr.search("nginx")
+    assert {h["session_id"] for h in hits} == {a.id}
+    assert hits[0]["role"] == "assistant"  # two mentions rank above one
+    assert "[nginx]" in hits[0]["snippet"]
+    # Accents are folded and FTS syntax in the query is inert
+    assert mgr.search("configuracion")[0]["title"] == "configuración del firewall"
+    assert mgr.search('nginx" OR *') == []
+
+
+def test_delete_clears_search_index(mgr):
+    s = _chat(mgr, ("borra esto", "ok"))
+    mgr.delete(s.id)
+    assert mgr.search("borra") == []
+    with pytest.raises(FileNotFoundError):
+        mgr.load(s.id)
+
+
+def test_one_shot_migration_from_journals(tmp_path):
+    files = SessionManager(JournalStore())
+    old = _chat(files, ("migrame", "hecho"))
+
+    store = get_sqlite_store(tmp_path / "m.sqlite")
+    mgr = SessionManager(store)
+    assert mgr.load(old.id).messages == old.messages
+    assert mgr.search("migrame")[0]["session_id"] == old.id
+
+    # Later journal changes are not re-imported automatically...
+    _chat(files, ("nueva", "ok"))
+    session_db._STORES.clear()
+    assert len(SessionManager(get_sqlite_store(tmp_path / "m.sqlite")).list_sessions()) == 1
+    # ...but an explicit migration picks them up without duplicating rows
+    assert migrate_from_files(store) == 2
+    assert len(mgr.list_sessions()) == 2
+    assert len(mgr.load(old.id).messages) == 2
+
+
+def test_journal_store_search_fallback():
+    mgr = SessionManager(JournalStore())
+    s = _chat(mgr, ("revisa el log de nginx", "sin errores"))
+    hits = mgr.search("NGINX log")
+    assert hits[0]["session_id"] == s.id and "[nginx]" in hits[0]["snippet"].lower()
+
+
+def test_tail_load_reads_only_the_last_rows(mgr):
+    s = _chat(mgr, *[(f"q{i}", f"a{i}") for i in range(10)])
+    lazy = mgr.load(s.id, tail=3)
+    assert [m["content"] for m in lazy.messages] == ["a8", "q9", "a9"]
+    assert lazy.page(0, 4) == s.messages[:4]
+
+    lazy.add_message("user", "q10")
+    lazy.save()
+    assert mgr.load(s.id).messages == s.messages + [{"role": "user", "content": "q10"}]
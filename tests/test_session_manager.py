@@ -0,0 +1,178 @@
+"""
+Tests for session persistence and the session index (sonika.cli.session_manager).
+
+SESSIONS_DIR is redirected to tmp_path for every test.
+"""
+
+import json
+
+import pytest
+
+from sonika.cli import session_manager
+from sonika.cli.session_manager import Session, SessionIndex, SessionManager
+
+
+@pytest.fixture(autouse=True)
+def sessions_dir(tmp_path, monkeypatch):
+    path = tmp_path / "sessions"
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", path)
+    return path
+
+
+def _session(title: str, turns: int = 1) -> Session:
+    s = Session(provider="openai", model="o3")
+    for i in range(turns):
+        s.add_message("user", f"{title} {i}")
+        s.add_message("assistant", "ok")
+    s.save()
+    return s
+
+
+def test_listing_reads_only_the_index(sessions_dir, monkeypatch):
+    a = _session("primera", turns=2)
+    b = _session("segunda")
+
+    def _no_parse(*args, **kwargs):
+        raise AssertionError("session file parsed while listing")
+
+    monkeypatch.setattr(SessionIndex, "_scan", _no_parse)
+    listed = SessionManager().list_sessions()
+    assert [s["id"] for s in listed] == [b.id, a.id]
+    assert listed[1]["message_count"] == 4
+    assert listed[1]["title"] == "primera 0"
+    assert "messages" not in listed[0]
+    assert [s["id"] for s in SessionManager().list_sessions(limit=1, offset=1)] == [a.id]
+
+
+def test_index_is_rebuilt_when_missing_or_stale(sessions_dir):
+    a = _session("uno")
+    index = SessionIndex()
+    index.path.unlink()
+    assert [s["id"] for s in SessionManager().list_sessions()] == [a.id]
+
+    # A session file dropped in by hand changes the directory mtime
+    other = Session(provider="google", model="gemini-2.5-flash", title="a mano")
+    (sessions_dir / f"{other.id}.json").write_text(json.dumps(other.to_dict()))
+    assert {s["id"] for s in SessionManager().list_sessions()} == {a.id, other.id}
+
+
+def test_saves_append_and_reads_compact_the_log(sessions_dir, monkeypatch):
+    monkeypatch.setattr(SessionIndex, "COMPACT_SLACK", 5)
+    s = _session("uno")
+    path = SessionIndex().path
+    for _ in range(10):
+        s.save()
+    assert len(path.read_text().splitlines()) == 11
+    assert list(SessionManager().list_sessions()[0]) and len(path.read_text().splitlines()) == 1
+
+
+def test_torn_last_line_triggers_rebuild(sessions_dir):
+    a = _session("uno")
+    with open(SessionIndex().path, "a") as fh:
+        fh.write('{"put": {"id": "zz"')
+    _session("dos")
+    assert len(SessionManager().list_sessions()) == 2
+    assert a.id in SessionIndex().entries()
+
+
+def test_delete_updates_index(sessions_dir):
+    a = _session("uno")
+    b = _session("dos")
+    blob = session_manager.blob_path(a.id, "thinking-1.txt")
+    blob.parent.mkdir(parents=True)
+    blob.write_text("razonamiento")
+    SessionManager().delete(a.id)
+    assert [s["id"] for s in SessionManager().list_sessions()] == [b.id]
+    assert a.id not in SessionIndex().entries()
+    assert not blob.parent.exists()
+
+
+def test_pinned_facts_round_trip(sessions_dir):
+    s = _session("uno")
+    s.pinned.append("el host es db-01")
+    s.save()
+    assert SessionManager().load(s.id).pinned == ["el host es db-01"]
+
+
+def test_save_appends_only_new_lines(sessions_dir):
+    s = _session("uno", turns=3)
+    path = sessions_dir / f"{s.id}.jsonl"
+    before = path.read_text()
+    s.add_message("user", "otra")
+    s.save()
+    added = path.read_text()[len(before):].splitlines()
+    assert [list(json.loads(line)) for line in added] == [["msg"], ["meta"]]
+
+    loaded = SessionManager().load(s.id)
+    assert loaded.messages == s.messages
+    assert loaded.tokens_in == s.tokens_in and loaded.title == "uno 0"
+
+
+def test_journal_is_compacted_past_threshold(sessions_dir, monkeypatch):
+    monkeypatch.setattr(session_manager, "JOURNAL_COMPACT_AT", 3)
+    s = _session("uno")
+    for _ in range(5):
+        s.save()
+    lines = (sessions_dir / f"{s.id}.jsonl").read_text().splitlines()
+    assert sum("meta" in json.loads(line) for line in lines) <= 3
+    assert SessionManager().load(s.id).messages == s.messages
+
+
+def test_torn_journal_tail_is_skipped_and_rewritten(sessions_dir):
+    s = _session("uno")
+    path = sessions_dir / f"{s.id}.jsonl"
+    with open(path, "a") as fh:
+        fh.write('{"msg": {"role": "user", "con')
+    loaded = SessionManager().load(s.id)
+    assert len(loaded.messages) == 2
+    loaded.add_message("user", "dos")
+    loaded.save()
+    assert [m["content"] for m in SessionManager().load(s.id).messages] == ["uno 0", "ok", "dos"]
+
+
+def test_legacy_json_sessions_load_and_convert(sessions_dir):
+    legacy = Session(provider="openai", model="o3", messages=[{"role": "user", "content": "hola"}])
+    sessions_dir.mkdir(parents=True, exist_ok=True)
+    (sessions_dir / f"{legacy.id}.json").write_text(json.dumps(legacy.to_dict()))
+
+    assert [s["id"] for s in SessionManager().list_sessions()] == [legacy.id]
+    loaded = SessionManager().load(legacy.id)
+    loaded.save()
+    assert not (sessions_dir / f"{legacy.id}.json").exists()
+    assert SessionManager().load(legacy.id).messages == [{"role": "user", "content": "hola"}]
+
+
+def test_tail_load_pages_back_and_keeps_appending():
+    s = _session("turno", turns=30)
+    lazy = SessionManager().load(s.id, tail=4)
+
+    assert [m["content"] for m in lazy.messages] == ["turno 28", "ok", "turno 29", "ok"]
+    assert lazy.message_count == 60
+    assert lazy.page(0, 2) == s.messages[:2]
+    assert lazy.page(54, 60) == s.messages[54:]
+
+    lazy.add_message("user", "nuevo")
+    lazy.save()
+    full = SessionManager().load(s.id)
+    assert full.messages == s.messages + [{"role": "user", "content": "nuevo"}]
+    assert full.title == "turno 0"
+    assert SessionManager().list_sessions()[0]["message_count"] == 61
+
+
+def test_tail_load_snapshot_keeps_older_messages(monkeypatch):
+    s = _session("snap", turns=5)
+    lazy = SessionManager().load(s.id, tail=2)
+    monkeypatch.setattr(session_manager, "JOURNAL_COMPACT_AT", 0)
+    lazy._meta_lines = 5
+    lazy.add_message("user", "mas")
+    lazy.save()
+    assert len(SessionManager().load(s.id).messages) == 11
+
+
+def test_tail_load_skips_torn_last_line(sessions_dir):
+    s = _session("roto", turns=3)
+    with open(sessions_dir / f"{s.id}.jsonl", "a", encoding="utf-8") as fh:
+        fh.write('{"msg": {"role": "user", "cont')
+    lazy = SessionManager().load(s.id, tail=2)
+    assert lazy.message_count == 6 and lazy.messages == s.messages[-2:]
+    assert not lazy._journaled
@@ -0,0 +1,191 @@
+"""
+Tests for the astream_events normalizer (sonika.stream_events).
+"""
+
+import io
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from sonika.stream_events import (
+    FinalReport,
+    Interrupt,
+    SPILL_KEEP_CHARS,
+    StreamNormalizer,
+    TextBuffer,
+    Token,
+    ToolEnd,
+    ToolStart,
+    brief_args,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chunk(content, **kwargs):
+    return ("messages", (AIMessageChunk(content=content, **kwargs), {"langgraph_node": "agent"}))
+
+
+def _kinds(events):
+    return [type(e).__name__ for e in events]
+
+
+def test_text_thinking_and_usage_chunks():
+    norm = StreamNormalizer()
+    assert norm.feed("messages", (AIMessage(content="no es chunk"), {})) == ()
+    assert norm.feed(*_chunk("")) == ()
+    assert norm.first_chunk_at is not None
+
+    (tok,) = norm.feed(*_chunk("Hola"))
+    assert type(tok) is Token and tok.text == "Hola" and tok.pre_tool
+
+    events = norm.feed(*_chunk(
+        [{"type": "thinking", "thinking": "pienso"}, {"type": "text", "text": "ya"}, " fin"],
+        usage_metadata={"input_tokens": 5, "output_tokens": 2, "total_tokens": 7},
+        response_metadata={"sonika_cache": "hit"},
+    ))
+    assert _kinds(events) == ["ModelUsage", "Thinking", "Token", "Token"]
+    usage, thinking, *tokens = events
+    assert usage.usage["input_tokens"] == 5 and usage.cache_hit
+    assert usage.metadata == {"langgraph_node": "agent"}
+    assert thinking.text == "pienso" and [t.text for t in tokens] == ["ya", " fin"]
+
+
+def test_tool_calls_are_correlated_by_id():
+    clock = _Clock()
+    norm = StreamNormalizer(clock=clock)
+    calls = [
+        {"name": "read_file", "args": {"path": "/a"}, "id": "c1"},
+        {"name": "read_file", "args": {"path": "/b"}, "id": "c2"},
+        {"name": "nope", "args": {}, "id": "c3"},
+    ]
+    events = norm.feed("updates", {"agent": {
+        "messages": [AIMessage(content="", tool_calls=calls)],
+        "status_events": [{"type": "retrying", "attempt": 1, "wait_s": 0.5}],
+        "partial_responses": ["leyendo"],
+        "final_report": "informe viejo",
+    }})
+    assert _kinds(events) == ["Retry", "ToolStart", "ToolStart", "ToolStart", "Partial"]
+    assert [e.id for e in events if type(e) is ToolStart] == ["c1", "c2", "c3"]
+    assert norm.tools_started and norm.pending_tools == 3
+
+    clock.now += 2.5
+    events = norm.feed("updates", {"tools": {
+        "messages": [
+            ToolMessage(content="B", tool_call_id="c2"),
+            ToolMessage(content="Error: Tool 'nope' not found.", tool_call_id="c3"),
+            ToolMessage(content="A", tool_call_id="c1"),
+        ],
+        "tools_executed": [
+            {"tool_name": "read_file", "status": "success", "output": "B"},
+            {"tool_name": "read_file", "status": "error", "output": "boom"},
+        ],
+    }})
+    assert [(e.id, e.name, e.status, e.output) for e in events] == [
+        ("c2", "read_file", "success", "B"),
+        ("c3", "nope", "error", "Error: Tool 'nope' not found."),
+        ("c1", "read_file", "error", "boom"),
+    ]
+    assert events[0].args == {"path": "/b"} and events[0].elapsed == 2.5
+    assert norm.pending_tools == 0
+
+    (tok,) = norm.feed(*_chunk("listo"))
+    assert not tok.pre_tool
+
+
+def test_results_without_tool_messages_match_oldest_call_by_name():
+    norm = StreamNormalizer()
+    norm.feed("updates", {"agent": {"messages": [AIMessage(content="", tool_calls=[
+        {"name": "get_datetime", "args": {}, "id": None},
+        {"name": "get_datetime", "args": {"tz": "UTC"}, "id": None},
+    ])]}})
+    events = norm.feed("updates", {"tools": {"tools_executed": [
+        {"tool_name": "get_datetime", "status": "success", "output": "hoy"},
+    ]}})
+    assert type(events[0]) is ToolEnd and events[0].args == {} and norm.pending_tools == 1
+
+
+def test_interrupt_and_final_report():
+    norm = StreamNormalizer()
+    value = {"type": "permission_request", "tool": "run_command", "params": {"cmd": "ls"}}
+    (ev,) = norm.feed("updates", {"__interrupt__": (SimpleNamespace(value=value),)})
+    assert type(ev) is Interrupt and ev.tool == "run_command" and ev.params == {"cmd": "ls"}
+
+    (ev,) = norm.feed("updates", {"agent": {"messages": [AIMessage(content="ok")], "final_report": "Hecho."}})
+    assert type(ev) is FinalReport and ev.text == "Hecho."
+    assert norm.feed("updates", {"evaluator": None}) == ()
+    assert norm.feed("custom", {}) == ()
+
+
+def test_brief_args():
+    assert brief_args({"path": "/var/log/syslog", "n": 3}) == "path='/var/log/syslog', n=3"
+    assert len(brief_args({k: "v" * 500 for k in "abcde"})) == 120
+
+
+_THOUGHT = "".join(f"paso {i}: reviso\n" if i % 3 else f"paso {i} " for i in range(200))
+
+
+def _buffer(text, step, **kwargs):
+    buf = TextBuffer(**kwargs)
+    for i in range(0, len(text), step):
+        buf.append(text[i:i + step])
+    return buf
+
+
+def test_text_buffer_counts_lines_as_deltas_arrive():
+    for text in (_THOUGHT, _THOUGHT + "sin salto", "", "\n\n"):
+        for step in (1, 5, 64):
+            buf = _buffer(text, step)
+            lines = text.splitlines()
+            assert buf.text() == text and len(buf) == len(text)
+            assert buf.line_count == len(lines)
+            assert buf.head(3) == "\n".join(lines[:3])
+            assert buf.tail(3) == "\n".join(lines[-3:])
+            assert not buf.spilled
+
+
+def test_text_buffer_spills_past_the_cap(tmp_path):
+    spill = tmp_path / "blobs" / "s1" / "thinking-1.txt"
+    long = _THOUGHT * 20
+    buf = _buffer(long, 7, cap=1000, spill=spill)
+    assert buf.spilled and spill.exists()
+    # Only the start and the end stay in memory
+    assert sum(map(len, buf._parts)) < 2 * SPILL_KEEP_CHARS
+    lines = long.splitlines()
+    assert buf.line_count == len(lines)
+    assert buf.head(3) == "\n".join(lines[:3])
+    assert buf.tail(3) == "\n".join(lines[-3:])
+    assert buf.text() == long
+    buf.close()
+    assert spill.read_text() == long
+
+    # Without a spill path the cap does not apply
+    assert not _buffer(long, 500, cap=1000).spilled
+
+
+def test_renderer_summarizes_spilled_thinking(tmp_path):
+    from sonika.cli.renderers.claude_style import ClaudeStyleRenderer
+
+    spill = tmp_path / "thinking.txt"
+    buf = _buffer(_THOUGHT * 20, 50, cap=1000, spill=spill)
+    out = io.StringIO()
+    with redirect_stdout(out):
+        renderer = ClaudeStyleRenderer()
+        renderer._console.width = 200
+        renderer.show_ai_start("mock", "m")
+        renderer.show_thinking("\n  paso 0", 1)
+        renderer.show_thinking(" reviso", 1)
+        assert renderer._phase == "Thinking: paso 0 reviso"
+        renderer.show_thinking_end(buf)
+    buf.close()
+
+    text = out.getvalue()
+    assert f"Thinking ({buf.line_count} lines)" in text
+    assert "lineas mas" in text and str(spill) in text
@@ -30,6 +30,8 @@ class MockRenderer(BaseRenderer):
         self._input_queue: list[str] = []
         self._approval_response: bool = False
 
+    model_choice = None
+
     def queue_input(self, *texts: str):
         self._input_queue.extend(texts)
 
@@ -67,11 +69,11 @@ class MockRenderer(BaseRenderer):
     def show_ai_start(self, provider="", model=""):
         self._record("show_ai_start", provider, model)
 
-    def show_thinking(self, text, line_count):
-        self._record("show_thinking", text, line_count)
+    def show_thinking(self, delta, line_count):
+        self._record("show_thinking", delta, line_count)
 
-    def show_thinking_end(self, full_text):
-        self._record("show_thinking_end", full_text)
+    def show_thinking_end(self, thinking):
+        self._record("show_thinking_end", thinking)
 
     def show_token(self, token, is_pre_tool):
         self._record("show_token", token, is_pre_tool)
@@ -116,9 +118,9 @@ class MockRenderer(BaseRenderer):
         self._record("show_setup_prompt")
         return {}
 
-    async def show_model_picker(self, models, configured_providers):
-        self._record("show_model_picker")
-        return None
+    async def show_model_picker(self, models, configured_providers, perf=None):
+        self._record("show_model_picker", perf)
+        return self.model_choice
 
     async def show_session_picker(self, sessions):
         self._record("show_session_picker")
@@ -342,6 +344,111 @@ async def test_streaming_with_tokens():
     assert "show_final_response" in names
 
 
+@pytest.mark.asyncio
+async def test_send_through_mock_provider(tmp_path):
+    """Full _send pipeline (real orchestrator + tools) on the offline mock provider."""
+    import json
+
+    script = tmp_path / "script.json"
+    script.write_text(json.dumps({"responses": [
+        {"thinking": "Miro la fecha", "tool_calls": [{"name": "get_datetime", "args": {}}]},
+        {"text": "Hoy es un buen dia.", "delay_ms": 1, "cached_tokens": 10},
+    ]}))
+    r = MockRenderer()
+    r.queue_input("que dia es?")
+    cli = _make_cli(r)
+    cli._mode = "auto"
+    cli._config.set_active("mock", str(script))
+
+    await cli.run()
+
+    assert not r.calls_for("show_error")
+    # Thinking arrives as deltas; the end gets the whole buffer
+    assert "".join(args[0] for args in r.calls_for("show_thinking")) == "Miro la fecha"
+    assert r.calls_for("show_thinking_end")[0][0].text() == "Miro la fecha"
+    assert r.calls_for("show_tool_start")[0][0] == "get_datetime"
+    assert r.calls_for("show_tool_result")[0][1] == "success"
+    assert "".join(args[0] for args in r.calls_for("show_token")) == "Hoy es un buen dia."
+
+    # Provider usage is attributed per role and stored on the turn
+    usage = cli._session.messages[-1]["usage"]
+    assert set(usage["roles"]) == {"planner", "evaluator"}
+    assert usage["roles"]["planner"]["thinking"] > 0
+    assert usage["roles"]["evaluator"]["cached"] == 10
+    assert usage["input"] == sum(u["input"] for u in usage["roles"].values())
+    assert cli._session.tokens_in == usage["input"] and "estimated" not in usage
+    # The turn is recorded in the observed-latency store
+    perf = cli._perf.stats("mock", str(script))
+    assert perf.samples == 1 and perf.error_rate == 0 and perf.ttft_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_compare_command_runs_each_model(tmp_path):
+    """/compare sends one prompt to several models and reports each answer."""
+    import json
+
+    targets = []
+    for name, text in (("a", "Uno."), ("b", "Dos.")):
+        script = tmp_path / f"{name}.json"
+        script.write_text(json.dumps({"responses": [{"text": text, "delay_ms": 1}]}))
+        targets.append(f"mock/{script}")
+    r = MockRenderer()
+    r.queue_input(f"/compare {','.join(targets)} hola", "/compare solo un modelo")
+    cli = _make_cli(r)
+
+    with patch.object(cli, "_rebuild_bot"):
+        await cli.run()
+
+    assert r.calls_for("show_system")[-2][0].startswith("Comparando 2 modelos")
+    report = r.calls_for("show_system")[-1][0]
+    assert "Uno." in report and "Dos." in report and "TTFT" in report
+    assert "al menos 2 modelos" in r.calls_for("show_error")[0][0]
+    assert cli._perf.stats("mock", targets[1][len("mock/"):]).samples == 1
+
+
+@pytest.mark.asyncio
+async def test_model_picker_auto_resolves_to_a_catalog_model():
+    """Choosing "auto" in /model starts a session on a concrete model."""
+    r = MockRenderer()
+    r.model_choice = ("auto", "auto")
+    r.queue_input("/model")
+    cli = _make_cli(r)
+
+    with patch.object(cli, "_rebuild_bot"):
+        await cli.run()
+
+    assert r.calls_for("show_model_picker")[0][0] == {}
+    assert cli._config.active_model == "auto"
+    assert cli._session.provider == "google" and cli._session.model != "auto"
+    assert any(c[0].startswith("auto → google/") for c in r.calls_for("show_system"))
+
+
+@pytest.mark.asyncio
+async def test_compact_and_pin_through_mock_provider(tmp_path):
+    """/compact folds older turns of the orchestrator thread into a summary."""
+    import json
+
+    script = tmp_path / "script.json"
+    answer = "Listo, revisado. " * 100
+    script.write_text(json.dumps({"loop": True, "responses": [{"text": answer}]}))
+    r = MockRenderer()
+    cfg = SonikaAppConfig(context_keep_turns=1, tool_groups=["core"])
+    r.queue_input("/pin el host es db-01", "uno", "dos", "tres", "/compact", "cuatro")
+    cli = _make_cli(r, cfg)
+    cli._config.set_active("mock", str(script))
+
+    await cli.run()
+
+    assert not r.calls_for("show_error")
+    assert any("Contexto compactado" in args[0] for args in r.calls_for("show_system"))
+    state = cli._bot.graph.get_state({"configurable": {"thread_id": cli._session.id}})
+    contents = [m.content for m in state.values["messages"]]
+    assert contents[0].startswith("[Resumen de la conversacion anterior]")
+    assert "el host es db-01" in contents[0]
+    assert contents[-2:] == ["cuatro", answer]
+    assert cli._context.compactions == 1 and cli._context.saved > 0
+
+
 @pytest.mark.asyncio
 async def test_streaming_with_partial_responses():
     """Verify partial_responses from agent updates are dispatched to renderer."""
@@ -378,6 +485,34 @@ async def test_streaming_with_partial_responses():
     assert partial_calls[0][0] == "Task 1 complete, moving to task 2..."
 
 
+@pytest.mark.asyncio
+async def test_load_session_renders_tail_and_pages_back(monkeypatch, tmp_path):
+    """Opening a long session renders only the last exchanges; /history pages back."""
+    from sonika.cli import session_manager
+
+    monkeypatch.setattr(session_manager, "SESSIONS_DIR", tmp_path / "sessions")
+    r = MockRenderer()
+    cli = _make_cli(r, config=SonikaAppConfig(history_exchanges=2))
+    s = cli._mgr.new_session("google", "gemini-2.5-flash")
+    for i in range(5):
+        s.add_message("user", f"q{i}")
+        s.add_message("assistant", f"a{i}")
+    s.save()
+
+    with patch.object(cli, "_rebuild_bot"):
+        await cli._load_session(s.id)
+    assert [c[0] for c in r.calls_for("show_final_response")] == ["a3", "a4"]
+    assert any("6 mensajes anteriores" in c[0] for c in r.calls_for("show_system"))
+
+    r.calls.clear()
+    await cli._handle_command("/history 1")
+    assert [c[0] for c in r.calls_for("show_final_response")] == ["a2"]
+    await cli._handle_command("/history")
+    assert [c[0] for c in r.calls_for("show_final_response")] == ["a2", "a0", "a1"]
+    await cli._handle_command("/history")
+    assert any("No hay mensajes anteriores" in c[0] for c in r.calls_for("show_system"))
+
+
 @pytest.mark.asyncio
 async def test_extra_commands():
     """Verify extra_commands from config are dispatched."""
@@ -395,6 +530,76 @@ async def test_extra_commands():
     assert call_args[1] == ["arg1"]
 
 
+@pytest.mark.asyncio
+async def test_warmup_builds_bot_and_prewarms():
+    """Verify the startup warm-up builds the bot off the loop and prewarms it."""
+    r = MockRenderer()
+    r.queue_input("hello")
+    cli = _make_cli(r)
+
+    from langchain_core.messages import AIMessageChunk
+
+    prewarmed = asyncio.Event()
+    mock_bot = MagicMock()
+
+    async def a_prewarm():
+        prewarmed.set()
+
+    async def fake_stream(*args, **kwargs):
+        yield "messages", (AIMessageChunk(content="hi"), {})
+
+    mock_bot.a_prewarm = a_prewarm
+    mock_bot.astream_events = fake_stream
+
+    with patch.object(SonikaCLI, "_make_bot", return_value=mock_bot):
+        await cli.run()
+
+    # First turn waited for the background build instead of failing
+    assert cli._bot is mock_bot
+    assert "show_token" in r.call_names()
+    assert not r.calls_for("show_error")
+
+
+@pytest.mark.asyncio
+async def test_warmup_is_cancelled_on_exit():
+    """Verify a pending warm-up never outlives the main loop."""
+    r = MockRenderer()
+    r.queue_input("/exit")
+    cli = _make_cli(r)
+
+    mock_bot = MagicMock()
+
+    async def slow_prewarm():
+        await asyncio.sleep(30)
+
+    mock_bot.a_prewarm = slow_prewarm
+
+    await cli._start_session(build_bot=False)
+    cli._bot = mock_bot
+    await cli.run()
+    await asyncio.sleep(0)
+
+    assert cli._warmup_task is not None
+    assert cli._warmup_task.cancelled() or cli._warmup_task.done()
+
+
+@pytest.mark.asyncio
+async def test_late_warmup_build_does_not_rebind_the_new_session():
+    """A warm-up build for a replaced session is discarded, not bound."""
+    r = MockRenderer()
+    cli = _make_cli(r)
+    await cli._start_session(build_bot=False)
+    old = cli._session
+    await cli._start_session(build_bot=False)
+
+    built = []
+    with patch("sonika.factory.create_orchestrator", lambda **kw: built.append(kw["session_id"])):
+        assert await asyncio.to_thread(cli._make_bot, old) is None
+        cli._make_bot(cli._session)
+
+    assert built == [cli._session.id]
+
+
 # ── Integration test (requires GOOGLE_API_KEY) ───────────────────────────────
 
 pytestmark_integration = pytest.mark.skipif(
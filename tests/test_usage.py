@@ -0,0 +1,68 @@
+"""
+Tests for provider-reported usage accounting (sonika.usage).
+"""
+
+import pytest
+
+from sonika.cli.models_catalog import ModelInfo
+from sonika.cli.session_manager import Session
+from sonika.usage import TurnUsage, usage_cost, usage_counts
+
+_USAGE = {
+    "input_tokens": 1000,
+    "output_tokens": 200,
+    "input_token_details": {"cache_read": 400},
+    "output_token_details": {"reasoning": 50},
+}
+
+
+def test_usage_counts_reads_cache_and_reasoning_details():
+    assert usage_counts(_USAGE) == (1000, 200, 400, 50)
+    assert usage_counts({"input_tokens": 3, "output_tokens": 1}) == (3, 1, 0, 0)
+    assert usage_counts(None) == (0, 0, 0, 0)
+
+
+def test_cost_prices_cached_tokens_separately():
+    info = ModelInfo("x", "m", 100, 2.0, 8.0, cached_per_1m=0.5)
+    assert info.cost_for(1000, 200, 400) == pytest.approx((600 * 2 + 400 * 0.5 + 200 * 8) / 1e6)
+    # Without a cached price, cache hits cost the normal input price
+    assert ModelInfo("x", "m", 100, 2.0, 8.0).cost_for(1000, 0, 400) == pytest.approx(0.002)
+
+
+def test_turn_usage_sums_chunks_per_role_with_each_roles_model():
+    turn = TurnUsage("google")
+    turn.observe("planner", "gemini-2.5-pro", _USAGE)
+    turn.observe("planner", "gemini-2.5-pro", {"input_tokens": 0, "output_tokens": 10})
+    turn.observe("reporter", "gemini-2.5-flash", {"input_tokens": 500, "output_tokens": 100})
+    turn.observe("reporter", "gemini-2.5-flash", None)
+
+    data = turn.to_dict()
+    assert data["input"] == 1500 and data["output"] == 310
+    assert data["roles"]["planner"]["output"] == 210
+    assert data["roles"]["reporter"]["model"] == "gemini-2.5-flash"
+    expected = (
+        usage_cost("google", "gemini-2.5-pro", _USAGE)
+        + usage_cost("google", "gemini-2.5-pro", {"input_tokens": 0, "output_tokens": 10})
+        + usage_cost("google", "gemini-2.5-flash", {"input_tokens": 500, "output_tokens": 100})
+    )
+    assert expected > 0 and data["cost"] == pytest.approx(expected)
+
+
+def test_turn_usage_prices_a_hedged_call_with_the_provider_that_answered():
+    turn = TurnUsage("google")
+    turn.observe("agent", "o4-mini", _USAGE, provider="openai")
+    assert usage_cost("google", "o4-mini", _USAGE) == 0
+    expected = usage_cost("openai", "o4-mini", _USAGE)
+    assert expected > 0 and turn.total.cost == pytest.approx(expected)
+
+
+def test_session_totals_come_from_recorded_usage():
+    s = Session(provider="google", model="gemini-2.5-flash")
+    s.add_message("user", "hola " * 100)
+    assert s.tokens_in == 0 and s.cost == 0
+    usage = {"input": 120, "output": 30, "cached": 0, "thinking": 0, "cost": 0.001}
+    s.add_message("assistant", "ok", usage=usage)
+    s.record_usage(usage)
+    assert (s.tokens_in, s.tokens_out, s.cost) == (120, 30, 0.001)
+    assert s.messages[-1]["usage"] == usage
+    assert s.estimate_usage("hola", "ok")["estimated"] is True
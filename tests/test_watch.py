@@ -0,0 +1,192 @@
+"""
+Tests for WatchTool / WatchScheduler.
+
+Harness: create files in a temp dir and measure the latency between the
+write and the trigger firing (inotify on Linux, polling elsewhere).
+"""
+
+import threading
+import time
+
+import pytest
+
+from sonika.tools import watch as watch_mod
+from sonika.tools.watch import WatchScheduler, WatchTool, WatchTrigger, load_triggers
+
+
+def _run_scheduler(triggers, **kwargs) -> WatchScheduler:
+    sched = WatchScheduler(triggers, **kwargs)
+    sched.start_in_thread()
+    assert sched.ready.is_set()
+    return sched
+
+
+# ── Latency harness ───────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("use_inotify", [True, False], ids=["inotify", "polling"])
+def test_trigger_latency(tmp_path, use_inotify):
+    if use_inotify and not watch_mod._inotify_available():
+        pytest.skip("inotify not available")
+
+    fired = threading.Event()
+    seen: list[tuple[str, str, float]] = []
+
+    def cb(path, event):
+        seen.append((path, event, time.monotonic()))
+        fired.set()
+
+    sched = _run_scheduler(
+        [WatchTrigger(path=str(tmp_path), pattern="*.csv", debounce_ms=0, callback=cb)],
+        use_inotify=use_inotify,
+    )
+    try:
+        t0 = time.monotonic()
+        (tmp_path / "report.csv").write_text("a,b\n")
+        assert fired.wait(timeout=3), "trigger did not fire"
+        latency_ms = (seen[0][2] - t0) * 1000
+    finally:
+        sched.stop()
+
+    print(f"\n{sched.backend} trigger latency: {latency_ms:.1f} ms")
+    assert seen[0][0] == str(tmp_path / "report.csv")
+    if use_inotify:
+        assert latency_ms < 250
+
+
+def test_glob_filter_ignores_other_files(tmp_path):
+    seen: list[str] = []
+    sched = _run_scheduler(
+        [WatchTrigger(path=str(tmp_path), pattern="*.csv", debounce_ms=0,
+                      callback=lambda p, e: seen.append(p))],
+    )
+    try:
+        (tmp_path / "notes.txt").write_text("x")
+        time.sleep(0.3)
+    finally:
+        sched.stop()
+    assert seen == []
+
+
+def test_debounce_coalesces_bursts(tmp_path):
+    seen: list[str] = []
+    done = threading.Event()
+
+    def cb(path, event):
+        seen.append(path)
+        done.set()
+
+    sched = _run_scheduler(
+        [WatchTrigger(path=str(tmp_path), pattern="*", debounce_ms=150, callback=cb)],
+    )
+    try:
+        for i in range(5):
+            (tmp_path / f"part{i}.log").write_text(str(i))
+            time.sleep(0.01)
+        assert done.wait(timeout=3)
+        time.sleep(0.3)
+    finally:
+        sched.stop()
+    assert len(seen) == 1
+    assert seen[0].endswith("part4.log")
+
+
+def test_command_receives_event_env(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    marker = tmp_path / "marker.txt"
+    sched = _run_scheduler(
+        [WatchTrigger(
+            path=str(inbox),
+            debounce_ms=0,
+            command=f'echo "$SONIKA_WATCH_EVENT $SONIKA_WATCH_PATH" > {marker}',
+        )],
+    )
+    try:
+        (inbox / "job.json").write_text("{}")
+        deadline = time.monotonic() + 3
+        while time.monotonic() < deadline and not marker.exists():
+            time.sleep(0.02)
+        time.sleep(0.05)
+    finally:
+        sched.stop()
+    assert marker.read_text().strip() == f"write {inbox / 'job.json'}"
+
+
+def test_goal_dispatch_uses_runner(tmp_path):
+    got = threading.Event()
+    calls = []
+
+    def runner(trigger, path):
+        calls.append((trigger.goal, path))
+        got.set()
+
+    sched = _run_scheduler(
+        [WatchTrigger(path=str(tmp_path), debounce_ms=0, goal="resume el archivo")],
+        on_goal=runner,
+    )
+    try:
+        (tmp_path / "a.txt").write_text("hola")
+        assert got.wait(timeout=3)
+    finally:
+        sched.stop()
+    assert calls[0] == ("resume el archivo", str(tmp_path / "a.txt"))
+
+
+# ── WatchTool ─────────────────────────────────────────────────────────────────
+
+def test_watch_tool_add_list_remove(tmp_path, monkeypatch):
+    store = tmp_path / "watches.json"
+    monkeypatch.setattr(watch_mod, "WATCHES_FILE", store)
+    tool = WatchTool()
+
+    out = tool.invoke({
+        "action": "add", "path": str(tmp_path), "pattern": "*.csv",
+        "command": "echo hi", "debounce_ms": 200,
+    })
+    assert "Trigger agregado" in out
+    triggers = load_triggers(store)
+    assert len(triggers) == 1
+    assert triggers[0].pattern == "*.csv"
+    assert triggers[0].debounce_ms == 200
+
+    assert triggers[0].id in tool.invoke({"action": "list"})
+
+    out = tool.invoke({"action": "remove", "trigger_id": triggers[0].id})
+    assert "eliminado" in out
+    assert load_triggers(store) == []
+
+
+def test_watched_file_can_be_deleted_and_recreated(tmp_path, monkeypatch):
+    store = tmp_path / "watches.json"
+    monkeypatch.setattr(watch_mod, "WATCHES_FILE", store)
+    flag = tmp_path / "ready.flag"
+    flag.write_text("")
+    WatchTool().invoke({"action": "add", "path": str(flag), "command": "true"})
+
+    flag.unlink()
+    (trigger,) = load_triggers(store)
+    assert (trigger.directory, trigger.pattern) == (str(tmp_path), "ready.flag")
+    assert trigger.matches(str(tmp_path), "ready.flag", "write")
+    assert not trigger.matches(str(tmp_path), "other", "write")
+
+
+def test_trigger_on_missing_directory_does_not_stop_the_others(tmp_path):
+    if not watch_mod._inotify_available():
+        pytest.skip("inotify not available")
+    fired = threading.Event()
+    sched = _run_scheduler([
+        WatchTrigger(path=str(tmp_path / "gone"), debounce_ms=0, command="true"),
+        WatchTrigger(path=str(tmp_path), debounce_ms=0, callback=lambda p, e: fired.set()),
+    ], use_inotify=True)
+    try:
+        (tmp_path / "a.txt").write_text("hola")
+        assert fired.wait(timeout=3)
+    finally:
+        sched.stop()
+    assert len(sched.triggers) == 1
+
+
+def test_watch_tool_requires_action_target(tmp_path, monkeypatch):
+    monkeypatch.setattr(watch_mod, "WATCHES_FILE", tmp_path / "watches.json")
+    out = WatchTool().invoke({"action": "add", "path": str(tmp_path)})
+    assert out.startswith("Error")